@@ -196,6 +196,25 @@ class TestSptDataAccess(Common):
             f.localization_error = .0009
         assert a.spt_data.localization_precision == .03
 
+    def test_reify(self, tmp_path):
+        reset_random_generator(seed)
+        for k in range(3):
+            traj = random_walk(diffusivity=.1, trajectory_mean_count=5, duration=1.)
+            traj[list('nxyt')].to_csv(str(tmp_path / 'trajectories{}.txt'.format(k)), sep='\t',
+                    index=False)
+        dataframes = []
+        for worker_count in (None, 3):
+            a=RWAnalyzer()
+            a.spt_data.from_ascii_files(str(tmp_path / '*.txt'))
+            a.spt_data.reify(worker_count)
+            assert all( f.reified for f in a.spt_data )
+            dataframes.append({ f.filepath: f.dataframe for f in a.spt_data })
+        sequential, parallel = dataframes
+        assert len(sequential) == 3 and sorted(sequential) == sorted(parallel)
+        for filepath in sequential:
+            assert list(parallel[filepath].columns) == list('nxyt')
+            assert parallel[filepath].equals(sequential[filepath])
+
 class TestTesseller(Common):
 
     def test_full_fov_grid(self, one_sptdatafile, tmpdir):
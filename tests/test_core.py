@@ -1,4 +1,5 @@
 
+import os
 import numpy
 import pandas
 
@@ -133,6 +134,87 @@ class TestXyt(object):
         return pandas.DataFrame([[1,.1,.1,.05],[1,.45,.45,.1],[1,.85,.65,.12],[2,.6,.9,.25],[2,.4,.5,.3]], columns=list('nxyt'))
         assert crop(self.example_nxyt(), self.example_bbox(), add_deltas=False).equals(expected_result[list('nxyt')])
 
+    def test_iter_crop(self):
+        bboxes = [self.example_bbox(), [.3,.3,1,1], [0,0,.5,.5], [2,2,1,1]]
+        for kwargs in (dict(), dict(add_deltas=False), dict(by='origin'), dict(by='destination')):
+            for bbox, tested_result in zip(bboxes, iter_crop(self.example_nxyt(), bboxes, **kwargs)):
+                expected_result = crop(self.example_nxyt(), bbox, **kwargs)
+                assert tested_result.equals(expected_result)
+
+    def example_file(self, dirpath, df=None):
+        filepath = str(dirpath / 'trajectories.txt')
+        if df is None:
+            df = self.example_nxyt()
+        df.to_csv(filepath, sep='\t', index=False, header=False)
+        return filepath
+
+    def test_load_xyt_cache(self, tmp_path):
+        filepath = self.example_file(tmp_path)
+        expected_result = load_xyt(filepath)
+        first_result = load_xyt(filepath, cache=True)
+        assert first_result.equals(expected_result)
+        assert any( f.endswith('.cache') for f in os.listdir(str(tmp_path)) )
+        tested_result = load_xyt(filepath, cache=True)
+        assert tested_result.equals(expected_result)
+        # the columns are memory-mapped
+        assert all( isinstance(tested_result[col].values, numpy.memmap) for col in tested_result.columns )
+        # in-place modifications do not alter the cache
+        tested_result['x'] += 1
+        assert load_xyt(filepath, cache=True).equals(expected_result)
+
+    def test_load_xyt_cache_invalidation(self, tmp_path):
+        filepath = self.example_file(tmp_path)
+        load_xyt(filepath, cache=True)
+        # different options
+        tested_result = load_xyt(filepath, skiprows=1, cache=True)
+        assert len(tested_result) == len(self.example_nxyt()) - 1
+        # modified file
+        df = self.example_nxyt()
+        df['x'] *= 2
+        self.example_file(tmp_path, df)
+        stat = os.stat(filepath)
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        tested_result = load_xyt(filepath, cache=True)
+        assert not isinstance(tested_result['x'].values, numpy.memmap)
+        assert numpy.allclose(tested_result['x'], df['x'])
+
+    def example_files(self, dirpath, count=3):
+        numpy.random.seed(seed)
+        filepaths = []
+        for k in range(count):
+            # 0-based trajectory indices in the first file, 1-based in the other files
+            df = pandas.DataFrame(numpy.c_[numpy.repeat(numpy.arange(4), 5) + min(k, 1),
+                numpy.random.rand(20, 2), numpy.tile(.05 * numpy.arange(5), 4)],
+                columns=list('nxyt')).astype({'n': int})
+            filepath = str(dirpath / 'trajectories{}.txt'.format(k))
+            df.to_csv(filepath, sep='\t', index=False)
+            filepaths.append(filepath)
+        return filepaths
+
+    def test_load_xyt_parallel(self, tmp_path):
+        filepaths = self.example_files(tmp_path)
+        # the column names are read from the headers
+        expected_result = load_xyt(filepaths)
+        assert list(expected_result.columns) == list('nxyt')
+        # the trajectory indices of a file follow those of the previous file
+        assert numpy.array_equal(expected_result['n'].values,
+            numpy.repeat(numpy.arange(12), 5))
+        assert load_xyt(filepaths, worker_count=3).equals(expected_result)
+        # the columns are defined by the first file that can be read
+        filepaths.insert(0, str(tmp_path / 'missing.txt'))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            assert load_xyt(filepaths).equals(expected_result)
+            assert load_xyt(filepaths, worker_count=3).equals(expected_result)
+        # no headers
+        for filepath in filepaths[1:]:
+            pandas.read_csv(filepath, sep='\t').to_csv(filepath, sep='\t', index=False,
+                    header=False)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            assert load_xyt(filepaths).equals(expected_result)
+            assert load_xyt(filepaths, worker_count=3).equals(expected_result)
+
 
 from tramway.core.analyses import *
 class TestAnalyses(object):
@@ -183,3 +265,706 @@ class TestAnalyses(object):
         art1, art2 = find_artefacts(tree, ((set, list), dict), ('a list', 'a dict', 'another dict', 'yet another dict'))
         assert art2 == self.example_dict(2)
 
+
+from tramway.core.hdf5.store import load_rwa, save_rwa
+class TestRwa(object):
+
+    def example_branches(self):
+        numpy.random.seed(seed)
+        points = pandas.DataFrame(numpy.random.rand(10, 3), columns=list('xyt'))
+        branches = []
+        for label, data, leaves in (('first', {'a': 1}, {}),
+                ('second', {'b': 2}, {'leaf': Analyses([3, 4], dict(method='example'))}),
+                ('second', {'b': 2}, {'other leaf': Analyses('x')}), # below an existing node
+                ('second', {'b': 2}, {'leaf': Analyses([5, 6])})): # onto an existing leaf
+            branch = Analyses(points)
+            branch.add(Analyses(data), label=label, comment='{} analysis'.format(label))
+            for leaf_label, leaf in leaves.items():
+                branch[label].add(leaf, label=leaf_label)
+            branches.append(branch)
+        return branches
+
+    def assert_same_tree(self, tree, expected_tree):
+        if isinstance(expected_tree.data, pandas.DataFrame):
+            assert tree.data.equals(expected_tree.data)
+        else:
+            assert tree.data == expected_tree.data
+        assert set(tree.labels) == set(expected_tree.labels)
+        for label in expected_tree.labels:
+            assert tree.comments[label] == expected_tree.comments[label]
+            self.assert_same_tree(tree[label], expected_tree[label])
+
+    def test_append(self, tmp_path):
+        rwa_file = str(tmp_path / 'example.rwa')
+        branches = self.example_branches()
+        save_rwa(rwa_file, branches[0], force=True)
+        for branch in branches[1:]:
+            save_rwa(rwa_file, branch, append=True)
+        # same as merging the trees in memory
+        expected_tree = self.example_branches()[0]
+        for branch in self.example_branches()[1:]:
+            append_leaf(expected_tree, branch)
+        tree = load_rwa(rwa_file)
+        self.assert_same_tree(tree, expected_tree)
+        assert tree['second']['leaf'].data == [5, 6]
+        assert tree['second']['other leaf'].data == 'x'
+        # only the data of the existing leaf are replaced
+        assert tree['second']['leaf'].metadata == dict(method='example')
+
+    def test_load_label_path(self, tmp_path):
+        rwa_file = str(tmp_path / 'example.rwa')
+        tree = self.example_branches()[0]
+        for branch in self.example_branches()[1:]:
+            append_leaf(tree, branch)
+        save_rwa(rwa_file, tree, force=True)
+        # only the nodes along the label path are read
+        partial_tree = load_rwa(rwa_file, labels=['second', 'leaf'])
+        expected_tree = Analyses(tree.data)
+        expected_tree.add(Analyses(tree['second'].data), label='second',
+                comment=tree.comments['second'])
+        expected_tree['second'].add(tree['second']['leaf'], label='leaf')
+        self.assert_same_tree(partial_tree, expected_tree)
+
+
+from tramway.tessellation.kmeans import KMeansMesh
+from tramway.tessellation.nesting import NestedTessellations
+class TestTessellation(object):
+
+    def example_points(self, n=1000):
+        numpy.random.seed(seed)
+        return pandas.DataFrame(numpy.random.rand(n, 2), columns=list('xy'))
+
+    def example_mesh(self):
+        points = self.example_points()
+        mesh = KMeansMesh(avg_probability=.05)
+        mesh.tessellate(points)
+        return mesh, points
+
+    def test_cell_index_after_delete_cells(self):
+        mesh, points = self.example_mesh()
+        deleted = [3, 7]
+        mesh.delete_cells(deleted, pack_indices=False)
+        tested_result = mesh.cell_index(points)
+        centers = mesh.cell_centers
+        distances = numpy.sum((points.values[:,numpy.newaxis,:] - centers[numpy.newaxis,:,:])**2, axis=2)
+        distances[:,deleted] = numpy.inf
+        expected_result = numpy.argmin(distances, axis=1)
+        assert numpy.array_equal(tested_result, expected_result)
+        pt_ids, cell_ids = mesh.cell_index(points, radius=.1, format='pair')
+        assert pt_ids.size and not numpy.any(numpy.isin(cell_ids, deleted))
+
+    def example_nested_mesh(self, **kwargs):
+        mesh, points = self.example_mesh()
+        nested = NestedTessellations(parent=mesh, factory=KMeansMesh,
+                avg_probability=.2, initial='random')
+        numpy.random.seed(seed)
+        nested.tessellate(points, **kwargs)
+        return nested, points
+
+    def test_nested_serial(self):
+        nested, points = self.example_nested_mesh()
+        next_draw = numpy.random.rand()
+        # the nested tessellations share the random number generator, one after the other
+        mesh, _ = self.example_mesh()
+        numpy.random.seed(seed)
+        KMeansMesh(scaler=nested.scaler, avg_probability=.2, initial='random')._preprocess(points)
+        parent_index = mesh.cell_index(points)
+        for u in range(mesh.cell_adjacency.shape[0]):
+            child_points = points.iloc[numpy.flatnonzero(parent_index == u)]
+            if child_points.size:
+                child = KMeansMesh(scaler=nested.scaler, avg_probability=.2, initial='random')
+                child.tessellate(child_points)
+                assert numpy.array_equal(nested.children[u].cell_centers, child.cell_centers)
+        assert next_draw == numpy.random.rand()
+
+    def test_nested_parallel(self):
+        serial, points = self.example_nested_mesh(worker_count=1)
+        parallel, _ = self.example_nested_mesh(worker_count=2)
+        assert set(serial.children) == set(parallel.children)
+        for u in serial.children:
+            assert numpy.array_equal(serial.children[u].cell_centers,
+                    parallel.children[u].cell_centers)
+        assert numpy.array_equal(serial.cell_index(points), parallel.cell_index(points, worker_count=2))
+
+    def test_voronoi_volume(self):
+        from scipy.spatial import Voronoi, ConvexHull
+        numpy.random.seed(seed)
+        for dim in (2, 3):
+            points = pandas.DataFrame(numpy.random.rand(2000, dim), columns=list('xyz')[:dim])
+            mesh = KMeansMesh(avg_probability=.02)
+            mesh.tessellate(points)
+            voronoi = Voronoi(mesh.cell_centers)
+            volume = mesh.cell_volume
+            assert numpy.all(0 < volume)
+            for i, r in enumerate(voronoi.point_region):
+                region = voronoi.regions[r]
+                assert numpy.array_equal(mesh.cell_vertices[i], [ v for v in region if 0 <= v ])
+                if region and -1 not in region: # bounded cell
+                    assert numpy.isclose(volume[i], ConvexHull(voronoi.vertices[region]).volume)
+
+
+from tramway.helper.simulation import random_walk
+from tramway.helper.tessellation import tessellate
+from tramway.helper.inference import infer
+import warnings
+class TestInference(object):
+
+    def example_cells(self):
+        numpy.random.seed(seed)
+        points = random_walk(diffusivity=.1, trajectory_mean_count=20, lifetime_tau=.5,
+                duration=5, minor_step_count=9)
+        return tessellate(points, 'grid', avg_location_count=50, verbose=False)
+
+    def test_dv_jac(self):
+        cells = self.example_cells()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            analytic = infer(cells, 'dv', max_iter=5, verbose=False)
+            numerical = infer(cells, 'dv', max_iter=5, verbose=False, jac=None)
+        assert numpy.all(numpy.isfinite(analytic.maps.values))
+        assert numpy.all(numpy.isfinite(numerical.maps.values))
+
+    def test_local_stencil(self):
+        from tramway.inference.base import distributed, smooth_infer_init
+        from tramway.inference.stochastic_dv import _local_stencil
+        cells = distributed(self.example_cells())
+        index, reverse_index = smooth_infer_init(cells, sigma2=.0009)[:2]
+        grad_operator = cells.grad_operator(index, reverse_index)
+        assert cells.grad_operator(index, reverse_index) is grad_operator
+        assert cells.grad_operator(index.copy(), reverse_index.copy()) is grad_operator
+        variation_operator = cells.local_variation_operator(index, reverse_index)
+        X = numpy.random.rand(3, len(index))
+        for j, i in enumerate(index):
+            gradX = _local_stencil(grad_operator, j, X)
+            deltaX = _local_stencil(variation_operator, j, X)
+            for k, x in enumerate(X):
+                assert numpy.allclose(gradX[0,k], cells.grad(i, x, reverse_index))
+                assert numpy.allclose(deltaX[:,k].ravel(), cells.local_variation(i, x, reverse_index))
+
+    def test_distributed(self):
+        from tramway.inference.base import distributed
+        cells = self.example_cells()
+        def fuzzy(tessellation, cell, translocations, translocation_cell, get_point):
+            # same as the default filter, but disables the sort-based assembly
+            return translocation_cell[0] == cell
+        sorted_cells, filtered_cells = distributed(cells), distributed(cells, fuzzy=fuzzy)
+        assert set(sorted_cells.cells) == set(filtered_cells.cells)
+        for j in sorted_cells.cells:
+            cell, expected_cell = sorted_cells.cells[j], filtered_cells.cells[j]
+            assert numpy.array_equal(cell.origins.index, expected_cell.origins.index)
+            assert numpy.array_equal(cell.n, expected_cell.n)
+            assert numpy.array_equal(cell.dr, expected_cell.dr)
+            assert numpy.array_equal(cell.dt, expected_cell.dt)
+            assert numpy.array_equal(cell.center, expected_cell.center)
+        assert (sorted_cells.adjacency != filtered_cells.adjacency).nnz == 0
+
+    def test_degraded_vectorized(self):
+        cells = self.example_cells()
+        for mode in ('degraded.d', 'degraded.ddrift', 'degraded.df'):
+            for jeffreys_prior in (False, True):
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    expected_maps = infer(cells, mode, jeffreys_prior=jeffreys_prior,
+                            verbose=False).maps
+                    maps = infer(cells, mode, jeffreys_prior=jeffreys_prior, vectorized=True,
+                            verbose=False).maps
+                assert maps.index.equals(expected_maps.index)
+                assert list(maps.columns) == list(expected_maps.columns)
+                # the per-cell solver stops at the default scipy tolerance
+                assert numpy.allclose(maps.values, expected_maps.values, rtol=1e-3)
+
+    def test_shared_groups(self):
+        import pickle
+        from tramway.inference.base import distributed, _SharedGroups, __run__, __shared_run__, \
+                _unpack_frames
+        groups = list(distributed(self.example_cells()).group(max_cell_count=8).cells.values())
+        def count_translocations(cells):
+            counts = pandas.DataFrame({'count': [ len(cell) for cell in cells.cells.values() ]},
+                    index=numpy.arange(len(cells.cells)))
+            return counts, counts['count'], ('not', 'a frame')
+        func = (count_translocations, (), {})
+        shared = _SharedGroups(groups)
+        try:
+            buf = shared.shm.buf
+            for group, descriptor in zip(groups, shared.descriptors):
+                _, offset, size = descriptor
+                shared_group = _SharedGroups.restore(pickle.loads(buf[offset:offset+size]), buf)
+                assert list(shared_group.cells) == list(group.cells)
+                for i, cell in group.cells.items():
+                    shared_cell = shared_group.cells[i]
+                    assert shared_cell.origins.equals(cell.origins)
+                    assert shared_cell.destinations.equals(cell.destinations)
+                    assert numpy.array_equal(shared_cell.n, cell.n)
+                assert (shared_group.adjacency != group.adjacency).nnz == 0
+                # the results are sent back as plain arrays
+                result = _unpack_frames(__shared_run__(func, descriptor))
+                expected_result = __run__(func, group)
+                assert result[0].equals(expected_result[0])
+                assert result[1].equals(expected_result[1])
+                assert result[2:] == expected_result[2:]
+        finally:
+            shared.close()
+
+    def test_run_functions_in_main(self, tmp_path):
+        # functions defined in the main module after the workers are forked, like in notebooks
+        script = tmp_path / 'script.py'
+        script.write_text("""
+import numpy, pandas
+from tramway.helper.simulation import random_walk
+from tramway.helper.tessellation import tessellate
+from tramway.inference.base import distributed
+numpy.random.seed({seed})
+points = random_walk(diffusivity=.1, trajectory_mean_count=20, lifetime_tau=.5,
+        duration=5, minor_step_count=9)
+cells = distributed(tessellate(points, 'grid', avg_location_count=50, verbose=False))
+cells = cells.group(max_cell_count=8)
+def count(cells):
+    return pandas.DataFrame(dict(count=[ len(cell) for cell in cells.cells.values() ]),
+            index=numpy.arange(len(cells.cells)))
+def apply(cells, f):
+    return f(cells)
+expected = cells.run(count, worker_count=2)
+def count_again(cells):
+    return count(cells)
+assert cells.run(count_again, worker_count=2).equals(expected)
+# the persistent workers cannot find the functions defined after they are forked
+assert cells.run(count, worker_count=2, persistent=True).equals(expected)
+def count_once_more(cells):
+    return count(cells)
+assert cells.run(count_once_more, worker_count=2, persistent=True).equals(expected)
+def count_one_last_time(cells):
+    return count(cells)
+try:
+    cells.run(apply, count_one_last_time, worker_count=2, persistent=True)
+except AttributeError:
+    pass
+else:
+    raise AssertionError('the missing argument went unnoticed')
+""".format(seed=seed))
+        import subprocess, sys
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env.get('PYTHONPATH', '')])
+        subprocess.run([sys.executable, str(script)], env=env, check=True, timeout=300)
+
+    def example_smooth_d_args(self, sigma2=.0009):
+        from tramway.inference.base import distributed, smooth_infer_init
+        cells = distributed(self.example_cells())
+        index, reverse_index, _, dt_mean, D, _, _, _ = smooth_infer_init(cells, sigma2=sigma2)
+        D = D * (1. + numpy.random.rand(D.size))
+        return D, (cells, sigma2, 1., 1., dt_mean, None, index, reverse_index, {})
+
+    def test_smooth_d_vectorized(self):
+        from tramway.inference.base import concat_translocations
+        from tramway.inference.standard_d import smooth_d_neg_posterior, \
+                smooth_d_neg_posterior_grad, smooth_d_neg_posterior_vectorized
+        from tramway.inference.optimization import check_grad
+        D, args = self.example_smooth_d_args()
+        cells, sigma2, diffusivity_prior, jeffreys_prior, dt_mean, _, index, reverse_index, _ = args
+        dr, dt, bounds = concat_translocations(cells, index)
+        vectorized_args = (numpy.sum(dr * dr, axis=1), dt, bounds, sigma2, diffusivity_prior,
+                cells.grad_operator(index, reverse_index),
+                numpy.array([ cells.grad_sum(i, 1.) for i in index ]),
+                jeffreys_prior, dt_mean, None)
+        posterior, grad = smooth_d_neg_posterior_vectorized(D, *vectorized_args)
+        assert numpy.isclose(posterior, smooth_d_neg_posterior(D, *args))
+        assert numpy.allclose(grad, smooth_d_neg_posterior_grad(D, *args))
+        assert check_grad(smooth_d_neg_posterior_vectorized, True, D, vectorized_args) < 1e-4
+
+    def test_smooth_d_jac(self):
+        from tramway.inference.standard_d import smooth_d_neg_posterior, \
+                smooth_d_neg_posterior_grad, d_neg_posterior1, d_neg_posterior1_grad
+        from tramway.inference.optimization import check_grad
+        D, args = self.example_smooth_d_args()
+        # the sparse grad1 and delta0 operators
+        assert check_grad(smooth_d_neg_posterior, smooth_d_neg_posterior_grad, D, args) < 1e-4
+        assert check_grad(d_neg_posterior1, d_neg_posterior1_grad, D, args) < 1e-4
+
+    def test_smooth_dd_jac(self):
+        from tramway.inference.base import ChainArray
+        from tramway.inference.standard_ddrift import smooth_dd_neg_posterior, \
+                smooth_dd_neg_posterior_grad, dd_neg_posterior1, dd_neg_posterior1_grad
+        from tramway.inference.optimization import check_grad
+        D, (cells, sigma2, _, _, dt_mean, _, index, reverse_index, _) = \
+                self.example_smooth_d_args()
+        drift = numpy.random.randn(D.size, cells.dim)
+        for jeffreys_prior in (False, True):
+            dd = ChainArray('D', D, 'drift', drift)
+            args = (dd, cells, sigma2, 1., 1., jeffreys_prior, dt_mean, None,
+                    index, reverse_index, {})
+            assert check_grad(smooth_dd_neg_posterior, smooth_dd_neg_posterior_grad,
+                    dd.combined, args) < 1e-4
+            assert check_grad(dd_neg_posterior1, dd_neg_posterior1_grad,
+                    dd.combined, args) < 1e-4
+
+    def test_smooth_df_jac(self):
+        from tramway.inference.base import ChainArray
+        from tramway.inference.standard_df import smooth_df_neg_posterior, \
+                smooth_df_neg_posterior_grad, df_neg_posterior1, df_neg_posterior1_grad
+        from tramway.inference.optimization import check_grad
+        D, (cells, sigma2, _, _, dt_mean, _, index, reverse_index, _) = \
+                self.example_smooth_d_args()
+        F = numpy.random.randn(D.size, cells.dim)
+        for jeffreys_prior in (False, True):
+            df = ChainArray('D', D, 'F', F)
+            args = (df, cells, sigma2, 1., 1., jeffreys_prior, dt_mean, None,
+                    index, reverse_index, {})
+            assert check_grad(smooth_df_neg_posterior, smooth_df_neg_posterior_grad,
+                    df.combined, args) < 1e-4
+            assert check_grad(df_neg_posterior1, df_neg_posterior1_grad,
+                    df.combined, args) < 1e-4
+
+    def test_dv_grad(self):
+        from tramway.inference.dv import DV, dv_neg_posterior, dv_neg_posterior_grad, \
+                dv_neg_posterior1, dv_neg_posterior1_grad
+        from tramway.inference.optimization import check_grad
+        D, (cells, sigma2, _, _, dt_mean, _, index, reverse_index, _) = \
+                self.example_smooth_d_args()
+        V = numpy.random.rand(D.size)
+        for jeffreys_prior in (False, True):
+            dv = DV(D, V, 1., 1., None)
+            args = (dv, cells, sigma2, jeffreys_prior, dt_mean, index, reverse_index, {},
+                    0., False, [])
+            assert check_grad(dv_neg_posterior, dv_neg_posterior_grad,
+                    dv.combined, args) < 1e-4
+            assert check_grad(dv_neg_posterior1, dv_neg_posterior1_grad,
+                    dv.combined, args) < 1e-4
+
+    def test_local_dv_grad(self):
+        from tramway.inference.stochastic_dv import LocalDV, make_regions, \
+                local_dv_neg_posterior, local_dv_neg_posterior_grad
+        from tramway.inference.optimization import check_local_grad
+        D, (cells, sigma2, _, _, dt_mean, _, index, reverse_index, _) = \
+                self.example_smooth_d_args()
+        V = numpy.random.rand(D.size)
+        components = range(0, D.size, max(1, D.size // 10))
+        for jeffreys_prior in (False, 1.):
+            dv = LocalDV(D, V, 1., 1., logger=None)
+            dv.regions = make_regions(cells, index, reverse_index)
+            args = (dv, cells, sigma2, jeffreys_prior, dt_mean, index, reverse_index, {})
+            gradient_subspace = lambda i: dv.indices(dv.region(i))
+            assert check_local_grad(local_dv_neg_posterior, local_dv_neg_posterior_grad,
+                    dv.combined, components, dv.region, gradient_subspace, args) < 1e-4
+
+    def test_runtime_stats(self, tmp_path):
+        import subprocess, sys
+        cells = self.example_cells()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            maps = infer(cells, 'standard.d', max_iter=5, max_cell_count=10, worker_count=2)
+        stats = maps.runtime_stats
+        for k in ('distribute', 'group', 'optimize', 'merge', 'posterior_evaluations',
+                'iterations', 'pickled_bytes', 'peak_rss'):
+            assert 0 < stats[k]
+        groups = stats['groups']
+        assert 1 < len(groups)
+        assert groups['posterior_evaluations'].sum() == stats['posterior_evaluations']
+        # the stats are saved in .rwa files
+        analyses = Analyses(cells.points)
+        analyses.add(Analyses(cells), label='mesh')
+        analyses['mesh'].add(maps, label='maps')
+        rwa_file = str(tmp_path / 'test.rwa')
+        save_rwa(rwa_file, analyses, force=True)
+        loaded_stats = load_rwa(rwa_file)['mesh']['maps'].data.runtime_stats
+        assert list(loaded_stats) == list(stats)
+        for k in stats:
+            if k == 'groups':
+                assert loaded_stats[k].equals(groups)
+            else:
+                assert loaded_stats[k] == stats[k]
+        # ... and printed by `tramway dump`
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env.get('PYTHONPATH', '')])
+        out = subprocess.run([sys.executable, '-m', 'tramway', 'dump', '-i', rwa_file, '-L', 'mesh,maps'],
+            stdout=subprocess.PIPE, check=True, timeout=300, env=env).stdout.decode()
+        assert 'runtime_stats:' in out
+        for k in stats:
+            assert '    {}:'.format(k) in out
+
+    def test_check_jac(self, capsys):
+        from tramway.inference.base import distributed
+        from tramway.inference.standard_ddrift import infer_smooth_DD
+        from tramway.inference.standard_df import infer_smooth_DF
+        from tramway.inference.dv import inferDV
+        cells = distributed(self.example_cells())
+        for _infer in (infer_smooth_DD, infer_smooth_DF, inferDV):
+            for rgrad in (None, 'delta0'):
+                capsys.readouterr()
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    _infer(cells, diffusivity_prior=1., max_iter=1, rgrad=rgrad,
+                            check_jac=True, verbose=True)
+                out = capsys.readouterr().out
+                line = [ l for l in out.splitlines()
+                        if l.startswith('relative error of the posterior gradient: ') ]
+                assert len(line) == 1
+                assert float(line[0].split(': ')[1]) < 1e-4
+
+    def example_skewed_cells(self, n=20000):
+        numpy.random.seed(seed)
+        # most of the translocations are in a corner
+        xy = numpy.r_[numpy.random.rand(n//4, 2), .2 * numpy.random.rand(n - n//4, 2)]
+        points = pandas.DataFrame(numpy.c_[numpy.repeat(numpy.arange(n//2), 2), xy,
+            numpy.tile([0., .05], n//2)], columns=list('nxyt'))
+        cells = tessellate(points, 'hexagon', avg_location_count=n/91., verbose=False)
+        from tramway.inference.base import distributed
+        return distributed(cells)
+
+    def test_balanced_groups(self):
+        cells = self.example_skewed_cells()
+        ncells = len(cells.cells)
+        costs = {}
+        for balance in (None, 1.1):
+            groups = cells.group(max_cell_count=15, balance=balance)
+            costs[balance] = numpy.array([ group.estimated_cost() for group in groups.cells.values() ])
+        # the adjacency margin prevents the groups from being split down to single cells
+        assert costs[1.1].size < ncells // 2
+        assert costs[1.1].max() <= costs[None].max()
+        assert costs[1.1].max() / costs[1.1].mean() <= costs[None].max() / costs[None].mean()
+
+
+from tramway.tessellation.time import TimeLattice
+class TestTimeLattice(object):
+
+    def example_lattice(self):
+        numpy.random.seed(seed)
+        points = random_walk(diffusivity=.1, trajectory_mean_count=20, lifetime_tau=.5,
+                duration=5, minor_step_count=9)
+        mesh = tessellate(points, 'grid', avg_location_count=50, verbose=False).tessellation
+        # overlapping time segments
+        t0 = numpy.arange(0., 4.5, .5)
+        return TimeLattice(mesh=mesh, segments=numpy.c_[t0, t0 + 1.]), points
+
+    def test_cell_index(self):
+        lattice, points = self.example_lattice()
+        mesh, ts = lattice.spatial_mesh, points['t'].values
+        ncells = mesh.cell_adjacency.shape[0]
+        expected_pts, expected_cells = [], []
+        for t, (t0, t1) in enumerate(lattice.time_lattice):
+            pts = numpy.flatnonzero((t0 <= ts) & (ts < t1))
+            expected_pts.append(pts)
+            expected_cells.append(mesh.cell_index(points.iloc[pts]) + t * ncells)
+        expected_pts = numpy.concatenate(expected_pts)
+        expected_cells = numpy.concatenate(expected_cells)
+        # the spatial index is evaluated once for all the points, unless other arguments are passed
+        for kwargs in ({}, dict(min_location_count=0)):
+            pts, cells = lattice.cell_index(points, **kwargs)
+            assert numpy.array_equal(pts, expected_pts)
+            assert numpy.array_equal(cells, expected_cells)
+
+
+    def test_split_frames(self):
+        lattice, _ = self.example_lattice()
+        ncells = lattice.spatial_mesh.cell_adjacency.shape[0]
+        nsegments = lattice.time_lattice.shape[0]
+        index = numpy.random.permutation(ncells * nsegments)[:ncells * nsegments // 2]
+        maps = pandas.DataFrame(numpy.random.rand(index.size, 2), index=index, columns=['a', 'b'])
+        frames = lattice.split_frames(maps)
+        assert len(frames) == nsegments
+        for t, frame in enumerate(frames):
+            expected_frame = maps[maps.index // ncells == t]
+            expected_frame.index = expected_frame.index % ncells
+            assert frame.equals(expected_frame)
+
+    def test_split_segments(self):
+        from tramway.tessellation.base import Partition, format_cell_index
+        lattice, points = self.example_lattice()
+        ncells = lattice.spatial_mesh.cell_adjacency.shape[0]
+        p, c = lattice.cell_index(points)
+        segments = lattice.split_segments(Partition(points, lattice, (p, c)))
+        assert len(segments) == lattice.time_lattice.shape[0]
+        for t, segment in enumerate(segments):
+            in_segment = c // ncells == t
+            pts = numpy.unique(p[in_segment])
+            assert segment.points.equals(points.iloc[pts])
+            pt_ids, cell_ids = format_cell_index(segment.cell_index, 'pair')
+            assert numpy.array_equal(pts[pt_ids], p[in_segment])
+            assert numpy.array_equal(cell_ids, c[in_segment] - t * ncells)
+
+
+from tramway.inference.optimization import minimize_sparse_bfgs1, sbfgs_pool
+class TestOptimization(object):
+
+    def test_pool_reuses_workers(self):
+        n = 20
+        target = numpy.linspace(0, 1, n)
+        def fun(i, x, target):
+            return (x[i] - target[i]) ** 2
+        def covariate(i):
+            return [i]
+        kwargs = dict(max_iter=100, eps=1., ls_step_max=2., ls_wolfe=(.5, None), ls_armijo_max=5,
+                ftol=1e-8, gtol=None)
+        with sbfgs_pool(1) as pool:
+            for _ in range(3):
+                # `descent_subspace` defaults to all the parameters
+                result = minimize_sparse_bfgs1(fun, numpy.zeros(n), n, covariate, covariate, None,
+                        (target,), pool=pool, **kwargs)
+                assert numpy.allclose(result.x, target)
+            assert pool.run_count == 3
+            assert pool.spawn_count == 1
+
+
+from tramway.feature.single_traj.rw_features import RandomWalk
+class TestRandomWalk(object):
+
+    def example_walks(self, n=120):
+        numpy.random.seed(seed)
+        xy = numpy.cumsum(.1 * numpy.random.randn(n, 2), axis=0)
+        rw = RandomWalk(pandas.DataFrame(numpy.c_[xy, .05 * numpy.arange(n)],
+            columns=list('xyt')), check_useless=False)
+        # the full walk and a few time windows
+        return rw, [(None, None), (0, 60), (17, 93), (n-40, n)]
+
+    def test_features_without_Dabs(self):
+        from scipy.stats import describe
+        from tramway.feature.single_traj.rw_features import _Dq, _zero_escape_quantile, \
+                root_finder
+        rw, windows = self.example_walks()
+        for id_min, id_max in windows:
+            i0 = 0 if id_min is None else id_min
+            i1 = len(rw) if id_max is None else id_max
+            # reference values from the full distance matrices
+            Dabs = rw.Dabs[i0:i1, i0:i1]
+            steps = numpy.diagonal(Dabs, offset=1)
+            for use_all in (False, True):
+                tau, msd = rw.temporal_msd(id_min, id_max, use_all=use_all)
+                assert numpy.allclose(msd,
+                        [ numpy.mean(numpy.diagonal(Dabs, offset=i)**2) for i in tau ])
+            tau, pdf_stats = rw.stats_pdf(id_min, id_max)
+            for i, stats in zip(numpy.round(tau / rw.dt).astype(int), pdf_stats):
+                s = describe(numpy.diagonal(Dabs, offset=i), ddof=0)
+                assert numpy.allclose(stats, [s.mean, s.variance, s.skewness, s.kurtosis])
+            assert numpy.isclose(rw.efficiency(id_min, id_max),
+                    Dabs[0,-1]**2 / numpy.sum(steps**2))
+            assert numpy.isclose(rw.straightness(id_min, id_max),
+                    Dabs[0,-1] / numpy.sum(steps))
+            ns = numpy.unique(numpy.linspace(1, len(Dabs)-1, 30).astype(int))
+            gauss_n = numpy.array([ numpy.mean(numpy.diagonal(Dabs, offset=n)**4) /
+                numpy.mean(numpy.diagonal(Dabs, offset=n)**2)**2 - 1 for n in ns ])
+            gaussianity = rw.feat_gaussianity(id_min, id_max)
+            assert numpy.isclose(gaussianity['gaussian_mean'], numpy.mean(gauss_n))
+            assert numpy.isclose(gaussianity['gaussian_grad'], numpy.mean(numpy.gradient(gauss_n)))
+            # angles
+            vec = numpy.diagonal(rw.Dvec[i0:i1, i0:i1], offset=-1)
+            u = vec / numpy.linalg.norm(vec, axis=0)
+            angles = numpy.arccos(numpy.clip(numpy.sum(u[:,:-1] * u[:,1:], axis=0), -1., 1.))
+            mean_angle, var_angle = numpy.mean(angles), numpy.var(angles)
+            autocorr = [ numpy.mean((angles[i:] - mean_angle) * (angles[:-i] - mean_angle)) /
+                var_angle for i in (1, 2) ]
+            assert numpy.allclose(list(rw.feat_angle(id_min, id_max).values()),
+                    [var_angle] + autocorr)
+            # the random samples are drawn the same way
+            numpy.random.seed(seed)
+            escape = rw.feat_escape_time(id_min, id_max)
+            numpy.random.seed(seed)
+            sample = numpy.sort(numpy.random.permutation(len(Dabs))[:min(100, len(Dabs))])
+            future = numpy.triu(Dabs[sample][:, sample])
+            mean_step = numpy.mean(steps)
+            for q, key in zip((.25, .5, .75),
+                    ('escape_dist_q1', 'escape_dist_median', 'escape_dist_q3')):
+                root = root_finder(_zero_escape_quantile, args=(q, future, mean_step),
+                        method='brenth', bracket=(0, 100)).root
+                assert numpy.isclose(escape[key], root * mean_step)
+            numpy.random.seed(seed)
+            fractal = rw.feat_fractal_spectrum(id_min, id_max, nR=20)
+            numpy.random.seed(seed)
+            chosen = numpy.sort(numpy.random.permutation(len(Dabs))[:min(len(Dabs), 30)])
+            sampled = Dabs[chosen]
+            assert numpy.isclose(fractal['frac_grad0'],
+                    (_Dq(sampled, 1.5, n_R=20) - _Dq(sampled, -1.5, n_R=20)) / 3)
+
+    def example_trajectories(self, n_trajs=7, max_length=120):
+        numpy.random.seed(seed)
+        lengths = numpy.random.randint(10, max_length, size=n_trajs)
+        n = numpy.repeat(numpy.arange(1, n_trajs+1), lengths)
+        xy = numpy.concatenate([ numpy.cumsum(.1 * numpy.random.randn(l, 2), axis=0)
+            for l in lengths ])
+        t = numpy.concatenate([ .05 * numpy.arange(l) for l in lengths ])
+        return pandas.DataFrame(numpy.c_[n, xy, t], columns=list('nxyt')).astype({'n': int})
+
+    def test_extract_features_chunked(self):
+        from tramway.feature.single_traj.batch_extraction import extract_features
+        # the escape and fractal features draw random samples in long trajectories
+        RWs = self.example_trajectories()
+        numpy.random.seed(seed)
+        expected = extract_features(RWs, nb_process=None, pbar=False).astype(float)
+        numpy.random.seed(seed)
+        chunked = extract_features(RWs, nb_process=None, pbar=False, chunksize=3)
+        pandas.testing.assert_frame_equal(chunked, expected)
+        # the other processes do not share the random stream; with short trajectories
+        # all the features are deterministic
+        RWs = self.example_trajectories(max_length=30)
+        expected = extract_features(RWs, nb_process=2, pbar=False).astype(float)
+        chunked = extract_features(RWs, nb_process=2, pbar=False, chunksize=3)
+        pandas.testing.assert_frame_equal(chunked, expected)
+
+
+from tramway.helper.simulation.functional import iter_random_walk
+class TestSimulation(object):
+
+    def example_chunks(self, **kwargs):
+        numpy.random.seed(seed)
+        return list(iter_random_walk(diffusivity=.1, trajectory_mean_count=20, lifetime_tau=.5,
+            duration=5, minor_step_count=9, chunksize=100, **kwargs))
+
+    def test_iter_random_walk(self):
+        numpy.random.seed(seed)
+        points = random_walk(diffusivity=.1, trajectory_mean_count=20, lifetime_tau=.5,
+            duration=5, minor_step_count=9, full=True, vectorized=True)
+        chunks = self.example_chunks(full=True)
+        assert 1 < len(chunks)
+        # the same locations are generated chunk by chunk
+        chunked = pandas.concat(chunks)
+        assert len(chunked) == len(points)
+        for col in 'xyt':
+            assert numpy.allclose(numpy.sort(chunked[col].values), numpy.sort(points[col].values))
+        assert numpy.array_equal(numpy.sort(chunked.groupby('n').size().values),
+            numpy.sort(points.groupby('n').size().values))
+
+    def test_iter_random_walk_indices(self):
+        for kwargs in (dict(), dict(full=True), dict(reflect=True)):
+            chunks = self.example_chunks(**kwargs)
+            n_offset = 0
+            for points in chunks:
+                if points.empty:
+                    continue
+                # contiguous trajectory indices that increase from a chunk to the next one
+                n = points['n'].values
+                assert numpy.array_equal(numpy.unique(n), numpy.arange(n_offset+1, n[-1]+1))
+                assert numpy.all(numpy.diff(n) >= 0)
+                n_offset = n[-1]
+                # the locations of a trajectory are evenly spaced in time
+                dt = points.groupby('n')['t'].diff().dropna().values
+                assert numpy.allclose(dt, .05)
+                if kwargs.get('reflect'):
+                    xy = points[['x', 'y']].values
+                    assert numpy.all((0 <= xy) & (xy <= 1))
+
+    def test_lockstep_trajectories(self):
+        from tramway.helper.simulation.categoricaltrap import generate_trajectories
+        class FixedDurations(generate_trajectories):
+            durations = numpy.array([3, 1, 4, 1, 5, 0, 2])
+            def traj_duration(self, size=None):
+                if size is None:
+                    self.k = getattr(self, 'k', -1) + 1
+                    return self.durations[self.k]
+                return self.durations[:size]
+        layouts = []
+        for vectorized in (False, True):
+            numpy.random.seed(seed)
+            gen = FixedDurations(n_short_=10, n_trajs_=7, verbose=False)
+            gen.generate_the_actual_trajectories(vectorized)
+            layouts.append((gen.nb_, gen.t_))
+        (n, t), (n_lockstep, t_lockstep) = layouts
+        assert numpy.array_equal(numpy.bincount(n_lockstep)[1:], FixedDurations.durations + 1)
+        assert numpy.array_equal(n_lockstep, n)
+        assert numpy.allclose(t_lockstep, t)
+
+    def test_lockstep_reproducibility(self):
+        from tramway.helper.simulation.categoricaltrap import random_walk_2d
+        trajs = []
+        for _ in range(2):
+            numpy.random.seed(seed)
+            trajs.append(random_walk_2d(n_trajs=20, n_short=10, nb_process=2))
+        pandas.testing.assert_frame_equal(*trajs)
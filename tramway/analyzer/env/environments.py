@@ -26,7 +26,6 @@ import shutil
 import glob
 import traceback
 from tramway.core.hdf5.store import load_rwa, save_rwa
-from tramway.core.analyses.base import append_leaf
 
 
 class Proxy(object):
@@ -404,18 +403,26 @@ class Env(AnalyzerNode):
                 logger.critical('key `datafile` not found in the metadata')
                 #analyses = {}; break
                 continue
-            try:
-                _analyses = analyses[source]
-            except KeyError:
-                analyses[source] = __analyses
+            rwa_file = os.path.splitext(os.path.normpath(source))[0]+'.rwa'
+            if os.path.normpath(output_file) == rwa_file:
+                # the destination file comes first
+                analyses.setdefault(source, []).insert(0, (output_file, __analyses))
             else:
-                append_leaf(_analyses, __analyses)
+                analyses.setdefault(source, []).append((output_file, __analyses))
             loaded_files.append(output_file)
         end_result_files = []
         for source in analyses:
             rwa_file = os.path.splitext(os.path.normpath(source))[0]+'.rwa'
-            logger.info('writing file: {}...'.format(rwa_file))
-            save_rwa(os.path.expanduser(rwa_file), analyses[source], force=True)
+            for k, (output_file, __analyses) in enumerate(analyses[source]):
+                if k == 0:
+                    if os.path.normpath(output_file) == rwa_file:
+                        continue
+                    logger.info('writing file: {}...'.format(rwa_file))
+                    save_rwa(os.path.expanduser(rwa_file), __analyses, force=True)
+                else:
+                    # write the new analyses only
+                    logger.info('appending to file: {}...'.format(rwa_file))
+                    save_rwa(os.path.expanduser(rwa_file), __analyses, append=True)
             end_result_files.append(rwa_file)
         for output_file in loaded_files:
             if output_file not in end_result_files:
@@ -14,20 +14,22 @@
 
 from .abc import *
 from ..attribute import *
-from tramway.core.xyt import crop
+from tramway.core.xyt import crop, cropper
 from tramway.helper.base import HelperBase
 import tramway.helper.roi as helper
 import warnings
 import numpy as np
+import pandas as pd
 from collections.abc import Sequence, Set
 
 
 class BaseRegion(AnalyzerNode):
-    __slots__ = ('_spt_data','_label')
-    def __init__(self, spt_data, label=None, **kwargs):
+    __slots__ = ('_spt_data','_label','_croppers')
+    def __init__(self, spt_data, label=None, croppers=None, **kwargs):
         AnalyzerNode.__init__(self, **kwargs)
         self._spt_data = spt_data
         self._label = label
+        self._croppers = croppers
     @property
     def label(self):
         if callable(self._label):
@@ -46,6 +48,28 @@ class BaseRegion(AnalyzerNode):
         return self._spt_data.autosaving(*args, **kwargs)
     def discard_static_trajectories(self, df):
         return self._spt_data.discard_static_trajectories(df)
+    def _crop(self, box, df=None):
+        """
+        crops `df` by bounding box `box` (origin and size).
+
+        If `df` is not defined, the SPT dataframe is cropped.
+        The regions generated by a same iterator share the deltas and trajectory
+        breakpoints of the SPT dataframe, which are computed once (see :func:`~tramway.core.xyt.cropper`).
+        """
+        if df is None:
+            df = self._spt_data.dataframe
+            if self._croppers is not None:
+                try:
+                    _df, _crop = self._croppers[id(df)]
+                    if _df is not df:
+                        raise KeyError
+                except KeyError:
+                    # keep a single dataframe at a time; regions are generated source by source
+                    self._croppers.clear()
+                    _crop = cropper(df)
+                    self._croppers[id(df)] = (df, _crop)
+                return _crop(box)
+        return crop(df, box)
 
 class IndividualROI(BaseRegion):
     """ for typing only """
@@ -60,9 +84,7 @@ class BoundingBox(IndividualROI):
         self._bounding_box = bb
     def crop(self, df=None):
         _min,_max = self._bounding_box
-        if df is None:
-            df = self._spt_data.dataframe
-        return crop(df, np.r_[_min, _max-_min])
+        return self._crop(np.r_[_min, _max-_min], df)
     @property
     def bounding_box(self):
         return self._bounding_box
@@ -82,7 +104,35 @@ class SupportRegion(BaseRegion):
     def crop(self, df=None):
         if df is None:
             df = self._spt_data.dataframe
+            unit_regions = self._unit_bounding_boxes(df)
+            if unit_regions is not None:
+                df_r = None
+                for _min,_max in unit_regions:
+                    df_u = self._crop(np.r_[_min, _max-_min])
+                    if df_r is None:
+                        df_r = df_u
+                    else:
+                        df_r = pd.merge(df_r, df_u, how='outer')
+                return df_r
         return self._support_regions.crop(self._sr_index, df)
+    def _unit_bounding_boxes(self, df):
+        """
+        returns the spatial bounding boxes of the unit regions, or ``None`` if any
+        unit region is not a bounding box or has time bounds.
+        """
+        if isinstance(self._support_regions, helper.UnitRegions):
+            unit_regions = [ self._support_regions[self._sr_index] ]
+        else:
+            unit_regions = [ self._support_regions.unit_region[u] \
+                for u in self._support_regions.group[self._sr_index] ]
+        n_space_cols = len([ col for col in 'xyz' if col in df.columns ])
+        for r in unit_regions:
+            if not isinstance(r, (tuple, list)):
+                return None
+            _min,_max = r
+            if n_space_cols < _min.size:
+                return None
+        return unit_regions
     @property
     def bounding_box(self):
         if isinstance(self._support_regions, helper.UnitRegions):
@@ -349,13 +399,15 @@ class SpecializedROI(AnalyzerNode):
             # parent spt_data object should still be registered
             assert self._parent in self._global._records
     def as_support_regions(self, index=None, source=None, return_index=False):
+        croppers = {}
         if return_index:
             def bear_child(cls, r, *args):
                 i, r = r
-                return i, self._bear_child(cls, r, *args)
+                return i, self._bear_child(cls, r, *args, croppers=croppers)
             kwargs = dict(return_index=return_index)
         else:
-            bear_child = self._bear_child
+            def bear_child(cls, r, *args):
+                return self._bear_child(cls, r, *args, croppers=croppers)
             kwargs = {}
         try:
             spt_data = self._parent.spt_data
@@ -405,12 +457,13 @@ class BoundingBoxes(SpecializedROI):
     def bounding_boxes(self):
         return self._bounding_boxes
     def as_individual_roi(self, index=None, collection=None, source=None, return_index=False):
+        croppers = {}
         if return_index:
             def bear_child(i, *args):
-                return i, self._bear_child(*args)
+                return i, self._bear_child(*args, croppers=croppers)
         else:
             def bear_child(i, *args):
-                return self._bear_child(*args)
+                return self._bear_child(*args, croppers=croppers)
         try:
             spt_data = self._parent.spt_data
         except AttributeError:
@@ -534,8 +534,24 @@ class RawSPTFile(SPTFile):
             self._columns = cols
 
 class SPTAsciiFile(RawSPTFile):
+    __slots__ = ('_cache',)
+    def __init__(self, filepath, dataframe=None, **kwargs):
+        RawSPTFile.__init__(self, filepath, dataframe, **kwargs)
+        self._cache = False
+    @property
+    def cache(self):
+        """*bool*: write a binary copy of the file on first load, and memory-map it
+        on later loads; see the `cache` argument of :func:`~tramway.core.xyt.load_xyt`"""
+        return self._cache
+    @cache.setter
+    def cache(self, cache):
+        if self.reified:
+            raise AttributeError('the SPT data have already been loaded; cannot set the cache option anymore')
+        else:
+            self._cache = cache
     def load(self):
-        self._dataframe = load_xyt(os.path.expanduser(self.filepath), self._columns, reset_origin=self._reset_origin)
+        self._dataframe = load_xyt(os.path.expanduser(self.filepath), self._columns,
+                reset_origin=self._reset_origin, cache=self._cache)
         self._trigger_discard_static_trajectories()
 
 SPTDataItem.register(SPTAsciiFile)
@@ -550,11 +566,12 @@ SPTData.register(StandaloneSPTAsciiFile)
 
 
 class SPTFiles(SPTDataFrames):
-    __slots__ = ('_files','_filepattern')
+    __slots__ = ('_files','_filepattern','_worker_count')
     def __init__(self, filepattern, **kwargs):
         SPTDataIterator.__init__(self, **kwargs)
         self._files = []
         self._filepattern = os.path.expanduser(filepattern)
+        self._worker_count = None
     @property
     def filepattern(self):
         return self._filepattern
@@ -575,8 +592,33 @@ class SPTFiles(SPTDataFrames):
         return [ f.filepath for f in self.files ]
     @property
     def dataframes(self):
+        self.reify()
         return [ f.dataframe for f in self.files ]
     @property
+    def worker_count(self):
+        return self._worker_count
+    @worker_count.setter
+    def worker_count(self, wc):
+        self._worker_count = wc
+    def reify(self, worker_count=None):
+        """loads all the files that have not been loaded yet,
+        in `worker_count` concurrent threads (default: :attr:`worker_count`)."""
+        if worker_count is None:
+            worker_count = self.worker_count
+        files = [ f for f in self.files if not f.reified ]
+        if worker_count is None or worker_count <= 1 or not files[1:]:
+            for f in files:
+                f.load()
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=worker_count) as pool:
+                for _ in pool.map(lambda f: f.load(), files):
+                    pass
+    def as_dataframes(self, source=None):
+        if source is None:
+            self.reify()
+        return SPTDataIterator.as_dataframes(self, source)
+    @property
     def partially_reified(self):
         return self._files and any([ f.reified for f in self._files ])
     @property
@@ -609,10 +651,24 @@ class SPTAsciiFiles(SPTFiles):
     """
     `RWAnalyzer.spt_data` attribute for multiple SPT text files.
     """
-    __slots__ = ()
+    __slots__ = ('_cache',)
+    def __init__(self, filepattern, **kwargs):
+        SPTFiles.__init__(self, filepattern, **kwargs)
+        self._cache = False
+    @property
+    def cache(self):
+        """*bool*: see :attr:`SPTAsciiFile.cache`"""
+        return self._cache
+    @cache.setter
+    def cache(self, cache):
+        self._cache = cache
+        for f in self._files:
+            f.cache = cache
     def list_files(self):
         SPTFiles.list_files(self)
         self._files = [ self._bear_child( SPTAsciiFile, filepath ) for filepath in self._files ]
+        for f in self._files:
+            f.cache = self._cache
 
 SPTData.register(SPTAsciiFiles)
 
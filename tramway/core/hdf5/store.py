@@ -14,6 +14,7 @@
 
 from tramway.core import rc
 from rwa import HDF5Store, lazytype, lazyvalue
+from rwa.storable import format_type
 from ..lazy import Lazy
 from ..analyses import Analyses, coerce_labels, format_analyses, append_leaf
 import tramway.core.analyses.abc as abc
@@ -98,12 +99,209 @@ class RWAStore(HDF5Store):
             import pandas
             if isinstance(obj, pandas.DataFrame):
                 self.__special__['data0'] = obj
+        import tramway.tessellation.base as tessellation
+        if isinstance(obj, tessellation.Delaunay) and \
+                getattr(obj, '_cell_center_tree', None) is not None:
+            # the k-d tree is a cache and is not stored
+            import copy
+            obj = copy.copy(obj)
+            obj._cell_center_tree = None
         return obj
 
 
 
+class _DictRecord(object):
+    """
+    Editable view of a :class:`dict` stored by *rwa*, as found in the `_instances`
+    and `_comments` records of an analysis tree.
+
+    Both the ``items`` layout (homogeneous keys used as record names) and the
+    ``keys``/``values`` layout (lists) are supported.
+    Values are poked and deleted in place; the other entries are left untouched.
+    """
+
+    __slots__ = ('store', 'record', 'labels')
+
+    def __init__(self, store, record):
+        self.store = store
+        self.record = record
+        self.labels = {}
+        if 'items' in record:
+            items = record['items']
+            keytype = store.getRecordAttr('key type', items)
+            as_int = 'int' in keytype.lower()
+            for name in items:
+                self.labels[int(name) if as_int else name] = name
+        elif 'keys' in record:
+            keys = record['keys']
+            for name in keys:
+                label = _coerce_label(store.peek(name, keys, lazy=False))
+                self.labels[label] = name
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self.labels
+
+    def container(self):
+        if 'items' in self.record:
+            return self.record['items']
+        else:
+            return self.record['values']
+
+    def locate(self, label):
+        return self.container(), self.labels[label]
+
+    def __getitem__(self, label):
+        container, name = self.locate(label)
+        return container[name]
+
+    def peek(self, label, **kwargs):
+        container, name = self.locate(label)
+        return self.store.peek(name, container, **kwargs)
+
+    def __setitem__(self, label, value):
+        if label in self.labels:
+            container, name = self.locate(label)
+            del container[name]
+        else:
+            name = self._new_record(label)
+            container = self.container()
+        self.store.poke(name, value, container)
+
+    def __delitem__(self, label):
+        container, name = self.locate(label)
+        del container[name]
+        del self.labels[label]
+        if 'items' in self.record:
+            if not self.labels:
+                del self.record['items']
+        else:
+            # move the last element into the hole so that the lists remain contiguous
+            last = str(len(self.labels))
+            if name != last:
+                keys = self.record['keys']
+                del keys[name]
+                keys.move(last, name)
+                container.move(last, name)
+                for _label, _name in self.labels.items():
+                    if _name == last:
+                        self.labels[_label] = name
+                        break
+            else:
+                del self.record['keys'][name]
+            if not self.labels:
+                del self.record['keys']
+                del self.record['values']
+
+    def _new_record(self, label):
+        if not self.labels:
+            for layout in ('items', 'keys', 'values'):
+                if layout in self.record:
+                    del self.record[layout]
+            items = self.store.newContainer('items', None, self.record)
+            try:
+                keytype = self.store.byPythonType(label).asVersion().storable_type
+            except AttributeError:
+                # native type
+                keytype = format_type(type(label))
+            self.store.setRecordAttr('key type', keytype, items)
+        elif 'items' in self.record:
+            items = self.record['items']
+            keytype = self.store.getRecordAttr('key type', items)
+            if isinstance(label, int) is not ('int' in keytype.lower()):
+                self._items_to_lists()
+        if 'items' in self.record:
+            name = str(label)
+        else:
+            name = str(len(self.labels))
+            self.store.poke(name, label, self.record['keys'])
+        self.labels[label] = name
+        return name
+
+    def _items_to_lists(self):
+        items = self.record['items']
+        keys = self.store.newContainer('keys', None, self.record)
+        values = self.store.newContainer('values', None, self.record)
+        for attr in (keys, values):
+            self.store.setRecordAttr('homogeneous', '0', attr)
+        labels = {}
+        for i, (label, name) in enumerate(self.labels.items()):
+            labels[label] = str(i)
+            self.store.poke(str(i), label, keys)
+            items.move(name, values.name+'/'+str(i))
+        del self.record['items']
+        self.labels = labels
+
+
+def _coerce_label(label):
+    if not isinstance(label, (int, str)):
+        try:
+            label = label.decode('utf-8')
+        except AttributeError: # numpy.int64?
+            label = int(label)
+    return label
+
+
+def _append_leaf(store, record, augmented_branch, overwrite=False):
+    """
+    Counterpart of :func:`~tramway.core.analyses.base.append_leaf` that operates
+    on the analysis tree stored in an opened :class:`RWAStore`.
 
-def load_rwa(path, verbose=None, lazy=False):
+    Only the appended nodes are written.
+    """
+    instances = _DictRecord(store, record['_instances'])
+    if augmented_branch:
+        for label in augmented_branch:
+            if label in instances and (not overwrite or augmented_branch[label]):
+                _append_leaf(store, instances[label], augmented_branch[label])
+            else:
+                instances[label] = augmented_branch[label]
+                comments = _DictRecord(store, record['_comments'])
+                if label in comments:
+                    del comments[label]
+    else:
+        if instances:
+            raise ValueError('the existing analysis tree has higher branches than the augmented branch')
+        # replace the data only; the metadata of the existing node are kept
+        if '_data' in record:
+            del record['_data']
+        store.poke('_data', augmented_branch.data, record)
+        for attr in ('_instances', '_comments', '_metadata'):
+            if attr not in record:
+                store.poke(attr, {}, record)
+
+
+def _peek_label_path(store, labels):
+    """
+    Read the top node of the analysis tree and the nodes along the path defined by
+    `labels` only.
+    The last node is loaded with its entire subtree.
+    """
+    record = store.getRecord(store.formatRecordName('analyses'), store.store)
+    node = analyses = Analyses(store.peek('_data', record),
+            lazyvalue(store.peek('_metadata', record), deep=True))
+    for i, label in enumerate(labels):
+        instances = _DictRecord(store, record['_instances'])
+        if label not in instances:
+            raise KeyError('no such analysis instance: {}'.format(label))
+        comments = _DictRecord(store, record['_comments'])
+        comment = comments.peek(label, lazy=False) if label in comments else None
+        if i+1 == len(labels):
+            child = lazyvalue(instances.peek(label))
+        else:
+            record = instances[label]
+            child = Analyses(store.peek('_data', record),
+                    lazyvalue(store.peek('_metadata', record), deep=True))
+        node.add(child, label=label, comment=comment)
+        node = child
+    return analyses
+
+
+
+
+def load_rwa(path, verbose=None, lazy=False, labels=None):
     """
     Load a .rwa file.
 
@@ -120,6 +318,10 @@ def load_rwa(path, verbose=None, lazy=False):
 
         lazy (bool): reads the file lazily
 
+        labels (sequence): path of labels in the analysis tree;
+            if defined, only the nodes along this path are read, together with
+            the subtree of the last node
+
     Returns:
 
         tramway.core.analyses.base.Analyses:
@@ -132,7 +334,10 @@ def load_rwa(path, verbose=None, lazy=False):
         #hdf._default_lazy = PermissivePeek
         hdf.lazy = lazy
         try:
-            analyses = lazyvalue(hdf.peek('analyses'))
+            if labels:
+                analyses = _peek_label_path(hdf, labels)
+            else:
+                analyses = lazyvalue(hdf.peek('analyses'))
         except (KeyboardInterrupt, SystemExit):
             raise
         except:
@@ -170,8 +375,8 @@ def save_rwa(path, analyses, verbose=False, force=None, compress=True, append=Fa
 
         compress (bool): delete the lazy attributes that can be computed again automatically
 
-        append (bool): do not overwrite; reload the file instead and append the analyses as
-            a subtree
+        append (bool): do not overwrite; append the analyses as a subtree instead;
+            only the new nodes are written into the existing file
 
     """
     if not isinstance(analyses, abc.Analyses):
@@ -180,9 +385,8 @@ def save_rwa(path, analyses, verbose=False, force=None, compress=True, append=Fa
         force = False if overwrite is None else overwrite
     if os.path.isfile(path):
         if append:
-            extra_analyses = analyses
-            analyses = load_rwa(path)
-            append_leaf(analyses, extra_analyses, overwrite=force)
+            _append_rwa(path, analyses, verbose, force, compress)
+            return
         elif not force and rc.__user_interaction__:
             answer = input("overwrite file '{}': [N/y] ".format(path))
             if not (answer and answer[0].lower() == 'y'):
@@ -209,3 +413,27 @@ def save_rwa(path, analyses, verbose=False, force=None, compress=True, append=Fa
         print(format_analyses(analyses, global_prefix='\t', node=lazytype))
 
 
+def _append_rwa(path, augmented_branch, verbose=False, overwrite=False, compress=True):
+    try:
+        store = RWAStore(path, 'r+', verbose=max(0, int(verbose) - 2))
+        try:
+            store.unload = compress
+            # the top data are already in the file;
+            # do not let any appended data frame take their place
+            store.__special__['data0'] = None
+            if verbose:
+                print('appending to file: {}'.format(path))
+            record = store.getRecord(store.formatRecordName('analyses'), store.store)
+            _append_leaf(store, record, augmented_branch, overwrite=overwrite)
+        finally:
+            store.close()
+    except EnvironmentError as e:
+        if hasattr(e, 'errno') and e.errno == errno.ENOENT:
+            raise
+        print(traceback.format_exc())
+        raise ImportError('HDF5 libraries may not be installed')
+    if 1 < int(verbose):
+        print('appended analysis tree:')
+        print(format_analyses(augmented_branch, global_prefix='\t', node=lazytype))
+
+
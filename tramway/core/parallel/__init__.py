@@ -19,6 +19,8 @@ except ImportError:
     import Queue as queue
 import time
 import numpy as np
+from copy import copy
+import pickle
 from warnings import warn
 try:
     from . import abc
@@ -143,9 +145,12 @@ class Worker(multiprocessing.Process):
     The optional positional and keyword arguments come from the `args` and `kwargs` arguments
     to :meth:`Scheduler.__init__`, plus the extra keyword arguments to the latter constructor.
 
+    If a `control` queue is defined, the worker is long-lived (see :class:`WorkerPool`)
+    and runs :meth:`target` once per workspace received through this queue.
+
     """
     def __init__(self, _id, workspace, task_queue, return_queue, update_queue,
-            name=None, args=(), kwargs={}, daemon=None, **_kwargs):
+            name=None, args=(), kwargs={}, daemon=None, control=None, **_kwargs):
         # `daemon` is not supported in Py2; pass `daemon` only if defined
         if daemon is None:
             __kwargs = {}
@@ -160,6 +165,8 @@ class Worker(multiprocessing.Process):
         self.args = args
         kwargs.update(_kwargs)
         self.kwargs = kwargs
+        self.control = control
+        self.run_id = None
     def get_task(self):
         """ Listen to the scheduler and get a job step to be run.
 
@@ -171,7 +178,10 @@ class Worker(multiprocessing.Process):
 
         """
         #module_logger.debug('get_task: waiting...') # DEBUG
-        k, task = self.tasks.get()
+        task = self.tasks.get()
+        if task is None:
+            raise EndOfRun
+        k, task = task
         #module_logger.debug('get_task: received {}'.format(k)) # DEBUG
         task.set_workspace(self.workspace)
         self.pull_updates()
@@ -187,10 +197,15 @@ class Worker(multiprocessing.Process):
 
         """
         if isinstance(update, abc.VehicleJobStep):
-            update.push_updates(self.workspace.pop_extension_updates())
+            extension_updates = self.workspace.pop_extension_updates()
+            update.push_updates(extension_updates)
+        else:
+            extension_updates = None
+        if self.update is not None:
+            other_update = self.workspace.encode_update(update, extension_updates)
         update.unset_workspace() # free memory space
         if self.update is not None:
-            self.update.put(update)
+            self.update.put((self.run_id, other_update))
         #module_logger.debug('push_update: sending back') # DEBUG
         self.feedback.put((update, status))
         #module_logger.debug('push_update: sent') # DEBUG
@@ -199,23 +214,46 @@ class Worker(multiprocessing.Process):
             return
         while True:
             try:
-                update = self.update.get_nowait()
+                run_id, update = self.update.get_nowait()
             except queue.Empty:
                 break
             else:
+                if run_id != self.run_id:
+                    # late update from a previous run
+                    continue
                 self.workspace.update(update) # `Workspace.update` reloads the workspace into the update
     def run(self):
+        if self.control is None:
+            self._run()
+            return
+        # long-lived worker
+        while self._run():
+            request = self.control.get()
+            if request is None:
+                break
+            self.run_id, workspace, self.args, self.kwargs = pickle.loads(request)
+            self.workspace = workspace.restore(self.workspace)
+    def _run(self):
         try:
             self.target(*self.args, **self.kwargs)
+        except EndOfRun:
+            self.feedback.put((None, EndOfRun(self._id)))
         except (SystemExit, KeyboardInterrupt):
             raise
         except Exception as e:
             self.feedback.put((None,
                 WorkerNearDeathException(self._id, self.name, type(e), format_exc())))
+            return False
+        return True
 
 class NormalTermination(Exception):
     pass
 
+class EndOfRun(Exception):
+    """ Raised by :meth:`Worker.get_task` in a long-lived worker when the scheduler
+    completes, and sent back with the worker id as an acknowledgement. """
+    pass
+
 def _pseudo_worker(worker):
     class PseudoWorker(worker):
         def __init__(self, scheduler, args=(), kwargs={}, _id=0, name=None):
@@ -243,13 +281,19 @@ class Scheduler(object):
 
     The :meth:`stop` method should be overloaded so that the distributed computation
     may complete on termination criteria.
+
+    Instead of spawning new workers, a scheduler can use long-lived workers from a
+    :class:`WorkerPool`.
     """
     def __init__(self, workspace, tasks, worker_count=None, iter_max=None,
-            name=None, args=(), kwargs={}, daemon=None, **_kwargs):
+            name=None, args=(), kwargs={}, daemon=None, pool=None, **_kwargs):
         """
         Arguments:
 
             workspace (Workspace): workspace to be replicated
+
+            pool (WorkerPool): long-lived workers; if defined, `worker_count`, `name`
+                and `daemon` are ignored
         """
         self.workspace = workspace
         self.task = tasks
@@ -263,7 +307,14 @@ class Scheduler(object):
         elif worker_count < 0:
             worker_count = multiprocessing.cpu_count() + worker_count
         kwargs.update(_kwargs)
-        if worker_count:
+        self.pool = pool
+        if pool is not None:
+            if not issubclass(pool.worker, self.worker):
+                raise TypeError('the workers in the pool are not {} objects'.format(
+                    self.worker.__name__))
+            self.workers = {}
+            self.worker_args = (args, dict(kwargs))
+        elif worker_count:
             self.task_queue = multiprocessing.Queue()
             self.return_queue = multiprocessing.Queue()
             if worker_count == 1:
@@ -291,6 +342,8 @@ class Scheduler(object):
         return _pseudo_worker(self.worker)
     @property
     def worker_count(self):
+        if self.pool is not None and not self.workers:
+            return self.pool.worker_count
         return len(self.workers) if isinstance(self.workers, dict) else 0
     def draw(self, k):
         return k
@@ -428,8 +481,14 @@ class Scheduler(object):
                 ret = False
             return ret
 
-        for w in self.workers.values():
-            w.start()
+        if self.pool is None:
+            for w in self.workers.values():
+                w.start()
+        else:
+            self.pool.load(self.workspace, *self.worker_args)
+            self.task_queue = self.pool.task_queue
+            self.return_queue = self.pool.return_queue
+            self.workers = dict(self.pool.workers)
         self.init_resource_lock()
         k = 0
         postponed = dict()
@@ -454,6 +513,11 @@ class Scheduler(object):
             ret = True
         except (SystemExit, KeyboardInterrupt):
             ret = False
+        finally:
+            if self.pool is not None:
+                self.pool.release()
+        if self.pool is not None:
+            return ret
         for w in self.workers.values():
             try:
                 w.terminate()
@@ -488,6 +552,162 @@ class Scheduler(object):
         return self.stop(k, self.draw(k), status)
 
 
+class WorkerPool(object):
+    """ Long-lived workers for successive :class:`Scheduler` runs.
+
+    The workers are spawned (forked) with the workspace of the first run, and wait
+    for a new workspace at the end of each run.
+    The attributes of the workspace listed in its `__resident__` class attribute are kept
+    in the workers from one run to the next one, provided that they are the same objects
+    as in the previous run; the other attributes are pickled and sent to the workers.
+    If the resident attributes differ, or the other attributes cannot be pickled,
+    the workers are spawned again.
+    The resident attributes should not be modified in the workers.
+
+    Example::
+
+        with WorkerPool(4, worker=MyWorker) as pool:
+            for x0 in initial_points:
+                MyScheduler(MyWorkspace(x0, heavy_data), tasks, pool=pool).run()
+
+    """
+    def __init__(self, worker_count=None, worker=Worker, name=None, daemon=True):
+        if worker_count is None:
+            worker_count = multiprocessing.cpu_count() - 1
+        elif worker_count < 0:
+            worker_count = multiprocessing.cpu_count() + worker_count
+        if worker_count < 1:
+            raise ValueError('at least one worker is required')
+        self._worker_count = worker_count
+        self.worker = worker
+        self.name = name
+        self.daemon = daemon
+        self.task_queue = self.return_queue = None
+        self.control = {}
+        self.workers = {}
+        self.resident = None
+        self.run_count = 0
+        self.spawn_count = 0
+    @property
+    def worker_count(self):
+        return self._worker_count
+    def _spawn(self, workspace, args, kwargs):
+        self.close()
+        self.task_queue = multiprocessing.Queue()
+        self.return_queue = multiprocessing.Queue()
+        n = self._worker_count
+        update_queue = StarQueue(n) if 1 < n else None
+        self.control = { i: multiprocessing.Queue() for i in range(n) }
+        for i in range(n):
+            w = self.worker(i, workspace, self.task_queue, self.return_queue,
+                    None if update_queue is None else update_queue.deal(),
+                    name='{}-{:d}'.format(self.name, i) if self.name else None,
+                    args=args, kwargs=dict(kwargs), daemon=self.daemon, control=self.control[i])
+            w.run_id = self.run_count
+            w.start()
+            self.workers[i] = w
+        self.spawn_count += 1
+    def load(self, workspace, args=(), kwargs={}):
+        """ Send a new workspace and the input arguments to :meth:`Worker.target` to the workers.
+
+        Arguments:
+
+            workspace (Workspace): workspace to be replicated.
+
+            args (tuple): positional arguments to :meth:`Worker.target`.
+
+            kwargs (dict): keyword arguments to :meth:`Worker.target`.
+
+        """
+        self.run_count += 1
+        request = None
+        if self.workers and all( w.is_alive() for w in self.workers.values() ) \
+                and ResidentWorkspace.resident_in(workspace, self.resident):
+            try:
+                request = pickle.dumps((self.run_count, ResidentWorkspace(workspace), args, kwargs),
+                        pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                pass
+        if request is None:
+            self._spawn(workspace, args, kwargs)
+        else:
+            for i in self.workers:
+                self.control[i].put(request)
+        self.resident = workspace
+    def release(self):
+        """ Complete the current run.
+
+        Wait for the workers to complete their current job step, and discard the
+        job steps that have not been retrieved by the scheduler.
+        """
+        pending = { i for i, w in self.workers.items() if w.is_alive() }
+        for _ in pending:
+            self.task_queue.put(None)
+        while pending:
+            try:
+                step, status = self.return_queue.get(timeout=1.)
+            except queue.Empty:
+                pending = { i for i in pending if self.workers[i].is_alive() }
+                continue
+            if step is None:
+                if isinstance(status, EndOfRun):
+                    pending.discard(status.args[0])
+                elif isinstance(status, WorkerNearDeathException):
+                    pending.discard(status._id)
+    def close(self, timeout=1.):
+        """ Stop the workers. """
+        for i, w in self.workers.items():
+            if w.is_alive():
+                self.control[i].put(None)
+        for w in self.workers.values():
+            w.join(timeout)
+            if w.is_alive():
+                w.terminate()
+        self.workers = {}
+        self.resident = None
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+
+
+class ResidentWorkspace(object):
+    """ Copy of a workspace without its resident attributes, for long-lived workers
+    that already hold the resident attributes (see :class:`WorkerPool`). """
+    __slots__ = 'workspace',
+    def __init__(self, workspace):
+        workspace = copy(workspace)
+        for attr in type(workspace).__resident__:
+            if hasattr(workspace, attr):
+                setattr(workspace, attr, None)
+        self.workspace = workspace
+    def restore(self, resident):
+        """ Reattach the resident attributes from the previous workspace. """
+        workspace = self.workspace
+        for attr in type(workspace).__resident__:
+            if hasattr(resident, attr):
+                setattr(workspace, attr, getattr(resident, attr))
+        return workspace
+    @staticmethod
+    def resident_in(workspace, resident):
+        """ Whether the resident attributes of `workspace` are the same objects as those
+        of `resident`. """
+        if resident is None or type(resident) is not type(workspace):
+            return False
+        return all( _same(getattr(workspace, attr, None), getattr(resident, attr, None))
+                for attr in type(workspace).__resident__ )
+
+def _same(a, b):
+    if a is b:
+        return True
+    elif isinstance(a, (tuple, list)) and type(a) is type(b):
+        return len(a) == len(b) and all( _a is _b for _a, _b in zip(a, b) )
+    elif isinstance(a, dict) and type(a) is type(b):
+        return set(a) == set(b) and all( a[k] is b[k] for k in a )
+    else:
+        return False
+
+
 class EpochScheduler(Scheduler):
     def __init__(self, workspace, tasks, epoch_length=None, soft_epochs=False, worker_count=None,
             iter_max=None, name=None, args=(), kwargs={}, daemon=None, **_kwargs):
@@ -516,6 +736,7 @@ class EpochScheduler(Scheduler):
 
 class ProtoWorkspace(object):
     __slots__ = '_extensions',
+    __resident__ = () # see WorkerPool
     def __init__(self, args=()):
         self._extensions = {}
         if args:
@@ -526,6 +747,12 @@ class ProtoWorkspace(object):
             self.push_extension_updates(step.pop_updates())
     def resources(self, step):
         return step.resources
+    def encode_update(self, step, extension_updates=None):
+        """ Return the update to be sent to the other workers for a completed job step.
+
+        The default implementation returns `step`.
+        """
+        return step
     def identify_extensions(self, args):
         for k, a in enumerate(args):
             if isinstance(a, abc.WorkspaceExtension):
@@ -559,6 +786,36 @@ class Workspace(ProtoWorkspace):
         self.data_array = data_array
     def __len__(self):
         return len(self.data_array)
+    def update(self, step):
+        if isinstance(step, ArrayUpdate):
+            if step.index is None:
+                self.data_array[...] = step.values
+            else:
+                self.data_array[step.index] = step.values
+            if step.extension_updates:
+                self.push_extension_updates(step.extension_updates)
+        else:
+            ProtoWorkspace.update(self, step)
+
+
+class ArrayUpdate(object):
+    """ Update of some elements of :attr:`Workspace.data_array`, to be sent to the other
+    workers instead of a complete job step (see :meth:`ProtoWorkspace.encode_update`).
+
+    Attributes:
+
+        index (array-like): indices of the updated elements, or ``None`` for all the elements.
+
+        values (numpy.ndarray): new values.
+
+        extension_updates (dict): updates for the workspace extensions.
+
+    """
+    __slots__ = 'index', 'values', 'extension_updates'
+    def __init__(self, index, values, extension_updates=None):
+        self.index = index
+        self.values = values
+        self.extension_updates = extension_updates
 
 
 class JobStep(object):
@@ -644,5 +901,5 @@ class VehicleJobStep(JobStep, UpdateVehicle):
 abc.VehicleJobStep.register(VehicleJobStep)
 
 
-__all__ = [ 'StarConn', 'StarQueue', 'ProtoWorkspace', 'Workspace', 'JobStep', 'UpdateVehicle', 'VehicleJobStep', 'Worker', 'Scheduler', 'EpochScheduler', 'abc' ]
+__all__ = [ 'StarConn', 'StarQueue', 'ProtoWorkspace', 'Workspace', 'ArrayUpdate', 'JobStep', 'UpdateVehicle', 'VehicleJobStep', 'Worker', 'Scheduler', 'EpochScheduler', 'WorkerPool', 'ResidentWorkspace', 'abc' ]
 
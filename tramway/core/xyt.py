@@ -85,8 +85,150 @@ def iter_trajectories(trajectories, trajnum_colname='n', asslice=False, asarray=
             curr_traj_num = num
 
 
+def _xyt_cache_dir(path):
+    dirname, basename = os.path.split(path)
+    return os.path.join(dirname, '.{}.cache'.format(basename))
+
+def _xyt_cache_signature(path, options):
+    stat = os.stat(path)
+    return np.array([str(stat.st_size), str(stat.st_mtime_ns), repr(options)])
+
+def _load_cached_xyt(path, options):
+    """
+    Load the columnar copy of trajectory file `path` if it is up to date,
+    or return ``None`` otherwise.
+    """
+    cache_dir = _xyt_cache_dir(path)
+    try:
+        with np.load(os.path.join(cache_dir, 'index.npz')) as index:
+            signature, columns = index['signature'], index['columns']
+        if not np.array_equal(signature, _xyt_cache_signature(path, options)):
+            return None
+        # copy-on-write mapping, so that the dataframe can be modified in place
+        data = { str(col): np.load(os.path.join(cache_dir, '{:d}.npy'.format(i)), mmap_mode='c') \
+                for i, col in enumerate(columns) }
+    except (OSError, KeyError, ValueError):
+        return None
+    # `copy=False` keeps one block per column, instead of copying the columns in a single block
+    return pd.DataFrame(data, columns=[ str(col) for col in columns ], copy=False)
+
+def _cache_xyt(path, options, df):
+    """
+    Write a columnar copy of the trajectories in `df`, one .npy file per column,
+    together with an index that also stores the trajectory start offsets.
+
+    The cache directory is a hidden directory next to the original file.
+    Failures are silently ignored.
+    """
+    if not all( isinstance(col, str) for col in df.columns ):
+        return
+    cache_dir = _xyt_cache_dir(path)
+    index_file = os.path.join(cache_dir, 'index.npz')
+    try:
+        if os.path.isdir(cache_dir):
+            if os.path.isfile(index_file):
+                os.unlink(index_file)
+        else:
+            os.makedirs(cache_dir)
+        for i, col in enumerate(df.columns):
+            np.save(os.path.join(cache_dir, '{:d}.npy'.format(i)), df[col].values)
+        if 'n' in df.columns:
+            n = df['n'].values
+            offsets = np.r_[0, np.flatnonzero(n[1:] != n[:-1]) + 1, len(n)]
+        else:
+            offsets = np.zeros(0, dtype=int)
+        # the index is written last; a partially written cache is ignored
+        tmp_file = os.path.join(cache_dir, '.index.npz')
+        np.savez(tmp_file, signature=_xyt_cache_signature(path, options),
+                columns=np.array(list(df.columns)), trajectories=offsets)
+        os.replace(tmp_file, index_file)
+    except OSError:
+        pass
+
+
+def _load_xyt_file(f, columns, header, cache, verbose, kwargs):
+    """
+    Parse a single trajectory file for :func:`load_xyt`.
+
+    Returns the :class:`~pandas.DataFrame` and the column names, which may be
+    inferred from the file header.
+    """
+    kwargs = dict(kwargs)
+    dff, cached = None, False
+    if verbose:
+        print('loading file: {}'.format(f))
+    if cache:
+        options = (columns, header,
+                { kw: arg for kw, arg in kwargs.items() if kw != 'names' })
+        dff = _load_cached_xyt(f, options)
+    if dff is not None:
+        cached = True
+        if columns is None:
+            columns = list(dff.columns)
+    elif header is False:
+        if columns is None:
+            columns = ['n', 'x', 'y', 't']
+        kwargs['names'] = columns
+        dff = pd.read_csv(f, header=0, **kwargs)
+    else:
+        with open(f, 'r') as fd:
+            first_line = fd.readline()
+        if re.search(r'[a-df-zA-DF-Z_]', first_line):
+            if columns is None:
+                columns = first_line.split()
+            kwargs['names'] = columns
+            dff = pd.read_csv(f, header=0, **kwargs)
+        elif header is True:
+            dff = pd.read_csv(f, header=0, **kwargs)
+            columns = dff.columns
+        else:
+            if columns is None:
+                columns = ['n', 'x', 'y', 't']
+            kwargs['names'] = columns
+            dff = pd.read_csv(f, **kwargs)
+    if not cached:
+        if 'n' in columns:
+            sample = dff[dff['n']==dff['n'].iloc[-1]]
+            sample_dt = sample['t'].diff()[1:]
+            if not all(0 < sample_dt):
+                if any(0 == sample_dt):
+                    try:
+                        conflicting = sample_dt.values == 0
+                        conflicting = np.logical_or(np.r_[False, conflicting], np.r_[conflicting, False])
+                        print(sample.loc[conflicting])
+                    except:
+                        pass
+                    raise ValueError("some simultaneous locations are associated to a same trajectory: '{}'".format(f))
+                else:
+                    warnings.warn(EfficiencyWarning("table '{}' is not properly ordered".format(f)))
+                # faster sort
+                data = np.asarray(dff)
+                dff = pd.DataFrame(data=data[np.lexsort((dff['t'], dff['n']))],
+                    columns=dff.columns)
+                #sorted_dff = []
+                #for n in dff['n'].unique():
+                #       sorted_dff.append(dff[dff['n'] == n].sort_values(by='t'))
+                #dff = pd.concat(sorted_dff)
+                #dff.index = np.arange(dff.shape[0]) # optional
+        undefined = dff.isnull().values.all(axis=0)
+        if np.any(undefined):
+            if columns == list('nxyt') and np.sum(undefined) == 1:
+                raise ValueError('the molecules are not tracked')
+            else:
+                raise ValueError('too many specified columns: {}'.format(columns))
+        if cache:
+            _cache_xyt(f, options, dff)
+    return dff, columns
+
+def _try_load_xyt_file(*args):
+    try:
+        return _load_xyt_file(*args)
+    except OSError:
+        return None, None
+
+
 def load_xyt(path, columns=None, concat=True, return_paths=False, verbose=False,
-        reset_origin=False, header=None, **kwargs):
+        reset_origin=False, header=None, cache=False, worker_count=None, **kwargs):
     """
     Load trajectory files.
 
@@ -116,6 +258,16 @@ def load_xyt(path, columns=None, concat=True, return_paths=False, verbose=False,
             if ``True``, overwrite the `columns` argument with names from the header;
             if undefined, check whether a header is present and, if so, act as ``True``.
 
+        cache (bool): on first parse, write a columnar copy of each file (one .npy
+            file per column) in a hidden directory next to the file, and memory-map
+            this copy on later calls (copy-on-write); the copy is invalidated whenever
+            the size or modification time of the original file, or the loading options
+            change.
+
+        worker_count (int): number of threads for parsing multiple files concurrently;
+            the trajectory indices are shifted afterwards, in the order of the files,
+            so that the result does not depend on the number of workers.
+
     Returns:
 
         pandas.DataFrame or list or tuple: trajectories as one or multiple DataFrames;
@@ -135,10 +287,12 @@ def load_xyt(path, columns=None, concat=True, return_paths=False, verbose=False,
     paths = []
     for p in path:
         if os.path.isdir(p):
-            paths.append([ os.path.join(p, f) for f in os.listdir(p) ])
+            # skip the hidden cache directories (see argument `cache`)
+            paths.append([ os.path.join(p, f) for f in os.listdir(p) \
+                    if not (f[0] == '.' and f.endswith('.cache')) ])
         else:
             paths.append([p])
-    index_max = 0
+    index_max = None
     df = []
     paths = list(itertools.chain(*paths))
     if not paths:
@@ -146,67 +300,33 @@ def load_xyt(path, columns=None, concat=True, return_paths=False, verbose=False,
             print('nothing to load')
         return
     _failed = []
+    # the first loaded file may define the column names for the other files
+    parsed = []
     for f in paths:
-        try:
-            if verbose:
-                print('loading file: {}'.format(f))
-            if header is False:
-                if columns is None:
-                    columns = ['n', 'x', 'y', 't']
-                kwargs['names'] = columns
-                dff = pd.read_csv(f, header=0, **kwargs)
-            else:
-                with open(f, 'r') as fd:
-                    first_line = fd.readline()
-                if re.search(r'[a-df-zA-DF-Z_]', first_line):
-                    if columns is None:
-                        columns = first_line.split()
-                    kwargs['names'] = columns
-                    dff = pd.read_csv(f, header=0, **kwargs)
-                elif header is True:
-                    dff = pd.read_csv(f, header=0, **kwargs)
-                    columns = dff.columns
-                else:
-                    if columns is None:
-                        columns = ['n', 'x', 'y', 't']
-                    kwargs['names'] = columns
-                    dff = pd.read_csv(f, **kwargs)
-        except OSError:
-            _failed.append(f)
+        parsed.append(_try_load_xyt_file(f, columns, header, cache, verbose, kwargs))
+        if parsed[-1][1] is not None:
+            columns = parsed[-1][1]
+            break
+    other_paths = paths[len(parsed):]
+    if other_paths:
+        args = (columns, header, cache, verbose, kwargs)
+        if worker_count is None or worker_count <= 1:
+            parsed += [ _try_load_xyt_file(f, *args) for f in other_paths ]
         else:
-            if 'n' in columns:
-                sample = dff[dff['n']==dff['n'].iloc[-1]]
-                sample_dt = sample['t'].diff()[1:]
-                if not all(0 < sample_dt):
-                    if any(0 == sample_dt):
-                        try:
-                            conflicting = sample_dt.values == 0
-                            conflicting = np.logical_or(np.r_[False, conflicting], np.r_[conflicting, False])
-                            print(sample.loc[conflicting])
-                        except:
-                            pass
-                        raise ValueError("some simultaneous locations are associated to a same trajectory: '{}'".format(f))
-                    else:
-                        warnings.warn(EfficiencyWarning("table '{}' is not properly ordered".format(f)))
-                    # faster sort
-                    data = np.asarray(dff)
-                    dff = pd.DataFrame(data=data[np.lexsort((dff['t'], dff['n']))],
-                        columns=dff.columns)
-                    #sorted_dff = []
-                    #for n in dff['n'].unique():
-                    #       sorted_dff.append(dff[dff['n'] == n].sort_values(by='t'))
-                    #dff = pd.concat(sorted_dff)
-                    #dff.index = np.arange(dff.shape[0]) # optional
-                if dff['n'].min() < index_max:
-                    dff['n'] += index_max
-                    index_max = dff['n'].max()
-            undefined = dff.isnull().values.all(axis=0)
-            if np.any(undefined):
-                if columns == list('nxyt') and np.sum(undefined) == 1:
-                    raise ValueError('the molecules are not tracked')
-                else:
-                    raise ValueError('too many specified columns: {}'.format(columns))
-            df.append(dff)
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=worker_count) as pool:
+                parsed += list(pool.map(lambda f: _try_load_xyt_file(f, *args), other_paths))
+    # trajectory indices are shifted in the order of the files, as in the sequential case
+    for f, (dff, _columns) in zip(paths, parsed):
+        if dff is None:
+            _failed.append(f)
+            continue
+        if 'n' in _columns:
+            # the trajectories of a file follow those of the previous files
+            if index_max is not None and dff['n'].min() <= index_max:
+                dff['n'] += index_max - dff['n'].min() + 1
+            index_max = dff['n'].max()
+        df.append(dff)
     if df:
         for f in _failed:
             warnings.warn(f, FileNotFoundWarning)
@@ -269,21 +389,9 @@ def crop(points, box, by=None, add_deltas=True, keep_nans=False, no_deltas=False
 
         pandas.DataFrame: filtered locations
     """
-    box = np.asarray(box)
-    dim = int(box.size / 2)
-    support_lower_bound = box[:dim]
-    support_size = box[dim:]
-    support_upper_bound = support_lower_bound + support_size
-    not_coord_cols = ['n', 't']
-    if no_deltas:
-        delta_cols = []
-    else:
-        delta_cols = [ c for c in points.columns \
-                if c[0]=='d' and c[1:] != 'n' and c[1:] in points.columns ]
-        not_coord_cols += delta_cols
-    coord_cols = [ c for c in points.columns if c not in not_coord_cols ]
-    if len(coord_cols) != dim:
-        raise ValueError('the bounding box has dimension {} while the following coordinate columns were found: {}'.format(dim, coord_cols))
+    support_lower_bound, support_upper_bound = _box_bounds(box)
+    coord_cols, delta_cols = _crop_columns(points, no_deltas)
+    _check_box_dimension(support_lower_bound, coord_cols)
     within = np.all(np.logical_and(support_lower_bound <= points[coord_cols].values,
         points[coord_cols].values <= support_upper_bound), axis=1)
     if add_deltas or by:
@@ -291,12 +399,7 @@ def crop(points, box, by=None, add_deltas=True, keep_nans=False, no_deltas=False
         paired_src = np.r_[paired_dest[1:], False]
     points = points.copy()
     if add_deltas:
-        cols_with_deltas = [ c[1:] for c in delta_cols ]
-        cols_to_diff = [ c for c in points.columns if c not in ['n']+cols_with_deltas+delta_cols ]
-        deltas = points[cols_to_diff].diff().shift(-1)
-        deltas = deltas[paired_src]
-        deltas.columns = [ 'd'+c for c in cols_to_diff ]
-        points = points.join(deltas)
+        points = _add_deltas(points, delta_cols, paired_src)
     if by:
         if by in ('start', 'origin'):
             within[paired_dest] |= within[paired_src]
@@ -319,6 +422,158 @@ def crop(points, box, by=None, add_deltas=True, keep_nans=False, no_deltas=False
     return points
 
 
+def _box_bounds(box):
+    box = np.asarray(box)
+    dim = int(box.size / 2)
+    support_lower_bound = box[:dim]
+    support_size = box[dim:]
+    support_upper_bound = support_lower_bound + support_size
+    return support_lower_bound, support_upper_bound
+
+def _crop_columns(points, no_deltas=False):
+    not_coord_cols = ['n', 't']
+    if no_deltas:
+        delta_cols = []
+    else:
+        delta_cols = [ c for c in points.columns \
+                if c[0]=='d' and c[1:] != 'n' and c[1:] in points.columns ]
+        not_coord_cols += delta_cols
+    coord_cols = [ c for c in points.columns if c not in not_coord_cols ]
+    return coord_cols, delta_cols
+
+def _check_box_dimension(support_lower_bound, coord_cols):
+    dim = support_lower_bound.size
+    if len(coord_cols) != dim:
+        raise ValueError('the bounding box has dimension {} while the following coordinate columns were found: {}'.format(dim, coord_cols))
+
+def _add_deltas(points, delta_cols, paired_src):
+    cols_with_deltas = [ c[1:] for c in delta_cols ]
+    cols_to_diff = [ c for c in points.columns if c not in ['n']+cols_with_deltas+delta_cols ]
+    deltas = points[cols_to_diff].diff().shift(-1)
+    deltas = deltas[paired_src]
+    deltas.columns = [ 'd'+c for c in cols_to_diff ]
+    return points.join(deltas)
+
+
+def cropper(points, by=None, add_deltas=True, keep_nans=False, no_deltas=False):
+    """
+    Prepare the cropping of the same locations by many bounding boxes.
+
+    The deltas, the trajectory breakpoints and the missing values are computed once,
+    and the locations are sorted along the first coordinate,
+    so that cropping by a bounding box only visits the locations within the box
+    and their immediate neighbours in the trajectories.
+
+    Trajectory indices should be non-decreasing;
+    otherwise every bounding box falls back to :func:`crop`.
+
+    Arguments:
+
+        points (pandas.DataFrame): locations or translocations; see :func:`crop`
+
+        by, add_deltas, keep_nans, no_deltas: see :func:`crop`
+
+    Returns:
+
+        callable: function that takes a bounding box (origin and size) and returns
+            the same as ``crop(points, box, by, add_deltas, keep_nans, no_deltas)``
+
+    See also :func:`iter_crop`.
+    """
+    if by and by not in ('start', 'origin', 'stop', 'destination'):
+        raise ValueError('unsupported value for argument `by`')
+    coord_cols, delta_cols = _crop_columns(points, no_deltas)
+    if 'n' in points.columns:
+        n = points['n'].values
+    if 'n' not in points.columns or points.empty or np.any(np.diff(n) < 0):
+        def _crop(box):
+            return crop(points, box, by, add_deltas, keep_nans, no_deltas)
+        return _crop
+
+    N = len(n)
+    same_traj = np.r_[False, np.diff(n) == 0]
+    coords = points[coord_cols].values
+    if add_deltas:
+        points = _add_deltas(points, delta_cols, np.r_[same_traj[1:], False])
+    if keep_nans:
+        notnan = None
+    else:
+        notnan = ~points.isna().values.any(axis=1)
+    n_dtype = np.result_type(n.dtype, points.index.dtype)
+    n = n.astype(n_dtype)
+    # locations sorted along the first coordinate
+    order = np.argsort(coords[:,0], kind='stable')
+    first_coord = coords[order,0]
+
+    def _crop(box):
+        support_lower_bound, support_upper_bound = _box_bounds(box)
+        _check_box_dimension(support_lower_bound, coord_cols)
+        start = np.searchsorted(first_coord, support_lower_bound[0], side='left')
+        stop = np.searchsorted(first_coord, support_upper_bound[0], side='right')
+        rows = np.sort(order[start:stop])
+        _coords = coords[rows]
+        rows = rows[np.all(np.logical_and(support_lower_bound <= _coords,
+            _coords <= support_upper_bound), axis=1)]
+        if by in ('start', 'origin'):
+            dest = rows[rows+1 < N] + 1
+            rows = np.union1d(rows, dest[same_traj[dest]])
+        elif by in ('stop', 'destination'):
+            src = rows[0 < rows] - 1
+            rows = np.union1d(rows, src[same_traj[src+1]])
+        # `rows` are the locations within the box, in increasing order;
+        # a trajectory is split into segments at each location outside the box,
+        # and segments with a single location are discarded (except for the very first location)
+        def within(i):
+            pos = np.minimum(np.searchsorted(rows, i), len(rows)-1)
+            return 0 < len(rows) and rows[pos] == i
+        prev_continues = same_traj[rows] # rows[k] is in the same segment as rows[k]-1
+        prev_continues_prev = np.zeros_like(prev_continues)
+        _prev = rows[prev_continues] - 1
+        prev_continues_prev[prev_continues] = same_traj[_prev] & within(_prev)
+        # second locations of the segments with at least two locations
+        second = rows[prev_continues & ~prev_continues_prev]
+        _next = np.minimum(rows+1, N-1)
+        next_continues = (rows+1 < N) & same_traj[_next] & within(_next)
+        kept = prev_continues | next_continues | (rows == 0)
+        first_single = not (1 < N and same_traj[1] and within(1))
+        first_n = n[0] + (0 if within(0) else 1)
+        traj_n = first_n - 1 + first_single + np.searchsorted(second, rows+1, side='right')
+        if notnan is not None:
+            kept &= notnan[rows]
+        rows, traj_n = rows[kept], traj_n[kept]
+        cropped = points.take(rows)
+        cropped['n'] = traj_n.astype(n_dtype)
+        cropped.index = np.arange(cropped.shape[0])
+        return cropped
+
+    return _crop
+
+def iter_crop(points, boxes, by=None, add_deltas=True, keep_nans=False, no_deltas=False):
+    """
+    Crop the same locations by several bounding boxes.
+
+    Equivalent to ``(crop(points, box, ...) for box in boxes)``, with the shared work
+    done once (see :func:`cropper`).
+
+    Arguments:
+
+        points (pandas.DataFrame): locations or translocations; see :func:`crop`
+
+        boxes (iterable): bounding boxes, each as origin and size
+
+        by, add_deltas, keep_nans, no_deltas: see :func:`crop`
+
+    Returns:
+
+        generator: filtered locations for each box
+    """
+    _crop = None
+    for box in boxes:
+        if _crop is None:
+            _crop = cropper(points, by, add_deltas, keep_nans, no_deltas)
+        yield _crop(box)
+
+
 def discard_static_trajectories(trajectories, min_msd=None, trajnum_colname='n', full_trajectory=False, verbose=False, localization_error=None):
     """
     Arguments:
@@ -400,6 +655,8 @@ __all__ = [
     'load_xyt',
     'load_mat',
     'crop',
+    'cropper',
+    'iter_crop',
     'discard_static_trajectories',
     ]
 
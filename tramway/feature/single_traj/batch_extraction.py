@@ -109,7 +109,8 @@ def get_features_from_group(args):
     return get_all_features(RandomWalk(RW_df, zero_time=zero_time))
 
 
-def extract_features(RWs, nb_process=4, func_feat_process=None, pbar=True):
+def extract_features(RWs, nb_process=4, func_feat_process=None, pbar=True,
+                     chunksize=None):
     """Extracts features from a pandas DataFrame collecting different
     trajectories of random walks.
 
@@ -120,6 +121,9 @@ def extract_features(RWs, nb_process=4, func_feat_process=None, pbar=True):
     nb_process : int or None. Number of processes to use if not None.
     func_feat_process : function to apply to raw features extracted from the
         random walk. Use case : to get rid of unused features in the VAE.
+    chunksize : int or None. If not None, streaming extraction by chunks of
+        chunksize trajectories (see `extract_features_chunked`) ; all the
+        features are then of type float.
 
     Returns
     -------
@@ -127,6 +131,13 @@ def extract_features(RWs, nb_process=4, func_feat_process=None, pbar=True):
         Index is the id of the trajectory, columns are the names of the
         features extracted.
     """
+    if chunksize is not None:
+        ns, records = extract_features_chunked(RWs, nb_process=nb_process,
+                                               chunksize=chunksize, pbar=pbar)
+        df = pd.DataFrame(records, index=pd.Index(ns, name='n'))
+        if func_feat_process is not None:
+            df = func_feat_process(df)
+        return df
     df_trajs = RWs.groupby('n')
     n_trajs = df_trajs.agg('count').count().x.astype(int)
     if nb_process is None:
@@ -162,6 +173,157 @@ def extract_features(RWs, nb_process=4, func_feat_process=None, pbar=True):
     return df
 
 
+# trajectory table of the worker processes (see `extract_features_chunked`)
+_table = None
+
+
+def _pack_trajectories(RWs):
+    """Sorts the trajectories and packs the times and positions in a single
+    float array.
+
+    Returns
+    -------
+    ns : trajectory indices.
+    table : ndarray of shape (number of points, 1 + dimension).
+    bounds : ndarray of the offsets in table of the trajectories, with one
+        more element than ns.
+    columns : names of the columns of table.
+    """
+    if not RWs['n'].is_monotonic_increasing:
+        RWs = RWs.sort_values('n', kind='mergesort')
+    n = RWs['n'].values
+    starts = np.flatnonzero(np.r_[True, n[1:] != n[:-1]])
+    bounds = np.r_[starts, len(n)].astype(np.int64)
+    columns = ['t'] + [c for c in ('x', 'y', 'z') if c in RWs.columns]
+    table = np.ascontiguousarray(RWs[columns].values, dtype=np.float64)
+    return n[starts], table, bounds, columns
+
+
+def _attach_table(name, shape, n_bounds, columns):
+    """Worker initializer ; maps the trajectory table in shared memory.
+    """
+    from multiprocessing import shared_memory
+    global _table
+    shm = shared_memory.SharedMemory(name=name)
+    table = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    bounds = np.ndarray((n_bounds,), dtype=np.int64, buffer=shm.buf,
+                        offset=table.nbytes)
+    _table = (shm, table, bounds, columns)
+
+
+def _extract_chunk(args):
+    """Extracts the features of trajectories first to last-1 of the shared
+    table into a structured array. If dtype is None, the feature names are
+    those of the first random walk of the chunk that is not useless.
+    """
+    first, last, dtype = args
+    _, table, bounds, columns = _table
+    feats = []
+    for k in range(first, last):
+        # copy, as RandomWalk modifies the times inplace
+        rw = pd.DataFrame(table[bounds[k]:bounds[k+1]].copy(),
+                          columns=columns)
+        feats.append(get_all_features(RandomWalk(rw, zero_time=True)))
+    if dtype is None:
+        keys = next((f for f in feats if f), {})
+        dtype = np.dtype([(key, np.float64) for key in keys])
+    records = np.full(last - first, np.nan, dtype=dtype)
+    for k, f in enumerate(feats):
+        record = records[k]
+        for key, val in f.items():
+            if key in dtype.fields:
+                record[key] = val
+    return first, records
+
+
+def extract_features_chunked(RWs, nb_process=4, chunksize=1000, out=None,
+                             pbar=True):
+    """Streaming version of `extract_features`.
+
+    The trajectory table is copied once into shared memory, the worker
+    processes receive ranges of trajectories only, and the features are
+    written into a structured array as the chunks are processed.
+
+    Parameters
+    ----------
+    RWs : pandas DataFrame. Columns : n (Index of the random walk), t, and
+        dimensions (x, and/or, y, and/or z).
+    nb_process : int or None. Number of processes to use if not None.
+    chunksize : int, number of trajectories per task.
+    out : structured ndarray (e.g. a numpy.memmap) with one element per
+        trajectory and the feature names as fields, or None. The features are
+        written into out, or into a new array if None.
+    pbar : bool, whether to display a progress bar.
+
+    Returns
+    -------
+    ns : ndarray of the trajectory indices, in increasing order.
+    out : structured ndarray of float features, one element per trajectory ;
+        the features of useless random walks are nan.
+    """
+    ns, table, bounds, columns = _pack_trajectories(RWs)
+    global _table
+    # without out, the feature names are taken from the first chunk that
+    # yields features, so that no trajectory is featurized twice
+    dtype = None if out is None else out.dtype
+    chunks = [(first, min(first + chunksize, len(ns)), dtype)
+              for first in range(0, len(ns), chunksize)]
+
+    def store(first, records):
+        nonlocal out
+        if out is None:
+            if not records.dtype.names:
+                return
+            out = np.full(len(ns), np.nan, dtype=records.dtype)
+        if records.dtype == out.dtype:
+            out[first:first+len(records)] = records
+        else:
+            for key in records.dtype.names:
+                if key in out.dtype.fields:
+                    out[key][first:first+len(records)] = records[key]
+
+    if pbar:
+        def progress(it):
+            return tqdm.tqdm_notebook(it, total=len(chunks),
+                                      desc='extracting features')
+    else:
+        def progress(it):
+            return it
+    if nb_process is None:
+        _table = (None, table, bounds, columns)
+        try:
+            for first, records in progress(map(_extract_chunk, chunks)):
+                store(first, records)
+        finally:
+            _table = None
+    else:
+        from multiprocessing import shared_memory, resource_tracker
+        # let the workers share the resource tracker of this process
+        resource_tracker.ensure_running()
+        shm = shared_memory.SharedMemory(create=True,
+                                         size=table.nbytes + bounds.nbytes)
+        try:
+            np.ndarray(table.shape, dtype=table.dtype, buffer=shm.buf)[...] = \
+                table
+            np.ndarray(bounds.shape, dtype=bounds.dtype, buffer=shm.buf,
+                       offset=table.nbytes)[...] = bounds
+            del table
+            initargs = (shm.name, (bounds[-1], len(columns)), len(bounds),
+                        columns)
+            with mp.Pool(nb_process, initializer=_attach_table,
+                         initargs=initargs) as p:
+                for first, records in progress(
+                        p.imap_unordered(_extract_chunk, chunks)):
+                    store(first, records)
+        finally:
+            shm.close()
+            shm.unlink()
+    if out is None:
+        # only useless random walks
+        out = np.full(len(ns), np.nan, dtype=np.dtype([]))
+    return ns, out
+
+
 def create_and_extract(args):
     """Function that extracts features from a single random walk.
     Used for multiprocessing with a generator.
@@ -51,6 +51,15 @@ def _regularize_idminmax(id_min, id_max, N):
     return id_min, id_max
 
 
+def _distance_matrix(X, Y=None):
+    """Helper function ; returns the matrix of the distances between the rows
+    of X and the rows of Y (or X if Y is None).
+    """
+    if Y is None:
+        Y = X
+    return np.linalg.norm(X[:, np.newaxis] - Y[np.newaxis, :], axis=2)
+
+
 def _escape_rate(future_dists, mean_step, x):
     """Computes the proportion of times the random walk was able to escape a
     ball centered on the current position with radius x times mean_step.
@@ -152,10 +161,16 @@ class RandomWalk():
     dt_vec : numpy vector of time steps
     is_dt_cst : bool, if time steps are cst
     dt : float, first time step
-    Dvec : numpy array of size length * length * len(dims).
-        Element (i,j) is the vector position[i] - position[j]
-    Dabs : numpy array of size length * length
+    steps : numpy vector of single step sizes
+    Dvec : numpy array of size length * length * len(dims), computed on first
+        access. Element (i,j) is the vector position[i] - position[j]
+    Dabs : numpy array of size length * length, computed on first access.
         Element (i,j) is the distance between position[i] and position[j]
+
+    Features do not use Dvec and Dabs, so that memory grows linearly with the
+    length of the random walk. Distances at a given lag (see lag_distances)
+    and their prefix sums are computed once for the whole random walk and
+    reused by every time window.
     """
 
     def __init__(self, RW_df, zero_time=False, check_useless=True,
@@ -173,13 +188,56 @@ class RandomWalk():
             self.dt_vec = self.t[1:] - self.t[:-1]
             self.is_dt_cst = (np.var(self.dt_vec) < 1e-10)
             self.dt = self.dt_vec[0]
-            self.Dvec = (self.position[:, np.newaxis] -
-                         self.position[np.newaxis, :])
-            self.Dabs = np.linalg.norm(self.Dvec, axis=2)
+            self.steps = np.linalg.norm(self.position[1:] -
+                                        self.position[:-1], axis=1)
+            self._Dvec = None
+            self._Dabs = None
+            self._lag_dists = {1: self.steps}
+            self._lag_cumsums = {}
 
     def __len__(self):
         return self.length
 
+    @property
+    def Dvec(self):
+        if self._Dvec is None:
+            self._Dvec = (self.position[:, np.newaxis] -
+                          self.position[np.newaxis, :])
+        return self._Dvec
+
+    @property
+    def Dabs(self):
+        if self._Dabs is None:
+            self._Dabs = np.linalg.norm(self.Dvec, axis=2)
+        return self._Dabs
+
+    def lag_distances(self, lag):
+        """Distances ||X(t+lag) - X(t)|| for all t ; equivalent to
+        np.diagonal(self.Dabs, offset=lag).
+        """
+        try:
+            return self._lag_dists[lag]
+        except KeyError:
+            dists = np.linalg.norm(self.position[lag:] -
+                                   self.position[:-lag], axis=1)
+            self._lag_dists[lag] = dists
+            return dists
+
+    def _mean_lag_power(self, lag, p, id_min, id_max):
+        """Mean of ||X(t+lag) - X(t)||**p for id_min <= t < id_max - lag,
+        from prefix sums.
+        """
+        try:
+            cumsum = self._lag_cumsums[(lag, p)]
+        except KeyError:
+            # extended precision limits the cancellation errors in the
+            # differences of prefix sums
+            cumsum = np.zeros(self.length - lag + 1, dtype=np.longdouble)
+            np.cumsum(self.lag_distances(lag)**p, out=cumsum[1:])
+            self._lag_cumsums[(lag, p)] = cumsum
+        return float((cumsum[id_max - lag] - cumsum[id_min]) /
+                     (id_max - lag - id_min))
+
     # Those functions are used to extract sub attributes of the random walks.
     # Will be used when using time windowing feature extraction.
     def get_sub_time(self, id_min, id_max):
@@ -192,15 +250,20 @@ class RandomWalk():
 
     def get_sub_Dabs(self, id_min, id_max):
         id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
-        return self.Dabs[id_min:id_max, id_min:id_max]
+        return _distance_matrix(self.position[id_min:id_max])
 
     def get_sub_Dvec(self, id_min, id_max):
         id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
-        return self.Dvec[id_min:id_max, id_min:id_max]
+        subposition = self.position[id_min:id_max]
+        return subposition[:, np.newaxis] - subposition[np.newaxis, :]
 
     def get_sub_steps(self, id_min, id_max):
         id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
-        return np.diagonal(self.Dabs, offset=1)[id_min: id_max]
+        return self.steps[id_min: id_max]
+
+    def get_sub_lag_distances(self, lag, id_min, id_max):
+        id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
+        return self.lag_distances(lag)[id_min:id_max-lag]
 
     # Features
 
@@ -248,19 +311,20 @@ class RandomWalk():
         tau : times at which we computed the mean squared displacement
         msd : mean squared displacement
         """
-        subDabs = self.get_sub_Dabs(id_min, id_max)
+        id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
+        n = id_max - id_min
         # To avoid (if possible) using too many taus with little nb of points
         if use_all:
-            max_n = len(subDabs)
+            max_n = n
         else:
-            max_n = min(len(subDabs), max(len(subDabs)/2, 10))
+            max_n = min(n, max(n/2, 10))
         if sampling == 'log':
             tau_int = np.unique(np.geomspace(1, max_n, num=n_samples,
                                              endpoint=False).astype(int))
         else:
             tau_int = np.unique(np.linspace(1, max_n, num=n_samples,
                                             endpoint=False).astype(int))
-        msd = np.array([np.mean(np.diagonal(subDabs, offset=i)**2)
+        msd = np.array([self._mean_lag_power(i, 2, id_min, id_max)
                         for i in tau_int])
         return tau_int, msd
 
@@ -333,11 +397,13 @@ class RandomWalk():
         tau : taus for which we computed the moments of ||X(t+tau) - X(t)||.
         pdf_stats : array of shape n_samples * 4.
         """
-        subDabs = self.get_sub_Dabs(id_min, id_max)
-        tau_int = np.unique(np.geomspace(1, len(subDabs)-1, num=n_samples,
+        id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
+        n = id_max - id_min
+        tau_int = np.unique(np.geomspace(1, n-1, num=n_samples,
                                          endpoint=False).astype(int))
-        pdf_stats = [scipy.stats.describe(np.diagonal(subDabs, offset=i),
-                                          ddof=0) for i in tau_int]
+        pdf_stats = [scipy.stats.describe(
+                         self.get_sub_lag_distances(i, id_min, id_max),
+                         ddof=0) for i in tau_int]
         pdf_stats = np.array([[x.mean, x.variance, x.skewness, x.kurtosis]
                               for x in pdf_stats])
         # pdf_stats = np.stack(([np.mean(np.diagonal(subDabs, offset=i))
@@ -463,9 +529,10 @@ class RandomWalk():
         May help to detect drift.
         """
         try:
-            subDabs = self.get_sub_Dabs(id_min, id_max)
-            num = subDabs[0, -1]**2
-            denom = np.sum(np.diagonal(subDabs, offset=1)**2)
+            id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
+            num = np.linalg.norm(self.position[id_max-1] -
+                                 self.position[id_min])**2
+            denom = np.sum(self.steps[id_min:id_max-1]**2)
             return num / denom
         except:
             return np.nan
@@ -491,9 +558,10 @@ class RandomWalk():
         absolute distances (not squared).
         """
         try:
-            subDabs = self.get_sub_Dabs(id_min, id_max)
-            rs = np.diagonal(subDabs, offset=1)
-            return subDabs[0, -1] / np.sum(rs)
+            id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
+            rs = self.steps[id_min:id_max-1]
+            return (np.linalg.norm(self.position[id_max-1] -
+                                   self.position[id_min]) / np.sum(rs))
         except:
             return np.nan
 
@@ -525,11 +593,12 @@ class RandomWalk():
         Those features are q_i, i in {25, 50, 75}, where q_i is the distance
         from which i% of starting positions escaped from.
         """
-        subDabs = self.get_sub_Dabs(id_min, id_max)
-        mean_step = np.mean(np.diagonal(subDabs, offset=1))
-        sample = np.random.permutation(len(subDabs))[:min(100, len(subDabs))]
+        id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
+        n = id_max - id_min
+        mean_step = np.mean(self.steps[id_min:id_max-1])
+        sample = np.random.permutation(n)[:min(100, n)]
         sample = np.sort(sample)
-        subDabs = subDabs[sample][:, sample]
+        subDabs = _distance_matrix(self.position[id_min:id_max][sample])
         subDfuture = np.triu(subDabs)
         keys = ['escape_dist_q1', 'escape_dist_median', 'escape_dist_q3']
         qs = [0.25, 0.5, 0.75]
@@ -556,8 +625,7 @@ class RandomWalk():
     def feat_angle_old(self, id_min=None, id_max=None):
         """Returns moments related to the distribution of angles.
         """
-        subvec = np.diagonal(self.get_sub_Dvec(id_min, id_max),
-                             offset=-1)
+        subvec = np.diff(self.get_sub_position(id_min, id_max), axis=0).T
         vecnorm = np.linalg.norm(subvec, axis=0)
         no_mvt = vecnorm < 1e-6
         vecnorm[no_mvt] = 1
@@ -583,8 +651,7 @@ class RandomWalk():
     def feat_angle(self, id_min=None, id_max=None):
         """Returns variance, and first two autocorrelations of angles.
         """
-        subvec = np.diagonal(self.get_sub_Dvec(id_min, id_max),
-                             offset=-1)
+        subvec = np.diff(self.get_sub_position(id_min, id_max), axis=0).T
         vecnorm = np.linalg.norm(subvec, axis=0)
         no_mvt = vecnorm < 1e-6
         vecnorm[no_mvt] = 1
@@ -649,10 +716,11 @@ class RandomWalk():
         Source : Effective multifractal spectrum of a random walk,
                 Berthelsen et al., 1994, equation 1 of related paper.
         """
-        subDabs = self.get_sub_Dabs(id_min, id_max)
-        n = len(subDabs)
+        subposition = self.get_sub_position(id_min, id_max)
+        n = len(subposition)
         chosen_points = np.sort(np.random.permutation(n)[:min(n, n_samples)])
-        subDabs_sampled = subDabs[chosen_points]
+        subDabs_sampled = _distance_matrix(subposition[chosen_points],
+                                           subposition)
         if qs is None:
             try:
                 D_inf = _Dq(subDabs_sampled, -1.5, n_R=nR)
@@ -684,12 +752,12 @@ class RandomWalk():
         anomalous diffusion with single-particle tracking.
         Physical Chemistry Chemical Physics, 16(17), 7686-7691.
         """
-        subDabs = self.get_sub_Dabs(id_min, id_max)
-        ns = np.unique(np.linspace(1, len(subDabs)-1, n_samples).astype(int))
+        id_min, id_max = _regularize_idminmax(id_min, id_max, self.length)
+        ns = np.unique(np.linspace(1, id_max-id_min-1, n_samples).astype(int))
         gauss_n = np.zeros(len(ns))
         for i, n in enumerate(ns):
-            d_n = np.diagonal(subDabs, offset=n)
-            gauss_n[i] = np.mean(d_n**4) / ((np.mean(d_n**2)**2)) - 1
+            gauss_n[i] = (self._mean_lag_power(n, 4, id_min, id_max) /
+                          (self._mean_lag_power(n, 2, id_min, id_max)**2) - 1)
         grad_gauss_n = np.gradient(gauss_n) if len(gauss_n) > 1 else np.nan
         mean_grad = np.mean(grad_gauss_n)
         mean_gauss = np.mean(gauss_n)
@@ -841,8 +909,7 @@ def get_features_time(RW, n_t_samples=10, **kwargs):
     Tmax = RW.t.max()
     dict_feat_vals = {}
     times = np.unique(np.geomspace(1, N-1, n_t_samples)).astype(int)
-    msd = np.array([np.mean(np.diagonal(RW.Dabs, offset=i)**2)
-                    for i in times])
+    msd = np.array([RW._mean_lag_power(i, 2, 0, N) for i in times])
     msd /= Tmax
     dict_feat_vals['msd'] = msd
     times = np.unique(np.geomspace(1, N-2, n_t_samples)).astype(int)
@@ -97,7 +97,7 @@ def process_rw(args):
     X = rw.loc[:, ['x', 'y']].values
     t = rw.t.values
     rw_obj = RandomWalk(rw)
-    steps = np.diagonal(rw_obj.Dabs, offset=1)
+    steps = rw_obj.steps
     mean_step = np.mean(steps)
     sum_step = np.sum(steps)
     cum_dist = np.insert(
@@ -298,7 +298,7 @@ def process_rw2(args):
     X = rw.loc[:, ['x', 'y']].values
     t = rw.t.values
     rw_obj = RandomWalk(rw)
-    steps = np.diagonal(rw_obj.Dabs, offset=1)
+    steps = rw_obj.steps
     mean_step = np.mean(steps)
     sum_step = np.sum(steps)
     cum_dist = np.insert(
@@ -426,7 +426,7 @@ def process_rw3(args):
         X += np.random.randn(*X.shape) * noise
     t = rw.t.values
     rw_obj = RandomWalk(rw)
-    steps = np.diagonal(rw_obj.Dabs, offset=1)
+    steps = rw_obj.steps
     mean_step = np.mean(steps)
     sum_step = np.sum(steps)
     cum_dist = np.insert(
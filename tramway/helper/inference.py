@@ -36,6 +36,7 @@ class Infer(Helper):
         self.plugins = inference.plugins
         self.cells = None
         self.input_maps = None
+        self.runtime_stats = collections.OrderedDict()
 
     def prepare_data(self, input_data, types=None, labels=None, metadata=True, verbose=None, \
             output_file=None, **kwargs):
@@ -66,7 +67,7 @@ class Infer(Helper):
 
     def distribute(self, new_cell=None, new_group=None, cell_sampling=None,
             include_empty_cells=False, merge_threshold_count=False,
-            max_cell_count=None, dilation=None, grad=None, rgrad=None):
+            max_cell_count=None, dilation=None, grad=None, rgrad=None, balance=None):
         cells = self.cells
         if isinstance(cells, Distributed):
             _map = cells
@@ -111,19 +112,30 @@ class Infer(Helper):
                     class Distr(new_group):
                         def local_variation(self, *args, **kwargs):
                             return rgrad(self, *args, **kwargs)
+                        def local_variation_operator(self, *args, **kwargs):
+                            return self._stencil_operator(operator_builder(rgrad), *args, **kwargs)
                 elif rgrad is None:
                     class Distr(new_group):
                         def grad(self, *args, **kwargs):
                             return grad(self, *args, **kwargs)
+                        def grad_operator(self, *args, **kwargs):
+                            return self._stencil_operator(operator_builder(grad), *args, **kwargs)
                 else:
                     class Distr(new_group):
                         def grad(self, *args, **kwargs):
                             return grad(self, *args, **kwargs)
                         def local_variation(self, *args, **kwargs):
                             return rgrad(self, *args, **kwargs)
+                        def grad_operator(self, *args, **kwargs):
+                            return self._stencil_operator(operator_builder(grad), *args, **kwargs)
+                        def local_variation_operator(self, *args, **kwargs):
+                            return self._stencil_operator(operator_builder(rgrad), *args, **kwargs)
                 new_group = Distr
+            t0 = time.time()
             detailled_map = distributed(cells, new_cell=new_cell, new_group=new_group,
                     include_empty_cells=include_empty_cells, **distributed_kwargs)
+            t1 = time.time()
+            self.runtime_stats['distribute'] = t1 - t0
 
             if cell_sampling is None:
                 try:
@@ -146,10 +158,12 @@ class Infer(Helper):
                     else:
                         dilation = 2
                 multiscale_map = detailled_map.group(max_cell_count=max_cell_count, \
-                    adjacency_margin=dilation)
+                    adjacency_margin=dilation, balance=balance)
                 _map = multiscale_map
             else:
                 _map = detailled_map
+            if _map is not detailled_map:
+                self.runtime_stats['group'] = time.time() - t1
         return _map
 
     def overload_cells(self, cells):
@@ -256,15 +270,21 @@ class Infer(Helper):
         except KeyError:
             _fun = self._infer
 
+        stats = self.runtime_stats
         if self.input_is_partition:
 
             if cells is None:
                 cells = self.cells
+            inference.counters.collect() # reset
+            t0 = time.time()
             x = _fun(cells, **kwargs)
+            stats['optimize'] = time.time() - t0
+            stats.update(inference.counters.collect())
+            stats['peak_rss'] = inference.counters.peak_rss()
 
         else:
 
-            x = cells.run(_fun, **kwargs)
+            x = cells.run(_fun, stats=stats, **kwargs)
 
         ret = {}
         if isinstance(x, tuple):
@@ -293,6 +313,10 @@ class Infer(Helper):
         if verbose:
             print('{} mode: elapsed time: {}ms'.format(mode, int(round(runtime*1e3))))
         maps.runtime = runtime
+        keys = ['distribute', 'group', 'optimize', 'merge'] + list(inference.counters.COUNTERS) \
+                + ['pickled_bytes', 'shared_bytes', 'peak_rss', 'groups']
+        maps.runtime_stats = collections.OrderedDict([ (k, stats[k]) for k in keys \
+                if stats.get(k, None) is not None ])
 
         for attr in ret:
             maps.defattr(attr, ret[attr])
@@ -333,7 +357,7 @@ def infer1(cells, mode='degraded.d', output_file=None, partition={}, verbose=Fal
     include_empty_cells=False, cell_sampling=None, merge_threshold_count=False, \
     grad=None, rgrad=None, input_label=None, output_label=None, comment=None, \
     return_cells=None, profile=None, overwrite=None, inplace=False, \
-    priorD=None, priorV=None, force=None, **kwargs):
+    priorD=None, priorV=None, force=None, balance=None, **kwargs):
     """
     Inference helper.
 
@@ -422,10 +446,20 @@ def infer1(cells, mode='degraded.d', output_file=None, partition={}, verbose=Fal
 
         snr_extensions (bool): add snr extensions for Bayes factor calculation.
 
+        balance (float or bool): if `max_cell_count` is defined, split the groups of
+            cells of highest estimated cost; see also
+            :meth:`~tramway.inference.base.Distributed.group`.
+
     Returns:
 
         Maps or pandas.DataFrame or tuple:
 
+    The :class:`~tramway.inference.base.Maps` object has a `runtime_stats` attribute
+    with the processing time of the *distribute*, *group*, *optimize* and *merge* steps,
+    the counters of :mod:`~tramway.inference.counters`, the amount of data sent to the
+    worker processes and the peak memory usage;
+    see also :meth:`~tramway.inference.base.Distributed.run`.
+
     `priorD` and `priorV` are legacy arguments.
     They are deprecated and `diffusivity_prior`/`diffusion_prior` and `potential_prior` respectively
     should be used instead.
@@ -454,7 +488,7 @@ def infer1(cells, mode='degraded.d', output_file=None, partition={}, verbose=Fal
                 new_group=constructor if new_group is None else new_group, cell_sampling=cell_sampling, \
                 include_empty_cells=include_empty_cells, \
                 merge_threshold_count=merge_threshold_count, max_cell_count=max_cell_count, \
-                dilation=dilation, grad=grad, rgrad=rgrad)
+                dilation=dilation, grad=grad, rgrad=rgrad, balance=balance)
         _map = helper.overload_cells(_map)
 
         if store_distributed:
@@ -572,6 +606,12 @@ def infer0(cells, mode='D', output_file=None, partition={}, verbose=False, \
 
         Maps or pandas.DataFrame or tuple:
 
+    The :class:`~tramway.inference.base.Maps` object has a `runtime_stats` attribute
+    with the processing time of the *distribute*, *group*, *optimize* and *merge* steps,
+    the counters of :mod:`~tramway.inference.counters`, the amount of data sent to the
+    worker processes and the peak memory usage;
+    see also :meth:`~tramway.inference.base.Distributed.run`.
+
     `priorD` and `priorV` are legacy arguments.
     They are deprecated and `diffusivity_prior` and `potential_prior` should be used instead
     respectively.
@@ -674,6 +714,8 @@ def infer0(cells, mode='D', output_file=None, partition={}, verbose=False, \
                 class Distr(new_group):
                     def grad(self, *args, **kwargs):
                         return grad(self, *args, **kwargs)
+                    def grad_operator(self, *args, **kwargs):
+                        return self._stencil_operator(operator_builder(grad), *args, **kwargs)
                 new_group = Distr
         detailled_map = distributed(cells, new_cell=new_cell, new_group=new_group,
                 **distributed_kwargs)
@@ -1,4 +1,4 @@
 
-from .functional import random_walk, add_noise, truth
+from .functional import random_walk, iter_random_walk, add_noise, truth
 from .categoricaltrap import random_walk_2d
 
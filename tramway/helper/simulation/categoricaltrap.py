@@ -63,16 +63,18 @@ class generate_trajectories:
 
 ############################################################
 ############################################################
-    def  random_start(self):
+    def  random_start(self, size=None):
+         # with `size`, arrays of starting points (see generate_the_trajectories_in_lockstep)
          L_ = self.L_
-         x = -L_ + np.random.random()*2*L_
-         y = -L_ + np.random.random()*2*L_
+         x = -L_ + np.random.random(size)*2*L_
+         y = -L_ + np.random.random(size)*2*L_
          return x , y
 ############################################################
 ############################################################
-    def traj_duration(self):
+    def traj_duration(self, size=None):
+        # with `size`, an array of durations (see generate_the_trajectories_in_lockstep)
         N_mean_ = self.N_mean_
-        N_duration_ = -N_mean_*np.log(np.random.random())
+        N_duration_ = -N_mean_*np.log(np.random.random(size))
         return N_duration_
 ############################################################
 ############################################################
@@ -236,7 +238,11 @@ class generate_trajectories:
         return u_, v_, t_
 ############################################################
 ############################################################
-    def generate_the_actual_trajectories(self):
+    def generate_the_actual_trajectories(self, vectorized=False, nb_process=None):
+
+        if vectorized or nb_process:
+            self.generate_the_trajectories_in_lockstep(nb_process)
+            return
 
         n_total_size_max_ = self.n_total_size_max_
         n_trajs_          = self.n_trajs_
@@ -300,9 +306,103 @@ class generate_trajectories:
 
         self.indice_final_ = indice_
 
+############################################################
+############################################################
+    def generate_the_trajectories_in_lockstep(self, nb_process=None):
+        """
+        Same as :meth:`generate_the_actual_trajectories`, with all the trajectories
+        integrated together, one small time step at a time.
+
+        The starting points and durations are drawn first, in the main process,
+        with :meth:`random_start` and :meth:`traj_duration` called with a `size` argument.
+        If `nb_process` is defined, the trajectories are split into as many shards,
+        integrated in parallel. The seed of each shard is drawn with :mod:`numpy.random`,
+        so that the output is reproducible with :func:`numpy.random.seed`.
+        """
+        n_trajs_          = self.n_trajs_
+        n_short_          = self.n_short_
+        dt_space_         = self.dt_space_
+        dt_short_         = self.dt_short_
+
+        u0_, v0_          = self.random_start(n_trajs_)
+        N_duration_       = np.round(self.traj_duration(n_trajs_)).astype(int)
+        # each trajectory starts dt_space_ after the end of the previous one
+        t_end_            = np.cumsum(dt_space_ + N_duration_ * (n_short_ * dt_short_))
+        t0_               = t_end_ - N_duration_ * (n_short_ * dt_short_)
+
+        if nb_process:
+            nb_process    = min(nb_process, n_trajs_)
+            shards        = np.array_split(np.arange(n_trajs_), nb_process)
+            seeds         = np.random.randint(2**31, size=len(shards))
+            args          = [ (self, u0_[shard], v0_[shard], N_duration_[shard], seed) \
+                                for shard, seed in zip(shards, seeds) ]
+            import multiprocessing as mp
+            with mp.Pool(nb_process) as pool:
+                results   = pool.map(_integrate_shard, args)
+            frame_, x_, y_ = [ np.concatenate(r) for r in zip(*results) ]
+        else:
+            frame_, x_, y_ = self.integrate_in_lockstep(u0_, v0_, N_duration_)
+
+        nb_               = np.repeat(np.arange(1, n_trajs_ + 1), N_duration_ + 1)
+        t_                = np.repeat(t0_, N_duration_ + 1) + frame_ * (n_short_ * dt_short_)
+
+        self.nb_          = nb_
+        self.x_           = x_
+        self.y_           = y_
+        self.t_           = t_
+
+        self.indice_final_ = nb_.size
+############################################################
+############################################################
+    def integrate_in_lockstep(self, u_, v_, N_duration_, random_state=np.random):
+        """
+        Integrate trajectories from their starting points `u_`, `v_`, for `N_duration_`
+        time steps each.
+
+        Returns the frame index, and the *x* and *y* coordinates of all the points,
+        ordered by trajectory and then by frame.
+        """
+        n_short_          = self.n_short_
+        dt_short_         = self.dt_short_
+        lambda_           = self.lambda_
+
+        # sort the trajectories by decreasing duration,
+        # so that the active trajectories are always the first ones
+        order_            = np.argsort(-N_duration_, kind='stable')
+        u_, v_            = u_[order_].astype(float), v_[order_].astype(float)
+        n_active_         = np.cumsum(np.bincount(N_duration_, minlength=1)[::-1])[::-1]
+
+        x_                = [u_.copy()]
+        y_                = [v_.copy()]
+        for k in range(1, n_active_.size):
+            m             = n_active_[k]
+            if self.verbose:
+                print(k)
+            u, v          = u_[:m], v_[:m]
+            for j in range(n_short_):
+                D_, grad_D_x_, grad_D_y_, gamma_, V_, fx_, fy_ = self.give_diffusion_drift_gamma( u, v )
+                sigma_    = np.sqrt(2 * D_ * dt_short_)
+                u         = u + (fx_/gamma_ + lambda_ *grad_D_x_)*dt_short_ + sigma_ * random_state.randn(m)
+                v         = v + (fy_/gamma_ + lambda_ *grad_D_y_)*dt_short_ + sigma_ * random_state.randn(m)
+            u_[:m], v_[:m] = u, v
+            x_.append(u)
+            y_.append(v)
+
+        # reorder the points, by trajectory and then by frame
+        frame_            = np.concatenate([ np.full(x.size, k) for k, x in enumerate(x_) ])
+        rank_             = np.concatenate([ np.arange(x.size) for x in x_ ])
+        x_, y_            = np.concatenate(x_), np.concatenate(y_)
+        reorder_          = np.lexsort((frame_, order_[rank_]))
+        return frame_[reorder_], x_[reorder_], y_[reorder_]
+
 
 
 
+def _integrate_shard(args):
+    gen, u_, v_, N_duration_, seed = args
+    return gen.integrate_in_lockstep(u_, v_, N_duration_, np.random.RandomState(seed))
+
+
 ############################################################
 ############################################################
 
@@ -329,6 +429,8 @@ def random_walk_2d(*args, **kwargs):
         mode_V (str):   any of '*potential_force*', '*potential_linear*'
         mode_gamma (str):       any of '*equilibrium*', '*fixed*'
         verbose (bool): print trajectory index (default is False)
+        vectorized (bool):      integrate all the trajectories together
+        nb_process (int):       number of processes; implies `vectorized`
 
     Returns:
 
@@ -344,11 +446,13 @@ def random_walk_2d(*args, **kwargs):
         if arg in ('lambda', 'sigma', 'sigma_noise', 'dt', 'n_short', 'N_mean', 'n_trajs',
                 'L', 'density', 'D0', 'amplitude_D', 'amplitude_V'):
             kwargs[arg+'_'] = kwargs.pop(arg)
+    vectorized = kwargs.pop('vectorized', False)
+    nb_process = kwargs.pop('nb_process', None)
     # turn verbosity off by default
     kwargs['verbose'] = kwargs.get('verbose', False)
     # generate trajectories
     gen = generate_trajectories(*args, **kwargs)
-    gen.generate_the_actual_trajectories()
+    gen.generate_the_actual_trajectories(vectorized, nb_process)
     gen.noisify()
     # return a DataFrame
     gen.create_traj()
@@ -23,7 +23,7 @@ def random_walk(diffusivity=None, force=None, viscosity=None, drift=None,
         initial_trajectory_count=None, new_trajectory_count=None,
         lifetime_tau=None, lifetime=None, single=False,
         box=(0., 0., 1., 1.), duration=10., time_step=.05, minor_step_count=99,
-        reflect=False, full=False, count_outside_trajectories=None):
+        reflect=False, full=False, count_outside_trajectories=None, vectorized=False):
     """
     Generate random walks.
 
@@ -94,11 +94,99 @@ def random_walk(diffusivity=None, force=None, viscosity=None, drift=None,
             in determining the number of trajectories at each observation step;
             **deprecated**
 
+        vectorized (bool): advance all the active trajectories together;
+            `diffusivity`, `force`, `viscosity` and `drift`, if callable, take
+            an array of coordinates with one row per trajectory (:class:`~numpy.ndarray`
+            of shape (k, dim)) and time (float), and return one value or row per trajectory;
+            the diffusivity passed to `drift` is either a float or an array of shape (k,);
+            see also :func:`iter_random_walk`
+
     Returns:
 
         pandas.DataFrame: simulated trajectories with 'n' the trajectory index,
             't' the time and with other columns for location coordinates
 
+    """
+    if vectorized:
+        return next(iter_random_walk(diffusivity, force, viscosity, drift,
+            trajectory_mean_count, trajectory_count_sd, turnover,
+            initial_trajectory_count, new_trajectory_count,
+            lifetime_tau, lifetime, single, box, duration, time_step, minor_step_count,
+            reflect, full, count_outside_trajectories, chunksize=None))
+    _box, support_lower_bound, support_size, support_upper_bound, diffusivity, drift, time_support = \
+        _random_walk_setup(diffusivity, force, viscosity, drift,
+            trajectory_mean_count, trajectory_count_sd, turnover,
+            initial_trajectory_count, new_trajectory_count,
+            lifetime_tau, lifetime, single, box, duration, time_step,
+            count_outside_trajectories)
+    dim = support_lower_bound.size
+    #
+    actual_time_step = time_step / float(minor_step_count + 1)
+    total_location_count = sum([ np.sum(_lifetime) for _, _lifetime in time_support ])
+    # generate the trajectories
+    N = np.empty((total_location_count, ), dtype=int)       # trajectory index
+    X = np.empty((total_location_count, dim), dtype=_box.dtype) # spatial coordinates
+    T = np.empty((total_location_count, ), dtype=float)     # time
+    i, n = 0, 0
+    for t0, lifetimes in time_support:
+        k = lifetimes.size # number of new trajectories at time t
+        X0 = np.random.rand(k, dim) * support_size + support_lower_bound # initial coordinates
+        for x0, _lifetime in zip(X0, lifetimes): # for each new trajectory
+            n += 1
+            N[i] = n
+            X[i] = x = x0
+            T[i] = t = t0
+            i += 1
+            # from here the main code (``not reflect``) is duplicated to reduce the number of if-tests
+            if reflect:
+                # duplicated code
+                for j in range(1,_lifetime):
+                    for _ in range(minor_step_count+1):
+                        D = diffusivity(x, t)
+                        A = drift(x, t, D)
+                        dx = actual_time_step * A + \
+                            np.sqrt(actual_time_step * 2. * D) * np.random.randn(dim)
+                        x = x + dx
+                        # additional code
+                        above = support_upper_bound < x
+                        x[above] = 2*support_upper_bound[above] - x[above]
+                        below = x < support_lower_bound
+                        if np.any(below & above):
+                            raise NotImplementedError('the jump is so large that its reflection also exceeds the opposite bound')
+                        x[below] = 2*support_lower_bound[below] - x[below]
+                        #
+                        t = t + actual_time_step
+                    t = t0 + j * time_step # moderate numerical precision errors
+                    N[i] = n
+                    X[i] = x
+                    T[i] = t
+                    i += 1
+            else:
+                # reference code
+                for j in range(1,_lifetime):
+                    for _ in range(minor_step_count+1):
+                        D = diffusivity(x, t)
+                        A = drift(x, t, D)
+                        dx = actual_time_step * A + \
+                            np.sqrt(actual_time_step * 2. * D) * np.random.randn(dim)
+                        x = x + dx
+                        t = t + actual_time_step
+                    t = t0 + j * time_step # moderate numerical precision errors
+                    N[i] = n
+                    X[i] = x
+                    T[i] = t
+                    i += 1
+    return _format_random_walk(N, X, T, _box, single, duration, time_step, reflect, full)
+
+
+def _random_walk_setup(diffusivity, force, viscosity, drift,
+        trajectory_mean_count, trajectory_count_sd, turnover,
+        initial_trajectory_count, new_trajectory_count,
+        lifetime_tau, lifetime, single, box, duration, time_step,
+        count_outside_trajectories, vectorized=False):
+    """
+    Check the arguments of :func:`random_walk`, build the diffusivity and drift maps,
+    and draw the starting times and lifetimes of the trajectories.
     """
     if turnover is not None:
         warnings.warn('`turnover` is deprecated', DeprecationWarning)
@@ -131,9 +219,15 @@ def random_walk(diffusivity=None, force=None, viscosity=None, drift=None,
             drift = lambda x, t, D: _drift(x, t)
     elif force:
         if viscosity is None:
-            drift = lambda x, t, D: D * force(x, t)
+            if vectorized:
+                drift = lambda x, t, D: _column(D) * force(x, t)
+            else:
+                drift = lambda x, t, D: D * force(x, t)
         elif callable(viscosity):
-            drift = lambda x, t, D: force(x, t) / viscosity(x, t)
+            if vectorized:
+                drift = lambda x, t, D: force(x, t) / _column(viscosity(x, t))
+            else:
+                drift = lambda x, t, D: force(x, t) / viscosity(x, t)
         elif np.isscalar(viscosity) and 0 < viscosity:
             drift = lambda x, t, D: force(x, t) / viscosity
         else:
@@ -202,62 +296,14 @@ def random_walk(diffusivity=None, force=None, viscosity=None, drift=None,
         if K is not None:
             _count = np.flipud(np.cumsum(np.flipud(_lifetime)))
             k[i:min(i+_count.size,k.size)] += _count[:min(k.size-i,_count.size)]
-    #
-    actual_time_step = time_step / float(minor_step_count + 1)
-    total_location_count = sum([ np.sum(_lifetime) for _, _lifetime in time_support ])
-    # generate the trajectories
-    N = np.empty((total_location_count, ), dtype=int)       # trajectory index
-    X = np.empty((total_location_count, dim), dtype=_box.dtype) # spatial coordinates
-    T = np.empty((total_location_count, ), dtype=float)     # time
-    i, n = 0, 0
-    for t0, lifetimes in time_support:
-        k = lifetimes.size # number of new trajectories at time t
-        X0 = np.random.rand(k, dim) * support_size + support_lower_bound # initial coordinates
-        for x0, _lifetime in zip(X0, lifetimes): # for each new trajectory
-            n += 1
-            N[i] = n
-            X[i] = x = x0
-            T[i] = t = t0
-            i += 1
-            # from here the main code (``not reflect``) is duplicated to reduce the number of if-tests
-            if reflect:
-                # duplicated code
-                for j in range(1,_lifetime):
-                    for _ in range(minor_step_count+1):
-                        D = diffusivity(x, t)
-                        A = drift(x, t, D)
-                        dx = actual_time_step * A + \
-                            np.sqrt(actual_time_step * 2. * D) * np.random.randn(dim)
-                        x = x + dx
-                        # additional code
-                        above = support_upper_bound < x
-                        x[above] = 2*support_upper_bound[above] - x[above]
-                        below = x < support_lower_bound
-                        if np.any(below & above):
-                            raise NotImplementedError('the jump is so large that its reflection also exceeds the opposite bound')
-                        x[below] = 2*support_lower_bound[below] - x[below]
-                        #
-                        t = t + actual_time_step
-                    t = t0 + j * time_step # moderate numerical precision errors
-                    N[i] = n
-                    X[i] = x
-                    T[i] = t
-                    i += 1
-            else:
-                # reference code
-                for j in range(1,_lifetime):
-                    for _ in range(minor_step_count+1):
-                        D = diffusivity(x, t)
-                        A = drift(x, t, D)
-                        dx = actual_time_step * A + \
-                            np.sqrt(actual_time_step * 2. * D) * np.random.randn(dim)
-                        x = x + dx
-                        t = t + actual_time_step
-                    t = t0 + j * time_step # moderate numerical precision errors
-                    N[i] = n
-                    X[i] = x
-                    T[i] = t
-                    i += 1
+    return _box, support_lower_bound, support_size, support_upper_bound, diffusivity, drift, time_support
+
+
+def _format_random_walk(N, X, T, _box, single, duration, time_step, reflect, full):
+    """
+    Format the trajectories generated by :func:`random_walk` as a dataframe and post-process.
+    """
+    dim = X.shape[1]
     # format the data as a dataframe
     columns = 'xyz'
     if dim <= 3:
@@ -280,6 +326,125 @@ def random_walk(diffusivity=None, force=None, viscosity=None, drift=None,
     return points
 
 
+def iter_random_walk(diffusivity=None, force=None, viscosity=None, drift=None,
+        trajectory_mean_count=100, trajectory_count_sd=0, turnover=None,
+        initial_trajectory_count=None, new_trajectory_count=None,
+        lifetime_tau=None, lifetime=None, single=False,
+        box=(0., 0., 1., 1.), duration=10., time_step=.05, minor_step_count=99,
+        reflect=False, full=False, count_outside_trajectories=None, chunksize=1000000):
+    """
+    Generate random walks chunk by chunk.
+
+    All the active trajectories are advanced together at each minor step, and
+    `diffusivity`, `force`, `viscosity` and `drift` are vectorized, as in
+    ``random_walk(..., vectorized=True)``.
+
+    Each chunk contains whole trajectories, ordered by trajectory index,
+    and is post-processed as the output of :func:`random_walk`.
+    The trajectory indices increase from a chunk to the next one.
+
+    Arguments:
+
+        chunksize (int): minimum number of generated locations per chunk (the last chunk
+            can be smaller); only the chunk being filled and the active trajectories are
+            kept in memory; if ``None``, a single chunk is generated
+
+    See :func:`random_walk` for the other arguments.
+
+    Returns:
+
+        generator: simulated trajectories as :class:`pandas.DataFrame` objects
+    """
+    _box, support_lower_bound, support_size, support_upper_bound, diffusivity, drift, time_support = \
+        _random_walk_setup(diffusivity, force, viscosity, drift,
+            trajectory_mean_count, trajectory_count_sd, turnover,
+            initial_trajectory_count, new_trajectory_count,
+            lifetime_tau, lifetime, single, box, duration, time_step,
+            count_outside_trajectories, vectorized=True)
+    dim = support_lower_bound.size
+    actual_time_step = time_step / float(minor_step_count + 1)
+    # state of the active trajectories
+    n_active = np.zeros(0, dtype=int) # trajectory index
+    x_active = np.zeros((0, dim), dtype=_box.dtype) # spatial coordinates
+    t0_active = np.zeros(0) # starting time
+    j_active = np.zeros(0, dtype=int) # observed step number, from 0
+    lifetime_active = np.zeros(0, dtype=int) # number of observed steps
+    # generated locations, as blocks of (n, x, t) arrays
+    blocks, pending_count = [], 0
+    n, n_offset = 0, 0
+    new_trajectories = iter(time_support)
+    t0, lifetimes = next(new_trajectories, (None, None))
+    t = 0.
+    while t0 is not None or n_active.size:
+        # make new trajectories
+        t += time_step
+        if t0 is not None and t0 <= t:
+            k = lifetimes.size # number of new trajectories at time t
+            X0 = np.random.rand(k, dim) * support_size + support_lower_bound # initial coordinates
+            n_active = np.r_[n_active, np.arange(n+1, n+k+1)]
+            x_active = np.concatenate((x_active, X0), axis=0)
+            t0_active = np.r_[t0_active, np.full(k, t0)]
+            j_active = np.r_[j_active, np.zeros(k, dtype=int)]
+            lifetime_active = np.r_[lifetime_active, lifetimes]
+            n += k
+            t = t0
+            t0, lifetimes = next(new_trajectories, (None, None))
+        # record the current locations
+        blocks.append((n_active, x_active, t0_active + j_active * time_step))
+        # discard the terminated trajectories
+        j_active = j_active + 1
+        active = j_active < lifetime_active
+        if not np.all(active):
+            pending_count += np.sum(lifetime_active[~active])
+            n_active, x_active, t0_active, j_active, lifetime_active = \
+                n_active[active], x_active[active], t0_active[active], \
+                j_active[active], lifetime_active[active]
+        # flush the terminated trajectories
+        last_chunk = t0 is None and not n_active.size
+        if last_chunk or (chunksize and chunksize <= pending_count):
+            N, X, T = [ np.concatenate(col) for col in zip(*blocks) ]
+            terminated = ~np.isin(N, n_active)
+            blocks = [(N[~terminated], X[~terminated], T[~terminated])]
+            pending_count = 0
+            N, X, T = N[terminated], X[terminated], T[terminated]
+            order = np.argsort(N, kind='stable') # ordered by trajectory, then time
+            points = _format_random_walk(N[order], X[order], T[order],
+                    _box, single, duration, time_step, reflect, full)
+            if chunksize and not points.empty:
+                # renumber contiguously, as trajectories may have been cropped out
+                _, n_index = np.unique(points['n'].values, return_inverse=True)
+                points['n'] = n_offset + 1 + n_index
+                n_offset = points['n'].iloc[-1]
+            yield points
+        if not n_active.size:
+            continue
+        # advance the active trajectories
+        x, _t = x_active, t
+        for _ in range(minor_step_count+1):
+            D = diffusivity(x, _t)
+            A = drift(x, _t, D)
+            dx = actual_time_step * A + \
+                _column(np.sqrt(actual_time_step * 2. * D)) * np.random.randn(*x.shape)
+            x = x + dx
+            if reflect:
+                above = support_upper_bound < x
+                x = np.where(above, 2*support_upper_bound - x, x)
+                below = x < support_lower_bound
+                if np.any(below & above):
+                    raise NotImplementedError('the jump is so large that its reflection also exceeds the opposite bound')
+                x = np.where(below, 2*support_lower_bound - x, x)
+            _t = _t + actual_time_step
+        x_active = x
+
+
+def _column(a):
+    """
+    Make a per-trajectory array of values broadcastable against an array of coordinates.
+    """
+    a = np.asarray(a)
+    return a[:, np.newaxis] if a.ndim == 1 else a
+
+
 def add_noise(points, sigma, copy=False):
     columns = [ c for c in points.columns if c not in ('n', 't') ]
     dim = len(columns)
@@ -16,7 +16,7 @@ from tramway.core import *
 from tramway.core.exceptions import *
 from tramway.tessellation import format_cell_index, nearest_cell
 import tramway.tessellation as tessellation
-from .gradient import grad1, delta0
+from .gradient import grad1, delta0, grad1_operator, delta0_operator
 import numpy as np
 import pandas as pd
 import scipy.sparse as sparse
@@ -28,6 +28,11 @@ import six
 from functools import partial
 from warnings import warn
 import traceback
+import atexit
+import sys
+import time
+import pickle
+from . import counters
 
 
 
@@ -236,11 +241,12 @@ class Distributed(Local):
             margin cells are not central.
 
     """
-    __slots__ = ('_reverse', '_adjacency', 'central', '_degree', '_ccount', '_tcount')
+    __slots__ = ('_reverse', '_adjacency', 'central', '_degree', '_ccount', '_tcount', '_operators')
     __lazy__  = Local.__lazy__ + ('reverse', 'degree', 'ccount', 'tcount')
 
     def __init__(self, cells, adjacency, index=None, center=None, span=None, central=None, \
         boundary=None):
+        self._operators = None
         Local.__init__(self, index, OrderedDict(), center, span, boundary)
         self.cells = cells # let's `cells` setter perform the necessary checks
         self.adjacency = adjacency
@@ -278,6 +284,7 @@ class Distributed(Local):
         #       pass
         self.reverse = None
         self.ccount = None
+        self._operators = None
         self.data = cells
 
     @property
@@ -372,6 +379,7 @@ class Distributed(Local):
             a = a.tocsr()
         self._adjacency = a
         self._degree = None # `degree` is ro, hence set `_degree` instead
+        self._operators = None
 
     @property
     def degree(self):
@@ -475,6 +483,69 @@ class Distributed(Local):
         """
         return delta0(self, i, X, index_map, **kwargs)
 
+    def grad_operator(self, index=None, index_map=None, **kwargs):
+        """
+        Sparse linear operator equivalent to :meth:`grad` evaluated at every cell in `index`.
+
+        The operator is built once and then reused as long as the same arguments are passed
+        and the cells or adjacency matrix do not change.
+
+        Arguments:
+
+            index (sequence of ints):
+                cell indices; default is all the cells.
+
+            index_map (numpy.ndarray):
+                index map that converts cell indices to indices in X.
+
+        Returns:
+
+            tramway.inference.gradient.StencilOperator:
+                one matrix per space dimension, or ``None`` if :meth:`grad` is
+                overloaded and the operator is not.
+
+        See also :func:`~tramway.inference.gradient.grad1_operator`.
+        """
+        if type(self).grad is not Distributed.grad:
+            return None
+        return self._stencil_operator(grad1_operator, index, index_map, **kwargs)
+
+    def local_variation_operator(self, index=None, index_map=None, **kwargs):
+        """
+        Sparse linear operator equivalent to :meth:`local_variation` evaluated at every cell
+        in `index`.
+
+        Similar to :meth:`grad_operator`.
+
+        Returns:
+
+            tramway.inference.gradient.StencilOperator:
+                single-matrix operator, or ``None`` if :meth:`local_variation` is
+                overloaded and the operator is not.
+
+        See also :func:`~tramway.inference.gradient.delta0_operator`.
+        """
+        if type(self).local_variation is not Distributed.local_variation:
+            return None
+        return self._stencil_operator(delta0_operator, index, index_map, **kwargs)
+
+    def _stencil_operator(self, builder, index=None, index_map=None, **kwargs):
+        if builder is None:
+            return None
+        if self._operators is None:
+            self._operators = {}
+        key = (builder, tuple(sorted(kwargs.items())))
+        try:
+            _index, _index_map, operator = self._operators[key]
+        except KeyError:
+            pass
+        else:
+            if _same_array(_index, index) and _same_array(_index_map, index_map):
+                return operator
+        operator = builder(self, index, index_map, **kwargs)
+        self._operators[key] = (index, index_map, operator)
+        return operator
+
     def flatten(self):
         def concat(arrays):
             if isinstance(arrays[0], tuple):
@@ -492,8 +563,25 @@ class Distributed(Local):
 
         return new
 
+    def estimated_cost(self, mode_factor=1.):
+        """
+        Estimate the computational cost of processing this group of cells.
+
+        The cost model is the number of translocations times the number of cells,
+        both including the adjacency margin, times `mode_factor`.
+        The latter is a constant for a given inference mode and does not affect
+        the relative costs of groups.
+
+        Returns:
+
+            float: estimated cost.
+
+        """
+        tcount = sum([ cell.tcount for cell in self.cells.values() ])
+        return float(mode_factor) * float(tcount) * float(len(self.cells))
+
     def group(self, ngroups=None, max_cell_count=None, cell_centers=None, \
-        adjacency_margin=2, connected=False):
+        adjacency_margin=2, connected=False, balance=None):
         """
         Make groups of cells.
 
@@ -525,6 +613,12 @@ class Distributed(Local):
                 separates the connected components from one another.
                 Conflicts with the other arguments.
 
+            balance (float or bool):
+                split the groups of highest estimated cost (see :meth:`estimated_cost`)
+                until no group exceeds `balance` times the average cost;
+                ``True`` stands for 1.5.
+                Does not apply to `connected` and `cell_centers`.
+
         Returns:
 
             Distributed:
@@ -593,7 +687,13 @@ class Distributed(Local):
             I[ok] = grid.cell_index(points[ok], min_location_count=1)
             #if not np.all(ok):
             #       print(ok.nonzero()[0])
-            new.adjacency = grid.simplified_adjacency(format='csr') # macro-cell adjacency matrix
+            group_centers = grid.cell_centers
+            if balance and cell_centers is None:
+                I, group_centers, macro_adjacency = self._balance_groups(I, points,
+                        adjacency_margin, 1.5 if balance is True else balance)
+                new.adjacency = macro_adjacency
+            else:
+                new.adjacency = grid.simplified_adjacency(format='csr') # macro-cell adjacency matrix
             J = np.unique(I)
             J = J[0 <= J]
             assert 0 < J.size
@@ -611,7 +711,7 @@ class Distributed(Local):
                     L = L[K]
 
                 A = self.adjacency[K,:].tocsc()[:,K].tocsr() # point adjacency matrix
-                C = grid.cell_centers[j]
+                C = group_centers[j]
                 D = OrderedDict([ (i, self.cells[k]) \
                     for i, k in enumerate(K.nonzero()[0]) if k in self.cells ])
 
@@ -626,7 +726,7 @@ class Distributed(Local):
                         D[i] = copy(D[i])
                         D[i].span = span - D[i].center
 
-                R = grid.cell_centers[new.adjacency[j].indices] - C
+                R = group_centers[new.adjacency[j].indices] - C
 
                 new.cells[j] = type(self)(D, A, index=j, center=C, span=R)
 
@@ -669,6 +769,77 @@ class Distributed(Local):
 
         return new
 
+    def _balance_groups(self, I, points, adjacency_margin, balance):
+        """
+        Split the groups of cells defined by `I` (group index for each cell, or -1)
+        until the estimated cost of every group is lower than `balance` times the average.
+
+        As the adjacency margin does not shrink with the groups, splitting may stop lowering
+        the maximum cost. The splitting stops if the number of groups doubles with no
+        improvement, and the fewest groups that achieve the lowest maximum cost are returned.
+
+        A group is split along its widest dimension, at the median of its translocations.
+
+        Returns:
+
+            tuple: new `I`, group centers and group adjacency matrix.
+
+        """
+        tcount = np.zeros(I.size)
+        for i in self.cells:
+            tcount[i] = self.cells[i].tcount
+        adjacency = self.adjacency
+        def cost(K):
+            for k in range(adjacency_margin):
+                K = np.copy(K)
+                K[adjacency[K,:].indices] = True
+            return np.sum(tcount[K]) * np.sum(K)
+        I = np.array(I)
+        J = np.unique(I)
+        J = J[0 <= J]
+        costs = { j: cost(I == j) for j in J }
+        next_j = J.max() + 1 if J.size else 0
+        # because of the adjacency margin, a split does not always lower the maximum cost;
+        # keep track of the fewest groups that achieve the lowest maximum cost
+        best_cost, best_I, best_count = max(costs.values()) if costs else 0, np.copy(I), len(costs)
+        while costs:
+            j = max(costs, key=costs.get)
+            if costs[j] <= balance * np.mean(list(costs.values())):
+                break
+            K = np.flatnonzero(I == j)
+            if K.size < 2:
+                # cannot split single cells; the maximum cost cannot be lowered
+                break
+            x = points[K]
+            axis = np.argmax(np.max(x, axis=0) - np.min(x, axis=0))
+            order = np.argsort(x[:,axis], kind='stable')
+            cumulated = np.cumsum(tcount[K[order]] + 1)
+            split = np.searchsorted(cumulated, .5 * cumulated[-1])
+            split = min(max(split, 1), K.size - 1)
+            I[K[order[split:]]] = next_j
+            costs[j] = cost(I == j)
+            costs[next_j] = cost(I == next_j)
+            next_j += 1
+            max_cost = max(costs.values())
+            if max_cost < best_cost:
+                best_cost, best_I, best_count = max_cost, np.copy(I), len(costs)
+            elif 2 * best_count <= len(costs):
+                # the number of groups doubled with no improvement
+                break
+        I = best_I
+        # renumber the groups and derive their centers and adjacency
+        J, I_ok = np.unique(I[0 <= I], return_inverse=True)
+        I[0 <= I] = I_ok
+        ngroups = J.size
+        ok = np.flatnonzero(0 <= I)
+        P = sparse.csr_matrix((np.ones(ok.size), (ok, I[ok])), shape=(I.size, ngroups))
+        centers = P.T.dot(points) / np.asarray(P.sum(axis=0)).T
+        macro_adjacency = P.T.dot(adjacency.astype(float)).dot(P).tocsr()
+        macro_adjacency.setdiag(0)
+        macro_adjacency.eliminate_zeros()
+        macro_adjacency = macro_adjacency.astype(bool)
+        return I, centers, macro_adjacency
+
     def run(self, function, *args, **kwargs):
         """
         Apply a function to the groups (:class:`Distributed`) of terminal cells.
@@ -680,6 +851,8 @@ class Distributed(Local):
         advised to call any function that returns a DataFrame with cell indices as indices.
 
         Multiples processes may be spawned.
+        The cell data are passed to them through shared memory where available.
+        The groups of highest estimated cost are processed first.
 
         Arguments:
 
@@ -702,12 +875,28 @@ class Distributed(Local):
             worker_count (int):
                 number of simultaneously working processing units.
 
+            persistent (bool):
+                keep the worker processes alive across calls (see :func:`close_pool`);
+                a fresh pool is forked anyway if `function` is defined in the main module
+                after the workers were forked.
+
             profile (bool or str or tuple):
                 profile each child job if any;
                 if `str`, dump the output stats into *.prof* files;
                 if `tuple`, print a report with :func:`~pstats.Stats.print_stats` and
                 tuple elements as input arguments.
 
+            timing (bool):
+                print the estimated cost (see :meth:`estimated_cost`) and the
+                processing time of each group of cells.
+
+            stats (dict):
+                filled in place with the processing time split into '*optimize*' and
+                '*merge*' (in seconds), the counters defined in
+                :mod:`~tramway.inference.counters`, the number of bytes pickled to and
+                shared with the worker processes, the peak resident set size (in bytes)
+                and a per-group report as a :class:`~pandas.DataFrame` ('*groups*').
+
         Returns:
 
             pandas.DataFrame:
@@ -720,13 +909,16 @@ class Distributed(Local):
         self.clear_caches()
 
         returns = kwargs.pop('returns', None)
+        stats = kwargs.pop('stats', None)
+        t0 = time.time()
 
         if all(isinstance(cell, Distributed) for cell in self.cells.values()):
             # parallel for-loop over the subsets of cells
             # if `worker_count` is `None`, `Pool` will use `multiprocessing.cpu_count()`
             worker_count = kwargs.pop('worker_count', None)
             profile = kwargs.pop('profile', False)
-            pool = Pool(worker_count)
+            timing = kwargs.pop('timing', False)
+            persistent = kwargs.pop('persistent', False)
             fargs = (function, args, kwargs)
             if profile:
                 fargs = (profile, fargs)
@@ -734,19 +926,73 @@ class Distributed(Local):
             else:
                 cells = [ self.cells[i] for i in self.cells ]#if bool(self.cells[i]) ]
             if six.PY3:
+                groups = [ cell[1] if profile else cell for cell in cells ]
+                costs = [ group.estimated_cost() for group in groups ]
+                # dispatch the most expensive groups first
+                order = sorted(range(len(cells)), key=lambda k: -costs[k])
+                shared = None
                 if profile:
-                    _run = __profile_run__
+                    _run, tasks = __profile_run__, cells
+                elif _shared_memory_available():
+                    # share the data once and send the workers descriptors only
+                    shared = _SharedGroups(cells)
+                    _run, tasks = __shared_run__, shared.descriptors
+                else:
+                    _run, tasks = __run__, cells
+                if shared is None:
+                    # pickle the groups here so that the amount of data sent is known
+                    tasks = [ pickle.dumps(task, pickle.HIGHEST_PROTOCOL) for task in tasks ]
+                    pickled = [ len(task) for task in tasks ]
                 else:
-                    _run = __run__
-                ys = pool.map(partial(_run, fargs), cells)
+                    pickled = [ size for _, _, size in tasks ]
+                ys, elapsed = [None] * len(cells), np.zeros(len(cells))
+                worker_stats = [None] * len(cells)
+                # pickle the function here as well, so that the workers can report
+                # unpickling errors instead of dying on the task
+                _fargs = pickle.dumps(fargs, pickle.HIGHEST_PROTOCOL)
+                pool = _get_pool(worker_count, function, persistent)
+                try:
+                    for k, t, y, s in pool.imap_unordered(partial(__timed_run__, _run, _fargs),
+                            [ (k, tasks[k]) for k in order ]):
+                        ys[k], elapsed[k], worker_stats[k] = y, t, s
+                finally:
+                    if not persistent:
+                        pool.terminate()
+                        pool.join()
+                    if shared is not None:
+                        shared_bytes = shared._size
+                        shared.close()
+                t1 = time.time()
+                if shared is not None:
+                    ys = [ _unpack_frames(y) for y in ys ]
+                report = _group_report(list(self.cells.keys()), groups, costs, elapsed,
+                        pickled, worker_stats)
+                if timing:
+                    _print_timing_report(report)
+                if stats is not None:
+                    for counter in counters.COUNTERS:
+                        stats[counter] = int(report[counter].sum())
+                    stats['pickled_bytes'] = int(sum(pickled))
+                    if shared is not None:
+                        stats['shared_bytes'] = int(shared_bytes)
+                    stats['peak_rss'] = int(max([counters.peak_rss() or 0] + \
+                            [ s['peak_rss'] or 0 for s in worker_stats ]))
+                    stats['groups'] = report
             elif six.PY2:
                 import itertools
                 if profile:
                     _run = __profile_run_star__
                 else:
                     _run = __run_star__
-                ys = pool.map(_run,
-                    itertools.izip(itertools.repeat(fargs), cells))
+                pool = _get_pool(worker_count, function, persistent)
+                try:
+                    ys = pool.map(_run,
+                        itertools.izip(itertools.repeat(fargs), cells))
+                finally:
+                    if not persistent:
+                        pool.terminate()
+                        pool.join()
+                t1 = time.time()
             if returns is None:
                 ys = [ y for y in ys if y is not None ]
                 if ys:
@@ -765,7 +1011,12 @@ class Distributed(Local):
 
         else:
             # direct function application
+            counters.collect() # reset
             result = function(self, *args, **kwargs)
+            t1 = time.time()
+            if stats is not None:
+                stats.update(counters.collect())
+                stats['peak_rss'] = counters.peak_rss()
 
         if returns:
             index = { v: [] for v in returns }
@@ -791,6 +1042,10 @@ class Distributed(Local):
             if returns[1:]:
                 result = result.join([ _result[v] for v in returns[1:] ])
 
+        if stats is not None:
+            stats['optimize'] = t1 - t0
+            stats['merge'] = time.time() - t1
+
         return result
 
     # `dict` interface
@@ -849,6 +1104,7 @@ class Distributed(Local):
         return self.adjacency.indices[self.adjacency.indptr[i]:self.adjacency.indptr[i+1]]
 
     def clear_caches(self):
+        self._operators = None
         try:
             first = True
             for c in self.values():
@@ -936,6 +1192,307 @@ def __profile_run_star__(args):
     return __profile_run__(*args)
 
 
+class _SharedArray(object):
+    """
+    Placeholder for an array stored in a shared memory block.
+    """
+    __slots__ = ('offset', 'dtype', 'shape')
+
+    def __init__(self, offset, dtype, shape):
+        self.offset = offset
+        self.dtype = dtype
+        self.shape = shape
+
+    def __getstate__(self):
+        return (self.offset, self.dtype, self.shape)
+
+    def __setstate__(self, state):
+        self.offset, self.dtype, self.shape = state
+
+    def restore(self, buf):
+        """copies the array out of shared memory buffer `buf`"""
+        return np.array(np.ndarray(self.shape, dtype=self.dtype, buffer=buf, offset=self.offset))
+
+
+class _SharedFrame(object):
+    """
+    Placeholder for a :class:`~pandas.DataFrame` stored column-wise in a shared memory block.
+    """
+    __slots__ = ('index', 'columns', 'arrays')
+
+    def __init__(self, index, columns, arrays):
+        self.index = index
+        self.columns = columns
+        self.arrays = arrays
+
+    def __getstate__(self):
+        return (self.index, self.columns, self.arrays)
+
+    def __setstate__(self, state):
+        self.index, self.columns, self.arrays = state
+
+    def restore(self, buf):
+        index = self.index
+        if isinstance(index, _SharedArray):
+            index = index.restore(buf)
+        return pd.DataFrame(
+                OrderedDict([ (col, a.restore(buf)) for col, a in zip(self.columns, self.arrays) ]),
+                index=index, columns=self.columns)
+
+
+class _SharedGroups(object):
+    """
+    Copies the cell data and adjacency matrices of groups of cells (:class:`Distributed`)
+    into a single shared memory block.
+
+    The remaining attributes of each group are pickled in the same block,
+    so that a worker process only needs a `(block name, offset, size)` descriptor
+    to reconstruct a group (see :func:`__shared_run__`).
+    """
+    __slots__ = ('shm', 'descriptors', '_arrays', '_size')
+
+    def __init__(self, groups):
+        from multiprocessing import shared_memory
+        self._arrays, self._size = [], 0
+        skeletons = [ pickle.dumps(self._skeleton(group), pickle.HIGHEST_PROTOCOL) \
+                for group in groups ]
+        size = self._size + sum([ len(s) for s in skeletons ])
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        try:
+            buf = self.shm.buf
+            for offset, a in self._arrays:
+                np.ndarray(a.shape, dtype=a.dtype, buffer=buf, offset=offset)[...] = a
+            offset, self.descriptors = self._size, []
+            for s in skeletons:
+                buf[offset:offset+len(s)] = s
+                self.descriptors.append((self.shm.name, offset, len(s)))
+                offset += len(s)
+        except:
+            self.close()
+            raise
+        finally:
+            self._arrays = None
+
+    def _share(self, a):
+        a = np.ascontiguousarray(a)
+        if a.dtype.hasobject:
+            return a
+        offset = self._size
+        self._arrays.append((offset, a))
+        self._size += -(-a.nbytes // 64) * 64 # 64-byte alignment
+        return _SharedArray(offset, a.dtype, a.shape)
+
+    def _share_data(self, data):
+        if isinstance(data, np.ndarray):
+            return self._share(data)
+        elif isinstance(data, pd.DataFrame):
+            if any([ dtype.hasobject for dtype in data.dtypes ]):
+                return data
+            index = data.index
+            if not index.dtype.hasobject and not isinstance(index, pd.MultiIndex):
+                index = self._share(index.values)
+            arrays = [ self._share(data[col].values) for col in data.columns ]
+            return _SharedFrame(index, list(data.columns), arrays)
+        elif type(data) is tuple:
+            return tuple([ self._share_data(x) for x in data ])
+        else:
+            return data
+
+    @staticmethod
+    def _shared_attributes(cell):
+        attrs = ['data']
+        if isinstance(cell, Translocations):
+            attrs += ['origins', 'destinations']
+            if isinstance(cell, TrackedMolecules):
+                attrs.append('n')
+        return attrs
+
+    def _skeleton(self, group):
+        group = copy(group)
+        group._operators = None
+        cells = OrderedDict()
+        for i, cell in group.cells.items():
+            cell = copy(cell)
+            if isinstance(cell, Cell):
+                cell.cache = None
+                for attr in self._shared_attributes(cell):
+                    setattr(cell, attr, self._share_data(getattr(cell, attr)))
+            cells[i] = cell
+        group.data = cells
+        a = group.adjacency
+        if a is not None:
+            group._adjacency = (a.shape, self._share(a.data), self._share(a.indices),
+                    self._share(a.indptr))
+        return group
+
+    @staticmethod
+    def _restore_data(data, buf):
+        if isinstance(data, (_SharedArray, _SharedFrame)):
+            return data.restore(buf)
+        elif type(data) is tuple:
+            return tuple([ _SharedGroups._restore_data(x, buf) for x in data ])
+        else:
+            return data
+
+    @staticmethod
+    def restore(group, buf):
+        """
+        Replaces the placeholders in `group` by copies of the shared data.
+        """
+        for cell in group.cells.values():
+            if isinstance(cell, Cell):
+                for attr in _SharedGroups._shared_attributes(cell):
+                    setattr(cell, attr, _SharedGroups._restore_data(getattr(cell, attr), buf))
+        if isinstance(group._adjacency, tuple):
+            shape, data, indices, indptr = group._adjacency
+            group._adjacency = sparse.csr_matrix(
+                    (data.restore(buf), indices.restore(buf), indptr.restore(buf)), shape=shape)
+        return group
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+def _pack_frames(x):
+    """
+    Converts the :class:`~pandas.DataFrame` and :class:`~pandas.Series` in `x`
+    into plain arrays, that are cheaper to send back from a worker process.
+    """
+    if isinstance(x, tuple):
+        return tuple([ _pack_frames(_x) for _x in x ])
+    elif isinstance(x, pd.DataFrame) and not isinstance(x.columns, pd.MultiIndex):
+        return ('DataFrame', x.index.values, list(x.columns),
+                [ x[col].values for col in x.columns ])
+    elif isinstance(x, pd.Series):
+        return ('Series', x.index.values, x.name, x.values)
+    else:
+        return x
+
+def _unpack_frames(x):
+    if isinstance(x, tuple):
+        if x and x[0] == 'DataFrame':
+            _, index, columns, arrays = x
+            return pd.DataFrame(OrderedDict(zip(columns, arrays)), index=index, columns=columns)
+        elif x and x[0] == 'Series':
+            _, index, name, values = x
+            return pd.Series(values, index=index, name=name)
+        else:
+            return tuple([ _unpack_frames(_x) for _x in x ])
+    else:
+        return x
+
+def __timed_run__(run, func, args):
+    if isinstance(func, bytes):
+        func = pickle.loads(func)
+    k, task = args
+    if isinstance(task, bytes):
+        task = pickle.loads(task)
+    counters.collect() # reset
+    t0 = time.time()
+    y = run(func, task)
+    t = time.time() - t0
+    stats = counters.collect()
+    stats['peak_rss'] = counters.peak_rss()
+    return k, t, y, stats
+
+def _group_report(index, groups, costs, elapsed, pickled, worker_stats):
+    report = pd.DataFrame(OrderedDict((
+            ('cells', [ len(group.cells) for group in groups ]),
+            ('translocations', [ sum([ cell.tcount for cell in group.cells.values() ]) \
+                for group in groups ]),
+            ('estimated cost', costs),
+            ('time (s)', elapsed),
+            ('pickled bytes', pickled),
+            )), index=index)
+    for counter in counters.COUNTERS:
+        report[counter] = [ s[counter] for s in worker_stats ]
+    return report
+
+def _print_timing_report(report):
+    report = report[['cells', 'translocations', 'estimated cost', 'time (s)']].copy()
+    report['time per cost unit'] = report['time (s)'] / report['estimated cost']
+    print(report.to_string())
+    if 1 < report.shape[0]:
+        print('correlation between estimated cost and time: {:.3f}'.format(
+            np.corrcoef(report['estimated cost'], report['time (s)'])[0,1]))
+
+def __shared_run__(func, descriptor):
+    from multiprocessing import shared_memory
+    name, offset, size = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        group = pickle.loads(shm.buf[offset:offset+size])
+        group = _SharedGroups.restore(group, shm.buf)
+    finally:
+        shm.close()
+    return _pack_frames(__run__(func, group))
+
+
+def _shared_memory_available():
+    try:
+        from multiprocessing import shared_memory
+    except ImportError: # Python < 3.8
+        return False
+    return True
+
+
+_pool = None
+
+def _get_pool(worker_count, function=None, persistent=False):
+    """
+    Returns a new worker pool, or the persistent worker pool if `persistent` is ``True``.
+
+    The persistent pool is created or recreated if `worker_count` changed, or if
+    `function` cannot be found by the workers.
+    """
+    global _pool
+    if persistent and _pool is not None:
+        if _pool[0] == worker_count and _found_in_workers(function, _pool[2]):
+            return _pool[1]
+        close_pool()
+    if _shared_memory_available():
+        # let the workers share the resource tracker of the parent process,
+        # that is notified when the shared memory blocks are unlinked
+        from multiprocessing import resource_tracker
+        resource_tracker.ensure_running()
+    pool = Pool(worker_count)
+    if persistent:
+        # functions in the main module are pickled by reference and
+        # the workers know only about those defined before they were forked
+        main = sys.modules.get('__main__')
+        _pool = (worker_count, pool, dict(vars(main)) if main is not None else {})
+    return pool
+
+def _found_in_workers(function, main_namespace):
+    """
+    Whether `function` is defined in the main module as it was when the workers were forked.
+    Objects defined in other modules are assumed to be importable by the workers.
+    """
+    if getattr(function, '__module__', None) != '__main__':
+        return True
+    path = getattr(function, '__qualname__', getattr(function, '__name__', '')).split('.')
+    obj = main_namespace.get(path[0])
+    for attr in path[1:]:
+        obj = getattr(obj, attr, None)
+    return obj is function
+
+def close_pool():
+    """
+    Terminates the persistent worker pool used by :meth:`Distributed.run`.
+    """
+    global _pool
+    if _pool is not None:
+        pool = _pool[1]
+        _pool = None
+        pool.terminate()
+        pool.join()
+
+atexit.register(close_pool)
+
+
 FiniteElements = Distributed
 
 
@@ -1435,6 +1992,29 @@ def get_locations(points, index=None, coord_cols=None, get_var=None, get_point=N
     return locations, location_cell, get_point
 
 
+def _translocation_termini(points, delta_cols, trajectory_col, get_var):
+    """
+    Boolean arrays of initial and final locations respectively, with as many elements
+    as rows in `points`.
+
+    If `delta_cols` is not empty, the same array is returned twice
+    (note: the destination cell will be undefined).
+    """
+    if delta_cols:
+        deltas = get_var(points, delta_cols)
+        # fake `final`
+        initial = final = ~np.any(np.isnan(np.asarray(deltas)), axis=1)
+    else:
+        if trajectory_col is None:
+            raise ValueError('cannot find trajectory indices')
+        # trajectory index
+        n = np.asarray(get_var(points, trajectory_col))
+        initial = np.diff(n, axis=0) == 0
+        final = np.r_[False, initial]
+        initial = np.r_[initial, False]
+    return initial, final
+
+
 def get_translocations(points, index=None, coord_cols=None, trajectory_col=True,
         get_var=None, get_point=None):
     """
@@ -1469,26 +2049,12 @@ def get_translocations(points, index=None, coord_cols=None, trajectory_col=True,
     else:
         delta_cols = []
 
+    initial, final = _translocation_termini(points, delta_cols, trajectory_col, get_var)
     if delta_cols:
         # translocation "coordinates"
         deltas = get_var(points, delta_cols)
-        # location coordinates
-        points = get_var(points, coord_cols)
-        # fake `final`
-        initial = final = ~np.any(np.isnan(np.asarray(deltas)), axis=1)#np.ones(points.shape[0], dtype=bool)
-        # note: the destination cell will be undefined
-    else:
-        if trajectory_col is None:
-            raise ValueError('cannot find trajectory indices')
-
-        # trajectory index
-        n = np.asarray(get_var(points, trajectory_col))
-        # point coordinates
-        points = get_var(points, coord_cols)
-
-        initial = np.diff(n, axis=0) == 0
-        final = np.r_[False, initial]
-        initial = np.r_[initial, False]
+    # location coordinates
+    points = get_var(points, coord_cols)
 
     if index is None:
 
@@ -1620,6 +2186,73 @@ def get_translocations(points, index=None, coord_cols=None, trajectory_col=True,
     return initial_point, final_point, initial_cell, final_cell, get_point
 
 
+def _group_by_cell(index, cell_count, termination=None):
+    """
+    Sort the (trans-)locations by cell index.
+
+    Arguments:
+
+        index (numpy.ndarray or pair of numpy.ndarray or sparse matrix):
+            point-cell association (see :class:`~tramway.tessellation.base.CellStats`).
+
+        cell_count (int):
+            number of cells.
+
+        termination (numpy.ndarray):
+            boolean array with as many elements as points; if defined, the returned row
+            indices are positional indices in the subset of points with a ``True`` value,
+            e.g. the initial points of translocations.
+
+    Returns:
+
+        tuple or None:
+            (*rows*, *bounds*) such that the rows associated with cell ``j`` are
+            ``rows[bounds[j]:bounds[j+1]]``, in ascending order;
+            ``None`` if `index` is a sparse matrix.
+
+    """
+    if isinstance(index, np.ndarray):
+        cell = index if termination is None else index[termination]
+        row = np.arange(cell.size)
+    elif isinstance(index, tuple):
+        point, cell = index
+        if termination is None:
+            row = point
+        else:
+            _row = np.full(max(termination.size, np.max(point, initial=-1) + 1), -1, dtype=int)
+            _row[:termination.size][termination] = np.arange(np.sum(termination))
+            row = _row[point]
+    else:
+        return None
+    ok = (0 <= row) & (0 <= cell) & (cell < cell_count)
+    row, cell = row[ok], cell[ok]
+    if isinstance(index, np.ndarray):
+        order = np.argsort(cell, kind='stable')
+    else:
+        # a point may be associated several times with a same cell
+        key = cell.astype(np.int64) * (np.max(row, initial=-1) + 1) + row
+        key, order = np.unique(key, return_index=True)
+    rows, cell = row[order], cell[order]
+    bounds = np.searchsorted(cell, np.arange(cell_count + 1))
+    return rows, bounds
+
+
+def _same_array(a, b):
+    # identity first, as the same index arrays are usually passed again and again
+    if a is b:
+        return True
+    elif a is None or b is None:
+        return False
+    else:
+        return np.array_equal(a, b)
+
+def _get_rows(a, rows):
+    if isinstance(a, pd.DataFrame):
+        return a.iloc[rows]
+    else:
+        return a[rows]
+
+
 def distributed(cells, new_cell=None, new_group=Distributed, fuzzy=None,
         new_cell_kwargs={}, new_group_kwargs={}, fuzzy_kwargs={},
         new=None, include_empty_cells=False, verbose=False):
@@ -1661,6 +2294,10 @@ def distributed(cells, new_cell=None, new_group=Distributed, fuzzy=None,
     `fuzzy` returns an array of booleans or values of any scalar type that can be evaluated logically.
     The returned array contains as many elements as input (trans-)locations.
 
+    If `fuzzy` is not defined, the (trans-)locations are sorted by cell index once
+    instead of being filtered for every cell, unless the point-cell association
+    is a sparse matrix.
+
     """
     if new is not None:
         # `new` is for backward compatibility
@@ -1716,7 +2353,17 @@ def distributed(cells, new_cell=None, new_group=Distributed, fuzzy=None,
             new_cell = Locations
 
     # assign/weight (trans-)locations to cells
+    groups = None
     if fuzzy is None:
+        if are_translocations:
+            delta_cols = coord_cols[1] if has_precomputed_deltas else []
+            termination, _ = _translocation_termini(cells.points, delta_cols, trajectory_col, get_var)
+        else:
+            termination = None
+        groups = _group_by_cell(cells.cell_index, cells.location_count.size, termination)
+        if are_tracked_molecules and groups is not None:
+            trajectory_index = np.asarray(get_var(cells.points, 'n'))[termination]
+    if fuzzy is None and groups is None:
         if are_translocations:
             def f(tessellation, cell, translocations, translocation_cell, get_point):
                 initial_point, final_point = translocations
@@ -1788,16 +2435,24 @@ def distributed(cells, new_cell=None, new_group=Distributed, fuzzy=None,
             continue
 
         # find (trans-)locations for cell j
-        i = fuzzy(cells.tessellation, j, *fuzzy_args, **fuzzy_kwargs)
-        if i.dtype in (bool, np.bool, np.bool8, np.bool_):
-            _fuzzy[j] = None
+        if groups is None:
+            i = fuzzy(cells.tessellation, j, *fuzzy_args, **fuzzy_kwargs)
+            if i.dtype in (bool, np.bool_):
+                _fuzzy[j] = None
+            else:
+                _fuzzy[j] = i[i != 0]
+                i = i != 0
+            select = get_point
         else:
-            _fuzzy[j] = i[i != 0]
-            i = i != 0
+            rows, bounds = groups
+            i = rows[bounds[j]:bounds[j+1]]
+            _fuzzy[j] = None
+            select = _get_rows
 
         if are_translocations:
-            _origin = get_point(initial_point, i)
-            _destination = get_point(final_point, i)
+            _ok = None
+            _origin = select(initial_point, i)
+            _destination = select(final_point, i)
             if has_precomputed_deltas:
                 assert np.all(_origin.index == _destination.index)
                 __origin = _origin
@@ -1805,23 +2460,26 @@ def distributed(cells, new_cell=None, new_group=Distributed, fuzzy=None,
                 __origin = _origin.copy() # make copy
                 __origin.index += 1
                 try:
-                    _ok = np.array([i in _destination.index for i in __origin.index])
-                    _ok &= np.array([i in __origin.index for i in _destination.index])
+                    _ok = np.isin(__origin.index, _destination.index)
+                    _ok &= np.isin(_destination.index, __origin.index)
                 except TypeError:
                     J[j] = False
                     continue
-                _origin = get_point(_origin, _ok)
-                __origin = get_point(__origin, _ok)
-                _destination = get_point(_destination, _ok)
+                if np.all(_ok):
+                    _ok = None
+                else:
+                    _origin = get_point(_origin, _ok)
+                    __origin = get_point(__origin, _ok)
+                    _destination = get_point(_destination, _ok)
             _points = _origin # for convex hull; ideally not only origins
             points = _destination - __origin # translocations
         else:
-            points = _points = get_point(locations, i) # locations
+            points = _points = select(locations, i) # locations
 
         assert not np.any(np.isnan(np.asarray(points)))
 
         # convex hull
-        _points = np.asarray(get_var(_points, space_cols))
+        #_points = np.asarray(get_var(_points, space_cols))
         try:
             hull[j] = cells.tessellation.cell_volume[j]
         except (KeyboardInterrupt, SystemExit):
@@ -1839,7 +2497,10 @@ def distributed(cells, new_cell=None, new_group=Distributed, fuzzy=None,
             J[j] = False
         else:
             if are_tracked_molecules:
-                _trajectory_index = cells.points['n'][_origin.index].values
+                if groups is None or _ok is not None:
+                    _trajectory_index = cells.points['n'][_origin.index].values
+                else:
+                    _trajectory_index = trajectory_index[i]
                 extra[j] = (_origin, _destination, _trajectory_index)
             elif are_translocations:
                 extra[j] = (_origin, _destination)
@@ -2003,6 +2664,22 @@ class DistributeMerge(Distributed):
         assert set(self.cells.keys()) == set(self.adjacency.indices.tolist())
 
 
+def _format_runtime_stats(stats, prefix=''):
+    lines = []
+    l = max(len(k) for k in stats)
+    for k, v in stats.items():
+        if isinstance(v, pd.DataFrame):
+            lines.append('{}{}:'.format(prefix, k))
+            lines += [ prefix * 2 + line for line in v.to_string().split('\n') ]
+            continue
+        if k in ('distribute', 'group', 'optimize', 'merge'):
+            v = '{:.3f}s'.format(v)
+        elif k.endswith('bytes') or k == 'peak_rss':
+            v = '{:.1f}MB'.format(v / 1048576.)
+        lines.append('{}{}:{} {}'.format(prefix, k, ' '*(l-len(k)), v))
+    return '\n'.join(lines)
+
+
 class Maps(Lazy):
     """
     Basic container for maps, posteriors and the associated input parameters used to generate
@@ -2033,6 +2710,7 @@ class Maps(Lazy):
         self.tessellation_param = None # legacy attribute
         self.version = None # legacy attribute
         self.runtime = None
+        self.runtime_stats = None
         self.posteriors = posteriors
 
     @property
@@ -2146,12 +2824,15 @@ class Maps(Lazy):
 
     def __str__(self):
         attrs = { k: v for k, v in self.__dict__.items() if not (k[0] == '_' or v is None) }
+        stats = attrs.pop('runtime_stats', None)
         v = self.features
         if v is not None:
             attrs['features'] = v
         attrs['maps'] = type(self.maps)
         l = max(len(k) for k in attrs)
         s = '\n'.join([ '{}:{} {}'.format(k, ' '*(l-len(k)), str(v)) for k, v in attrs.items() ])
+        if stats:
+            s = '\n'.join((s, 'runtime_stats:', _format_runtime_stats(stats, '    ')))
         return s
 
     def defattr(self, attr, val):
@@ -2304,9 +2985,40 @@ def smooth_infer_init(cells, min_diffusivity=None, jeffreys_prior=None, **kwargs
     return index, reverse_index, n, dt_mean, D_initial, min_diffusivity, D_bounds, border
 
 
+def concat_translocations(cells, index):
+    """
+    Concatenate the translocations of the cells in `index` into flat arrays.
+
+    This is a precomputation step for posteriors that are evaluated for all the cells at once.
+
+    Arguments:
+
+        cells (Distributed): distributed cells.
+
+        index (sequence of ints): cell indices.
+
+    Returns:
+
+    * *dr* (:class:`numpy.ndarray`) -- concatenated translocation vectors, as an NxD matrix.
+    * *dt* (:class:`numpy.ndarray`) -- concatenated translocation durations, as an N-element vector.
+    * *bounds* (:class:`numpy.ndarray`) -- M+1-element vector of offsets in `dr` and `dt`;
+      the translocations of cell ``index[j]`` are ``dr[bounds[j]:bounds[j+1]]``;
+      ``bounds[:-1]`` is suitable as *indices* input argument for :func:`numpy.add.reduceat`.
+
+    """
+    dr = [ cells[i].dr for i in index ]
+    dt = [ cells[i].dt for i in index ]
+    bounds = np.r_[0, np.cumsum([ len(_dt) for _dt in dt ])]
+    if dr:
+        dr, dt = np.concatenate(dr, axis=0), np.concatenate(dt)
+    else:
+        dr, dt = np.zeros((0, cells.dim)), np.zeros(0)
+    return dr, dt, bounds
+
+
 __all__ = ['Local', 'Distributed', 'Cell', 'Locations', 'Translocations', 'Maps',
     'FiniteElement', 'FiniteElements',
     'identify_columns', 'get_locations', 'get_translocations', 'distributed',
     'TrackedMolecules', 'DistributeMerge',
-    'DiffusivityWarning', 'OptimizationWarning', 'smooth_infer_init']
+    'DiffusivityWarning', 'OptimizationWarning', 'smooth_infer_init', 'concat_translocations']
 
@@ -8,11 +8,13 @@ import numpy as np
 from tramway.tessellation.base import point_adjacency_matrix
 
 from .calculate_bayes_factors import (NaNInputError, calculate_bayes_factors,
-                                      calculate_bayes_factors_for_one_cell)
+                                      calculate_bayes_factors_for_one_cell,
+                                      calculate_minimal_ns, lg_bayes_factors)
 from .group_by_sign import group_by_sign
 
 # The package can be imported by just `import bayes_factors`.
-__all__ = ['calculate_bayes_factors', 'calculate_bayes_factors_for_one_cell', 'setup']
+__all__ = ['calculate_bayes_factors', 'calculate_bayes_factors_for_one_cell', 'lg_bayes_factors',
+           'calculate_minimal_ns', 'setup']
 
 
 if sys.version_info < (3, 5):
@@ -44,18 +46,26 @@ def _bayes_factor(cells, B_threshold=None, verbose=True, **kwargs):
     if verbose is not None:
         kwargs['verbose'] = verbose
 
-    # iterate over the cells
-    nan_cells_list = []
-    for key in tqdm(cells):
-        try:
-            calculate_bayes_factors_for_one_cell(cells[key], localization_error, **kwargs)
-        except NaNInputError:
-            nan_cells_list.append(key)
-
-    # Report error if any
-    if len(nan_cells_list) > 0:
-        logging.warn(
-            "A NaN value was present in the input parameters for the following cells: {nan_cells_list}.\nBayes factor calculations were skipped for them".format(nan_cells_list=nan_cells_list))
+    # calculate the Bayes factors for all the cells at once
+    dim = kwargs.get('dim', 2)
+    keys = list(cells.keys())
+
+    def stack(attr, size=None):
+        values = [getattr(cells[key], attr, None) for key in keys]
+        shape = (size,) if size else ()
+        return np.array([np.full(shape, np.nan) if value is None else np.reshape(value, shape)
+                         for value in values], dtype=float)
+
+    bayes_kwargs = {arg: kwargs[arg] for arg in ('dim', 'B_threshold', 'verbose', 'vectorized', 'nb_process')
+                    if arg in kwargs}
+    # the cells may already be processed in a worker process (see `Distributed.run`)
+    bayes_kwargs.setdefault('nb_process', 1)
+    lg_Bs, forces, min_ns = calculate_bayes_factors(
+        zeta_ts=stack('zeta_total', dim), zeta_sps=stack('zeta_spurious', dim), ns=stack('n'),
+        Vs=stack('V'), Vs_pi=stack('V_prior'), loc_error=localization_error, labels=keys, **bayes_kwargs)
+    for key, lg_B, force, min_n in zip(keys, lg_Bs, forces, min_ns):
+        cell = cells[key]
+        cell.lg_B, cell.force, cell.min_n = lg_B, force, min_n
 
     # Group cells by Bayes factor
     group_by_sign(cells=cells, tqdm=tqdm, **kwargs)
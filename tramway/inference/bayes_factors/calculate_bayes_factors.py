@@ -4,14 +4,15 @@
 
 
 import logging
+import multiprocessing as mp
 import warnings
 
-# from multiprocessing import Pool
 import numpy as np
 import scipy.optimize
 from numpy.linalg import norm
 
 from .calculate_marginalized_integral import (calculate_integral_ratio,
+                                              calculate_integral_ratios,
                                               calculate_marginalized_integral)
 from .calculate_posteriors import get_lambda_MAP
 from .convenience_functions import n_pi_func
@@ -22,9 +23,9 @@ from .stopwatch import stopwatch
 
 
 try:
-    from tqdm import trange  # for graphical estimate of the progress
+    from tqdm import tqdm  # for graphical estimate of the progress
 except ImportError:
-    trange = range
+    def tqdm(x, desc=None): return x
 
 
 class NaNInputError(ValueError):
@@ -72,7 +73,7 @@ def calculate_bayes_factors_for_one_cell(cell, loc_error, dim=2, B_threshold=10,
     return [cell.lg_B, cell.force, cell.min_n]
 
 
-def calculate_bayes_factors(zeta_ts, zeta_sps, ns, Vs, Vs_pi, loc_error, dim=2, B_threshold=10, verbose=True):
+def calculate_bayes_factors(zeta_ts, zeta_sps, ns, Vs, Vs_pi, loc_error, dim=2, B_threshold=10, verbose=True, vectorized=True, nb_process=None, labels=None):
     """
     Calculate the Bayes factor for a set of bins given a uniform localization error.
 
@@ -84,7 +85,12 @@ def calculate_bayes_factors(zeta_ts, zeta_sps, ns, Vs, Vs_pi, loc_error, dim=2,
     Vs_pi --- jump variance in all other bins relative to the current bin. Size: M x 1,
     loc_error --- localization error. Same units as variance. Set to 0 if localization error can be ignored;
     dim --- dimensionality of the problem;
-    B_threshold --- the values of Bayes factor for thresholding.
+    B_threshold --- the values of Bayes factor for thresholding;
+    vectorized --- evaluate all the bins at once with fixed-order quadrature (see `calculate_integral_ratios`).
+    The bins for which the quadrature does not converge are calculated with adaptive integration.
+    If False, all the bins are calculated with adaptive integration;
+    nb_process --- number of worker processes for the adaptive integration. None for all the CPUs, 1 to run in the current process;
+    labels --- names of the bins in the warning about NaN input values. Size: M. Default: the bin indices.
 
     Output:
     Bs, forces, min_ns
@@ -99,14 +105,8 @@ def calculate_bayes_factors(zeta_ts, zeta_sps, ns, Vs, Vs_pi, loc_error, dim=2,
     """
     check_dimensionality(dim)
 
-    if verbose:
-        def _trange(x): return trange(x, desc='Bayes factor calculation')
-    else:
-        _trange = range
-
     # Convert to numpy
-    vars = [zeta_ts, zeta_sps, Vs, Vs_pi, ns]
-    vars = map(np.asarray, vars)
+    zeta_ts, zeta_sps, ns, Vs, Vs_pi = map(np.asarray, [zeta_ts, zeta_sps, ns, Vs, Vs_pi])
 
     # Check that the 2nd dimension has size 2
     if np.shape(zeta_ts)[1] != 2 or np.shape(zeta_sps)[1] != 2:
@@ -115,30 +115,198 @@ def calculate_bayes_factors(zeta_ts, zeta_sps, ns, Vs, Vs_pi, loc_error, dim=2,
     M = len(ns)
 
     # Calculate
-    lg_Bs = np.zeros_like(ns) * np.nan
-    forces = np.zeros_like(ns) * np.nan
-    min_ns = np.zeros_like(ns, dtype=int) * np.nan
+    lg_Bs = np.full(np.shape(ns), np.nan)
+    forces = np.full(np.shape(ns), np.nan)
+    min_ns = np.full(np.shape(ns), np.nan)
     nan_cells_list = []
     with stopwatch("Bayes factor calculation", verbose):
-        for i in _trange(M):
-            lg_Bs[i], forces[i], min_ns[i] = _calculate_one_bayes_factor(
-                zeta_ts[i, :], zeta_sps[i, :], ns[i], Vs[i], Vs_pi[i], loc_error, dim)
-            try:
-                lg_Bs[i], forces[i], min_ns[i] = _calculate_one_bayes_factor(
-                    zeta_ts[i, :], zeta_sps[i, :], ns[i], Vs[i], Vs_pi[i], loc_error, dim)
-            except NaNInputError:
-                nan_cells_list.append(i)
+        if vectorized:
+            n, V, V_pi = [np.reshape(x, M).astype(float) for x in (ns, Vs, Vs_pi)]
+            nan_cells = np.isnan(zeta_ts).any(axis=1) | np.isnan(zeta_sps).any(axis=1) \
+                | np.isnan(n) | np.isnan(V) | np.isnan(V_pi) | bool(np.isnan(loc_error))
+            nan_cells_list = list(np.flatnonzero(nan_cells))
+            bins = np.flatnonzero(~nan_cells)
+            lg_B, force, min_n, converged = _calculate_bayes_factors_vectorized(
+                zeta_ts[bins], zeta_sps[bins], n[bins], V[bins], V_pi[bins], loc_error, dim, B_threshold)
+            lg_Bs.flat[bins], forces.flat[bins], min_ns.flat[bins] = lg_B, force, min_n
+            remaining = bins[~converged]
+        else:
+            remaining = np.arange(M)
+
+        if len(remaining):
+            if verbose:
+                logging.info("Adaptive integration for {} bins".format(len(remaining)))
+            tasks = [(zeta_ts[i, :], zeta_sps[i, :], ns[i], Vs[i], Vs_pi[i], loc_error, dim, B_threshold)
+                     for i in remaining]
+            if verbose:
+                tasks = tqdm(tasks, desc='Bayes factor calculation')
+            if nb_process == 1 or len(remaining) == 1:
+                results = list(map(_calculate_one_bayes_factor_or_nan, tasks))
+            else:
+                with mp.Pool(nb_process) as pool:
+                    results = list(pool.imap(_calculate_one_bayes_factor_or_nan, tasks))
+            for i, result in zip(remaining, results):
+                if result is None:
+                    nan_cells_list.append(i)
+                else:
+                    lg_Bs.flat[i], forces.flat[i], min_ns.flat[i] = result
 
         # Report error if any
-        try:
-            logging.warn(
+        if nan_cells_list:
+            nan_cells_list = sorted(nan_cells_list)
+            if labels is not None:
+                nan_cells_list = [labels[i] for i in nan_cells_list]
+            logging.warning(
                 "A NaN value was present in the input parameters for the following cells: {nan_cells_list}.\nBayes factor calculations were skipped for them".format(nan_cells_list=nan_cells_list))
-        except NameError:
-            pass
 
         return [lg_Bs, forces, min_ns]
 
 
+def _calculate_one_bayes_factor_or_nan(args):
+    """Adaptive calculation of the Bayes factor for one bin, in a worker process."""
+    zeta_t, zeta_sp, n, V, V_pi, loc_error, dim, B_threshold = args
+    try:
+        return _calculate_one_bayes_factor(zeta_t, zeta_sp, n, V, V_pi, loc_error, dim, B_threshold=B_threshold)
+    except NaNInputError:
+        return None
+
+
+def _calculate_bayes_factors_vectorized(zeta_ts, zeta_sps, ns, Vs, Vs_pi, loc_error, dim, B_threshold=10):
+    """
+    Calculate the Bayes factors and minimal numbers of jumps for all the bins at once.
+
+    Input:
+    zeta_ts, zeta_sps --- arrays of size M x 2,
+    ns, Vs, Vs_pi --- arrays of size M, with no NaN values.
+
+    Output:
+    lg_Bs, forces, min_ns, converged
+
+    converged --- boolean array of size M, False for the bins whose values should be calculated
+    with `_calculate_one_bayes_factor` instead.
+    """
+    lg_Bs, converged = lg_bayes_factors(zeta_ts, zeta_sps, ns, Vs, Vs_pi, loc_error, dim)
+
+    lg_B_threshold = np.log10(B_threshold)
+    forces = 1 * (lg_Bs >= lg_B_threshold) - 1 * (lg_Bs <= -lg_B_threshold)
+
+    min_ns, converged_n = calculate_minimal_ns(zeta_ts, zeta_sps, ns, Vs, Vs_pi, loc_error, dim, B_threshold,
+                                               lg_Bs=lg_Bs)
+
+    return lg_Bs, forces, min_ns, converged & converged_n
+
+
+def lg_bayes_factors(zeta_ts, zeta_sps, ns, Vs, Vs_pi, loc_error, dim=2):
+    """
+    Calculate the log_10 Bayes factors for all the bins at once.
+
+    Vectorized counterpart of the Bayes factor part of `_calculate_one_bayes_factor`, with fixed-order
+    quadrature instead of adaptive integration.
+
+    Input:
+    zeta_ts, zeta_sps --- arrays of size M x 2,
+    ns, Vs, Vs_pi --- arrays of size M,
+    loc_error --- localization error, as in `calculate_bayes_factors`.
+
+    Output:
+    lg_Bs --- log_10 Bayes factor values. Size: M,
+    converged --- boolean array of size M, False where the quadrature did not converge.
+    """
+    # Parameter combinations
+    n_pi = n_pi_func(dim)
+    p = pow(ns, dim)
+    u = Vs_pi / Vs
+    v = 1.0 + n_pi / ns * u
+    eta = np.sqrt(n_pi / (ns + n_pi))
+
+    if loc_error > 0:
+        rel_loc_error = ns * Vs / (4 * loc_error)
+    else:
+        rel_loc_error = np.inf
+
+    ln_Bs, converged = calculate_integral_ratios(zeta_ts, zeta_sps, pow=p, v=v, E_up=eta**2, E_down=1.0,
+                                                 rel_loc_error=rel_loc_error)
+    lg_Bs = ln_Bs / np.log(10) + dim * np.log10(eta)
+
+    return lg_Bs, converged
+
+
+def calculate_minimal_ns(zeta_ts, zeta_sps, n0s, Vs, Vs_pi, loc_error, dim=2, B_threshold=10, lg_Bs=None):
+    """
+    Calculate the minimal number of jumps per bin needed to obtain strong evidence for the active force or the spurious force model, for all the bins at once.
+
+    Vectorized counterpart of `calculate_minimal_n`. The search interval is found the same way for all bins,
+    and the minimal number of jumps is located by bisection over the integers.
+
+    Input:
+    zeta_ts, zeta_sps --- arrays of size M x 2,
+    n0s --- initial numbers of jumps. Size: M,
+    Vs, Vs_pi --- arrays of size M,
+    lg_Bs --- log_10 Bayes factors at n0s, if already calculated.
+
+    Output:
+    min_ns --- minimal numbers of jumps, NaN where no strong evidence could be found. Size: M,
+    converged --- boolean array of size M, False where the quadrature did not converge for any of the evaluated numbers of jumps.
+    """
+    # Local constants
+    increase_factor = 2  # initial search interval increase with each iteration
+    max_attempts = 40
+
+    lg_B_threshold = abs(np.log10(B_threshold))
+
+    converged = np.ones(len(n0s), dtype=bool)
+
+    def lg_B(bins, ns):
+        lg_Bs, _converged = lg_bayes_factors(
+            zeta_ts[bins], zeta_sps[bins], ns, Vs[bins], Vs_pi[bins], loc_error, dim)
+        converged[bins[~_converged]] = False
+        return lg_Bs
+
+    all_bins = np.arange(len(n0s))
+    if lg_Bs is None:
+        lg_Bs = lg_B(all_bins, n0s)
+
+    min_ns = np.full(len(n0s), np.nan)
+    found = lg_B_threshold <= np.abs(lg_Bs)
+    min_ns[found] = n0s[found]
+
+    # Find the initial search intervals
+    lower, upper = np.array(n0s, dtype=float), np.full(len(n0s), np.nan)
+    sign = np.zeros(len(n0s))
+    bins = all_bins[~found]
+    for attempt in range(1, max_attempts):
+        if bins.size == 0:
+            break
+        ns = n0s[bins] - 1 + increase_factor ** attempt
+        _lg_Bs = lg_B(bins, ns)
+        _found = lg_B_threshold <= np.abs(_lg_Bs)
+        upper[bins[_found]] = ns[_found]
+        sign[bins[_found]] = np.sign(_lg_Bs[_found])
+        lower[bins[~_found]] = ns[~_found]
+        bins = bins[~_found]
+
+    if bins.size:
+        logging.warning(
+            "Unable to find the minimal number of data points to provide strong evidence in {} bins".format(bins.size))
+
+    # Find the minimal number of jumps by bisection
+    bins = all_bins[~found & ~np.isnan(upper)]
+    lower[bins], upper[bins] = np.floor(lower[bins]), np.ceil(upper[bins])
+    while True:
+        bins = bins[1 < upper[bins] - lower[bins]]
+        if bins.size == 0:
+            break
+        ns = np.floor((lower[bins] + upper[bins]) / 2)
+        _found = lg_B_threshold <= sign[bins] * lg_B(bins, ns)
+        upper[bins[_found]] = ns[_found]
+        lower[bins[~_found]] = ns[~_found]
+
+    bins = ~found & ~np.isnan(upper)
+    min_ns[bins] = upper[bins]
+
+    return min_ns, converged
+
+
 def _calculate_one_bayes_factor(zeta_t, zeta_sp, n, V, V_pi, loc_error, dim, B_threshold=10, bl_need_min_n=True):
     """Calculate the Bayes factor for one bin."""
 
@@ -263,7 +431,7 @@ def calculate_minimal_n(zeta_t, zeta_sp, n0, V, V_pi, loc_error, dim=2, B_thresh
         return lg_B(n) - sign * lg_B_threshold
 
     min_n = scipy.optimize.brentq(solve_me, n_interval[0], n_interval[1], xtol=xtol, rtol=rtol)
-    min_n = np.int(np.ceil(min_n))
+    min_n = int(np.ceil(min_n))
 
     return min_n
 
@@ -7,7 +7,7 @@ import logging
 import numpy as np
 from numpy import exp, log
 from scipy import integrate
-from scipy.special import gamma, gammainc, gammaln
+from scipy.special import gamma, gammainc, gammaln, hyp1f1, logsumexp
 
 # Constants
 
@@ -231,6 +231,135 @@ def calculate_integral_ratio(arg_func_up, arg_func_down, pow_up, pow_down, v, re
     return log_res
 
 
+def calculate_integral_ratios(zeta_t, zeta_sp, pow, v, E_up, E_down, rel_loc_error, order=16, rtol=1e-6, max_size=1 << 22):
+    """
+    Vectorized counterpart of `calculate_integral_ratio` for the marginalized lambda convention.
+    Calculate for M bins at once the ratio of the lambda integrals
+    \int_0^1 d\lambda arg(\lambda)**(-pow) * gammainc(pow, rel_loc_error * arg(\lambda)),
+    with arg(\lambda) = v + E * |zeta_t - \lambda * zeta_sp|**2 and E = E_up upstairs, E = E_down downstairs.
+
+    The integrals are calculated with fixed-order Gauss-Legendre quadrature on subintervals delimited by
+    the break points zeta_t / zeta_sp, the maximum of the integrand and points at geometrically increasing
+    distances from this maximum, scaled by the width of the peak.
+    The result is compared with a quadrature of half the order on the same subintervals.
+
+    Input:
+    zeta_t, zeta_sp --- signal-to-noise ratios. Size: M x dim,
+    pow, v, E_up, E_down, rel_loc_error --- scalars or arrays of size M. rel_loc_error = inf if the localization error is 0,
+    order --- number of quadrature nodes per subinterval,
+    rtol --- maximum relative difference between the two quadratures,
+    max_size --- maximum number of quadrature nodes evaluated at once; bins are processed in chunks.
+
+    Return:
+    log_res --- natural logarithm of the integral ratios. Size: M,
+    converged --- boolean array of size M, False where the quadrature cannot be trusted
+    and the adaptive `calculate_integral_ratio` should be used instead.
+    """
+    zeta_t, zeta_sp = np.atleast_2d(zeta_t, zeta_sp)
+    M = zeta_t.shape[0]
+    pow, v, E_up, E_down, rel_loc_error = [np.broadcast_to(np.asarray(a, dtype=float), (M,))
+                                           for a in (pow, v, E_up, E_down, rel_loc_error)]
+
+    log_res = np.full(M, np.nan)
+    converged = np.zeros(M, dtype=bool)
+    chunk = max(1, max_size // (len(_peak_offsets) + 2 * zeta_t.shape[1] + 1) // (order + order // 2))
+    for start in range(0, M, chunk):
+        bins = slice(start, min(start + chunk, M))
+        ln_up, ok_up = _ln_integrals(zeta_t[bins], zeta_sp[bins], pow[bins], v[bins], E_up[bins],
+                                     rel_loc_error[bins], order, rtol)
+        ln_down, ok_down = _ln_integrals(zeta_t[bins], zeta_sp[bins], pow[bins], v[bins], E_down[bins],
+                                         rel_loc_error[bins], order, rtol)
+        log_res[bins] = ln_up - ln_down
+        converged[bins] = ok_up & ok_down & (pow[bins] > 0)
+    return log_res, converged
+
+
+# Subinterval boundaries around the integrand peak, in units of the peak width
+_peak_offsets = np.array([-32., -16., -8., -4., -2., -1., 0., 1., 2., 4., 8., 16., 32.])
+
+_gauss_legendre_rules = {}
+
+
+def _gauss_legendre(order):
+    try:
+        return _gauss_legendre_rules[order]
+    except KeyError:
+        rule = _gauss_legendre_rules[order] = np.polynomial.legendre.leggauss(order)
+        return rule
+
+
+def _ln_integrals(zeta_t, zeta_sp, pow, v, E, rel_loc_error, order, rtol):
+    """
+    Natural logarithm of \int_0^1 d\lambda arg(\lambda)**(-pow) * gammainc(pow, rel_loc_error * arg(\lambda))
+    for each bin, with arg(\lambda) = v + E * (c - 2 * b * \lambda + a * \lambda**2).
+    See `calculate_integral_ratios`.
+    """
+    a = np.sum(zeta_sp * zeta_sp, axis=1)
+    b = np.sum(zeta_t * zeta_sp, axis=1)
+    c = np.sum(zeta_t * zeta_t, axis=1)
+
+    def arg(l):
+        return v + E * np.maximum(c - 2 * b * l + a * l * l, 0)
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        # Location of the maximum of the integrand in [0, 1], and its width
+        flat = a <= 0
+        l_peak = np.clip(np.where(flat, .5, b / a), 0., 1.)
+        q = arg(l_peak)
+        width = np.sqrt(q / (2 * pow * E * a))
+        # If the maximum lies at a bound, the integrand decays exponentially away from it
+        decay = q / (pow * E * np.abs(2 * a * l_peak - 2 * b))
+        width = np.fmin(width, decay)
+        width[flat | ~(width > 0)] = 1.
+        break_points = np.concatenate((
+            np.zeros((len(a), 1)),
+            np.ones((len(a), 1)),
+            zeta_t / zeta_sp,
+            l_peak[:, np.newaxis] + width[:, np.newaxis] * _peak_offsets,
+        ), axis=1)
+    break_points[np.isnan(break_points)] = 0.
+    break_points = np.sort(np.clip(break_points, 0., 1.), axis=1)
+    lower, upper = break_points[:, :-1], break_points[:, 1:]
+    half_length = (upper - lower)[..., np.newaxis] / 2
+    center = (upper + lower)[..., np.newaxis] / 2
+
+    a, b, c, pow, v, E, rel_loc_error = [x[:, np.newaxis, np.newaxis]
+                                         for x in (a, b, c, pow, v, E, rel_loc_error)]
+    ln_integrals = []
+    underflow = np.zeros(len(lower), dtype=bool)
+    for n_nodes in (order, order // 2):
+        nodes, weights = _gauss_legendre(n_nodes)
+        l = center + half_length * nodes
+        q = arg(l)
+        with np.errstate(divide='ignore'):
+            ln_gammainc = _ln_gammainc(pow, q * rel_loc_error)
+            ln_weights = np.log(half_length * weights)
+        underflow |= np.any(np.isneginf(ln_gammainc) & (half_length > 0), axis=(1, 2))
+        ln_integrals.append(logsumexp(ln_weights - pow * np.log(q) + ln_gammainc, axis=(1, 2)))
+
+    ln_integral, ln_integral_coarse = ln_integrals
+    converged = np.isfinite(ln_integral) & ~underflow & (np.abs(ln_integral - ln_integral_coarse) <= rtol)
+    return ln_integral, converged
+
+
+def _ln_gammainc(a, x):
+    """
+    Natural logarithm of the normalized lower incomplete gamma function.
+    Where the function underflows, use the series
+    gammainc(a, x) = x**a * exp(-x) / Gamma(a + 1) * 1F1(1; a + 1; x).
+    """
+    a, x = np.broadcast_arrays(a, x)
+    res = np.array(gammainc(a, x), dtype=float)
+    small = res < 1e-300
+    with np.errstate(divide='ignore'):
+        np.log(res, out=res)
+    if np.any(small):
+        a, x = a[small], x[small]
+        with np.errstate(divide='ignore'):
+            res[small] = a * np.log(x) - x - gammaln(a + 1) + np.log(hyp1f1(1, a + 1, x))
+    return res
+
+
 def sum_series(term_func, rtol, *args):
     """Sum any series with the first argument of the term_func being the term number.
     Input: function, return - float
@@ -6,6 +6,7 @@
 import logging
 import math
 import unittest
+from unittest import mock
 from multiprocessing import freeze_support
 
 import numpy as np
@@ -201,6 +202,68 @@ class bayes_test(unittest.TestCase):
             self.assertTrue(true_forces == forces[i],
                             "For bin %i, the boolean force prediction (%r) did not correspond to expected value (%r)" % (i, true_Bs[i] >= self.B_threshold, forces[i]))
 
+    def test_vectorized_bayes_factors(self):
+        """
+        Test that the vectorized calculation agrees with the adaptive integration bin by bin.
+        """
+        zeta_ts = np.asarray([[0.7, 0.4], [-1.0, 2.3], [-1.1, -0.33], [0.05, 0.02], [np.nan, 0.1]])
+        zeta_sps = np.asarray([[0.8, 0.6], [-0.45, 0.67], [6.32, 0.115], [0.01, -0.2], [0.2, 0.1]])
+        ns = np.asarray([[20, 100, 3, 50, 10]]).T
+        Vs = np.asarray([[0.8 ** 2.0, 1.25 ** 2.0, 0.3 ** 2.0, 0.5 ** 2.0, 1.0]]).T
+        Vs_pi = np.asarray([[0.95, 8.7, 2.45, 1.2, 1.0]]).T * Vs
+        for loc_error in [0.1**2.0, 0]:
+            lg_Bs, forces, min_ns = calculate_bayes_factors(
+                zeta_ts=zeta_ts, zeta_sps=zeta_sps, ns=ns, Vs=Vs, Vs_pi=Vs_pi, loc_error=loc_error,
+                verbose=False)
+            true_lg_Bs, true_forces, true_min_ns = calculate_bayes_factors(
+                zeta_ts=zeta_ts, zeta_sps=zeta_sps, ns=ns, Vs=Vs, Vs_pi=Vs_pi, loc_error=loc_error,
+                verbose=False, vectorized=False, nb_process=1)
+
+            self.assertTrue(np.allclose(lg_Bs, true_lg_Bs, rtol=1e-6, equal_nan=True),
+                            "Vectorized Bayes factors %s do not match %s" % (lg_Bs, true_lg_Bs))
+            self.assertTrue(np.array_equal(forces, true_forces, equal_nan=True))
+            # the adaptive search stops within 1 jump of the minimal number of jumps
+            self.assertTrue(np.allclose(min_ns, true_min_ns, atol=1, equal_nan=True),
+                            "Vectorized minimal ns %s do not match %s" % (min_ns, true_min_ns))
+
+    def test_nan_labels(self):
+        """
+        Test that the bins with NaN input values are reported by label.
+        """
+        zeta_ts = np.asarray([[0.7, 0.4], [np.nan, 0.1], [0.05, 0.02]])
+        zeta_sps = np.asarray([[0.8, 0.6], [0.2, 0.1], [0.01, -0.2]])
+        ns = np.asarray([[20, 10, 50]]).T
+        Vs = np.asarray([[0.8 ** 2.0, 1.0, 0.5 ** 2.0]]).T
+        Vs_pi = np.asarray([[0.95, 1.0, 1.2]]).T * Vs
+        for vectorized in [True, False]:
+            with self.assertLogs(level='WARNING') as logs:
+                calculate_bayes_factors(
+                    zeta_ts=zeta_ts, zeta_sps=zeta_sps, ns=ns, Vs=Vs, Vs_pi=Vs_pi, loc_error=0.1**2.0,
+                    verbose=False, vectorized=vectorized, nb_process=1, labels=[4, 7, 9])
+            self.assertIn("cells: [7]", logs.output[0])
+
+    def test_plugin_nb_process(self):
+        """
+        Test that the plugin runs the adaptive integration in the current process by default.
+        """
+        from . import _bayes_factor
+        captured = {}
+
+        def calculate(**kwargs):
+            captured.update(kwargs)
+            raise StopIteration
+
+        class Cells(dict):
+            def get_localization_error(self, kwargs):
+                return 0.1**2.0
+
+        with mock.patch(__package__ + '.calculate_bayes_factors', calculate):
+            for kwargs, nb_process in [({}, 1), ({'nb_process': 2}, 2)]:
+                with self.assertRaises(StopIteration):
+                    _bayes_factor(Cells({3: object(), 5: object()}), verbose=False, **kwargs)
+                self.assertEqual(captured['nb_process'], nb_process)
+                self.assertEqual(captured['labels'], [3, 5])
+
     def test_minimal_n(self):
         """
         Test calculations of the minimal number of jumps per bin to produce strong evidence.
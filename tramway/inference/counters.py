@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2020, Institut Pasteur
+#   Contributor: François Laurent
+
+# This file is part of the TRamWAy software available at
+# "https://github.com/DecBayComp/TRamWAy" and is distributed under
+# the terms of the CeCILL license as circulated at the following URL
+# "http://www.cecill.info/licenses.en.html".
+
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+"""
+Per-process counters for the inference modes.
+
+The inference modes report the number of evaluations of their posterior and gradient
+and the number of iterations of the optimizer with :func:`count` or
+:func:`record_optimization`.
+:meth:`~tramway.inference.base.Distributed.run` collects the counters in each worker
+process, and the :mod:`~tramway.helper.inference` helper attaches them to the resulting
+:class:`~tramway.inference.base.Maps` object as attribute `runtime_stats`.
+"""
+
+from collections import Counter, OrderedDict
+import sys
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+
+COUNTERS = ('posterior_evaluations', 'gradient_evaluations', 'iterations')
+
+_counters = Counter()
+
+
+def count(counter, n=1):
+    """
+    Increments a counter.
+
+    Arguments:
+
+        counter (str): any of '*posterior_evaluations*', '*gradient_evaluations*',
+            '*iterations*'.
+
+        n (int): increment.
+
+    """
+    _counters[counter] += int(n)
+
+def record_optimization(result):
+    """
+    Increments the counters with the numbers of evaluations and iterations reported by
+    an optimizer.
+
+    Arguments:
+
+        result (scipy.optimize.OptimizeResult or BFGSResult):
+            output of :func:`scipy.optimize.minimize` or
+            :func:`~tramway.inference.optimization.minimize_sparse_bfgs`.
+
+    """
+    # scipy.optimize.OptimizeResult
+    nfev = getattr(result, 'nfev', None)
+    njev = getattr(result, 'njev', None)
+    nit = getattr(result, 'nit', None)
+    # tramway.inference.optimization.BFGSResult
+    if nfev is None:
+        nfev = getattr(result, 'ncalls', None)
+        if isinstance(nfev, (tuple, list)):
+            # one entry per iteration
+            nfev = sum(nfev)
+    if nit is None:
+        nit = getattr(result, 'niter', None)
+    if nfev:
+        count('posterior_evaluations', nfev)
+    if njev:
+        count('gradient_evaluations', njev)
+    if nit:
+        count('iterations', nit)
+
+def collect(reset=True):
+    """
+    Returns the counters of the current process.
+
+    Arguments:
+
+        reset (bool): reset the counters to zero.
+
+    Returns:
+
+        OrderedDict: counter values, with keys as in `COUNTERS`.
+
+    """
+    counters = OrderedDict([ (counter, _counters[counter]) for counter in COUNTERS ])
+    if reset:
+        _counters.clear()
+    return counters
+
+def peak_rss():
+    """
+    Peak resident set size of the current process, in bytes.
+
+    Returns ``None`` if the :mod:`resource` module is not available.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        rss *= 1024 # kilobytes on Linux
+    return rss
+
+
+__all__ = ['COUNTERS', 'count', 'record_optimization', 'collect', 'peak_rss']
+
@@ -13,6 +13,7 @@
 
 
 from .base import *
+from .counters import count, record_optimization
 from warnings import warn
 from math import pi, log
 import numpy as np
@@ -26,7 +27,8 @@ setup = {'name':    'degraded.d',
         'arguments': OrderedDict((
         ('localization_error',  ('-e', dict(type=float, help='localization precision (see also sigma; default is 0.03)'))),
         ('jeffreys_prior',      ('-j', dict(action='store_true', help="Jeffreys' prior"))),
-        ('min_diffusivity',     dict(type=float, help='minimum diffusivity value allowed')))),
+        ('min_diffusivity',     dict(type=float, help='minimum diffusivity value allowed')),
+        ('vectorized',      dict(action='store_true', help='solve the single-cell problems for all the cells at once')))),
         'cell_sampling':    'individual'}
 
 
@@ -69,10 +71,15 @@ def d_neg_posterior(diffusivity, cell, sigma2, jeffreys_prior, dt_mean, \
     return d_neg_posterior
 
 
-def infer_D(cells, localization_error=None, jeffreys_prior=False, min_diffusivity=None, **kwargs):
+def infer_D(cells, localization_error=None, jeffreys_prior=False, min_diffusivity=None,
+        vectorized=False, **kwargs):
     if isinstance(cells, Distributed): # multiple cells
         localization_error = cells.get_localization_error(kwargs, 0.03, True, \
                 localization_error=localization_error)
+        if vectorized:
+            index, D, _ = degraded_posterior_vectorized(cells, localization_error,
+                    jeffreys_prior, min_diffusivity, xtol=kwargs.get('tol') or 1e-8)
+            return pd.DataFrame({'diffusivity': D}, index=index)
         args = (localization_error, jeffreys_prior, min_diffusivity)
         inferred = { i: infer_D(c, *args, **kwargs) for i, c in cells.items() }
         inferred = pd.DataFrame({'diffusivity': pd.Series(inferred)})
@@ -106,6 +113,164 @@ def infer_D(cells, localization_error=None, jeffreys_prior=False, min_diffusivit
         result = minimize(d_neg_posterior, D_initial, \
             args=(cell, localization_error, jeffreys_prior, dt_mean, min_diffusivity), \
             **kwargs)
+        record_optimization(result)
         # return the resulting optimal diffusivity value
         return result.x[0]
 
+
+
+def degraded_posterior_vectorized(cells, sigma2, jeffreys_prior=False, min_diffusivity=None,
+        drift=None, xtol=1e-8, max_iter=200):
+    """
+    Minimize the single-cell posteriors of the *degraded* modes for all the cells at once.
+
+    The translocations of all the cells are concatenated (see
+    :func:`~tramway.inference.base.concat_translocations`).
+    For a given diffusivity, the optimal drift has a closed form (weighted least
+    squares), hence every cell reduces to finding a zero of the derivative of the
+    posterior with respect to the diffusivity.
+    The zeros are bracketed for each cell and refined with the Illinois variant of
+    the *regula falsi*; cells that have converged are left out of further evaluations.
+
+    Arguments:
+
+        cells (Distributed): distributed cells.
+
+        sigma2 (float): localization error (squared).
+
+        jeffreys_prior (bool): Jeffreys' prior.
+
+        min_diffusivity (float or bool): lower bound on the diffusivity;
+            if ``None``, a bound is derived from `sigma2`;
+            if ``False``, the diffusivity is only kept in the domain of the posterior.
+
+        drift (str): either ``None`` (*degraded.d*), ``'drift'`` (*degraded.ddrift*)
+            or ``'force'`` (*degraded.df*).
+
+        xtol (float): relative tolerance on the diffusivity.
+
+        max_iter (int): maximum number of iterations.
+
+    Returns:
+
+        tuple: (*cell indices* as a list, *diffusivity* as a vector,
+            *drift* or *force* as a matrix or ``None``).
+
+    """
+    index = list(cells.keys())
+    dr, dt, bounds = concat_translocations(cells, index)
+    # sanity checks
+    n = np.diff(bounds)
+    if not index or np.any(n == 0):
+        raise ValueError('empty cell')
+    if dr.shape[1] == 0:
+        raise ValueError('translocation array has no column')
+    if dt.shape[1:]:
+        raise ValueError('time deltas are structured in multiple dimensions')
+    # ensure that translocations are properly oriented in time
+    negative = dt < 0
+    if np.any(negative):
+        warn('translocation dts are not all positive', RuntimeWarning)
+        dr[negative] *= -1.
+        dt[negative] *= -1.
+    m = len(index)
+    cell_of = np.repeat(np.arange(m), n)
+    starts = bounds[:-1]
+    def cell_sum(x, active, selected):
+        return np.bincount(cell_of[selected], weights=x, minlength=m)[active].astype(float)
+    dt_mean = np.add.reduceat(dt, starts) / n
+    dr2 = np.sum(dr * dr, axis=1)
+    D_initial = np.add.reduceat(dr2, starts) / (n * dr.shape[1]) / (2. * dt_mean)
+    # lower bound
+    if min_diffusivity is None or min_diffusivity is False:
+        D_min = (1e-16 - sigma2) / np.maximum.reduceat(dt, starts)
+    else:
+        D_min = np.full(m, float(min_diffusivity))
+    if drift == 'force' and jeffreys_prior:
+        # the prior is not defined for non-positive diffusivities
+        D_min = np.maximum(D_min, np.finfo(float).eps * D_initial)
+
+    def optimal_drift(D, active, selected):
+        """drift that minimizes the posterior for diffusivity `D`"""
+        w = dt[selected] / (D[cell_of[selected]] * dt[selected] + sigma2)
+        num = np.stack([ cell_sum(w * dr[selected,k], active, selected) \
+                for k in range(dr.shape[1]) ], axis=1)
+        return num / cell_sum(w * dt[selected], active, selected)[:,np.newaxis]
+
+    def neg_posterior_derivative(D, active):
+        """derivative of the negative log-posterior with respect to the diffusivity"""
+        count('gradient_evaluations', np.count_nonzero(active))
+        selected = active[cell_of]
+        _dt = dt[selected]
+        denominator = D[cell_of[selected]] * _dt + sigma2
+        if drift:
+            V = np.zeros((m, dr.shape[1]))
+            V[active] = optimal_drift(D, active, selected)
+            residual = dr[selected] - _dt[:,np.newaxis] * V[cell_of[selected]]
+            _dr2 = np.sum(residual * residual, axis=1)
+        else:
+            _dr2 = dr2[selected]
+        g = cell_sum(_dt / denominator * (1. - _dr2 / (4. * denominator)), active, selected)
+        if jeffreys_prior:
+            _D, _dt_mean = D[active], dt_mean[active]
+            g += 2. * _dt_mean / (_D * _dt_mean + sigma2)
+            if drift == 'force':
+                g -= 2. / _D
+        return g
+
+    # start from the initial diffusivity, as the single-cell procedure does
+    D = np.maximum(D_initial, D_min)
+    g = neg_posterior_derivative(D, np.ones(m, dtype=bool))
+    lower, upper = D.copy(), D.copy()
+    g_lower, g_upper = g.copy(), g.copy()
+    # bracket the zeros, upwards...
+    expanding = g < 0
+    for _ in range(max_iter):
+        if not np.any(expanding):
+            break
+        lower[expanding], g_lower[expanding] = upper[expanding], g_upper[expanding]
+        upper[expanding] = 2. * upper[expanding] - D_min[expanding] + D_initial[expanding]
+        g_upper[expanding] = neg_posterior_derivative(upper, expanding)
+        expanding &= g_upper <= 0
+    # ...or downwards, towards the lower bound
+    shrinking = (0 < g) & (D_min < D)
+    for _ in range(max_iter):
+        if not np.any(shrinking):
+            break
+        upper[shrinking], g_upper[shrinking] = lower[shrinking], g_lower[shrinking]
+        lower[shrinking] = .5 * (D_min[shrinking] + upper[shrinking])
+        g_lower[shrinking] = neg_posterior_derivative(lower, shrinking)
+        shrinking &= (0 < g_lower) & (xtol * np.abs(lower) < lower - D_min)
+    # the lower bound is the solution wherever the posterior increases from there
+    at_bound = 0 < g_lower
+    D[at_bound] = D_min[at_bound]
+    active = (g_lower < 0) & (0 < g_upper)
+    # refine
+    side = np.zeros(m, dtype=int)
+    for _ in range(max_iter):
+        if not np.any(active):
+            break
+        count('iterations')
+        a = active
+        D[a] = upper[a] - g_upper[a] * (upper[a] - lower[a]) / (g_upper[a] - g_lower[a])
+        D[a] = np.clip(D[a], lower[a], upper[a])
+        g = np.zeros(m)
+        g[a] = neg_posterior_derivative(D, a)
+        above = a & (0 < g)
+        below = a & (g <= 0)
+        upper[above], g_upper[above] = D[above], g[above]
+        g_lower[above & (side == 1)] /= 2.
+        lower[below], g_lower[below] = D[below], g[below]
+        g_upper[below & (side == -1)] /= 2.
+        side[above], side[below] = 1, -1
+        active = a & (xtol * np.abs(D) < upper - lower) & (g != 0)
+    if np.any(active):
+        warn('the maximum number of iterations has been reached', OptimizationWarning)
+    if drift:
+        all_cells = np.ones(m, dtype=bool)
+        V = optimal_drift(D, all_cells, all_cells[cell_of])
+        if drift == 'force':
+            V /= D[:,np.newaxis]
+    else:
+        V = None
+    return index, D, V
@@ -14,6 +14,8 @@
 
 from tramway.core import ChainArray
 from .base import *
+from .counters import record_optimization
+from .degraded_d import degraded_posterior_vectorized
 from warnings import warn
 from math import pi, log
 import numpy as np
@@ -27,7 +29,8 @@ setup = {'name': ('degraded.dd', 'degraded.ddrift'),
     'arguments': OrderedDict((
         ('localization_error',  ('-e', dict(type=float, help='localization precision (see also sigma; default is 0.03)'))),
         ('jeffreys_prior',      ('-j', dict(action='store_true', help="Jeffreys' prior"))),
-        ('min_diffusivity',     dict(type=float, help='minimum diffusivity value allowed')))),
+        ('min_diffusivity',     dict(type=float, help='minimum diffusivity value allowed')),
+        ('vectorized',      dict(action='store_true', help='solve the single-cell problems for all the cells at once')))),
         'cell_sampling':    'individual'};
 
 
@@ -48,18 +51,26 @@ def dd_neg_posterior(x, dd, cell, sigma2, jeffreys_prior, dt_mean, min_diffusivi
     return neg_posterior
 
 
-def infer_DD(cells, localization_error=None, jeffreys_prior=False, min_diffusivity=None, **kwargs):
+def infer_DD(cells, localization_error=None, jeffreys_prior=False, min_diffusivity=None,
+        vectorized=False, **kwargs):
     if isinstance(cells, Distributed): # multiple cells
         localization_error = cells.get_localization_error(kwargs, 0.03, True, \
                 localization_error=localization_error)
-        args = (localization_error, jeffreys_prior, min_diffusivity)
-        index, inferred = [], []
-        for i in cells:
-            cell = cells[i]
-            index.append(i)
-            inferred.append(infer_DD(cell, *args, **kwargs))
-        any_cell = cell
-        inferred = pd.DataFrame(np.stack(inferred, axis=0), \
+        if vectorized:
+            index, D, drift = degraded_posterior_vectorized(cells, localization_error,
+                    jeffreys_prior, min_diffusivity, 'drift', xtol=kwargs.get('tol') or 1e-8)
+            inferred = np.c_[D, drift]
+            any_cell = cells[index[0]]
+        else:
+            args = (localization_error, jeffreys_prior, min_diffusivity)
+            index, inferred = [], []
+            for i in cells:
+                cell = cells[i]
+                index.append(i)
+                inferred.append(infer_DD(cell, *args, **kwargs))
+            inferred = np.stack(inferred, axis=0)
+            any_cell = cell
+        inferred = pd.DataFrame(inferred, \
             index=index, \
             columns=[ 'diffusivity' ] + \
                 [ 'drift ' + col for col in any_cell.space_cols ])
@@ -92,6 +103,7 @@ def infer_DD(cells, localization_error=None, jeffreys_prior=False, min_diffusivi
         result = minimize(dd_neg_posterior, dd.combined, \
             args=(dd, cell, localization_error, jeffreys_prior, dt_mean, min_diffusivity), \
             **kwargs)
+        record_optimization(result)
         #dd.update(result.x)
         #return (dd['D'], dd['drift'])
         return result.x # needless to split dd.combined into D and drift
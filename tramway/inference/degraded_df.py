@@ -14,6 +14,8 @@
 
 from tramway.core import ChainArray
 from .base import *
+from .counters import record_optimization
+from .degraded_d import degraded_posterior_vectorized
 from warnings import warn
 from math import pi, log
 import numpy as np
@@ -28,6 +30,7 @@ setup = {'name':    'degraded.df',
         ('localization_error',  ('-e', dict(type=float, help='localization precision (see sigma; default is 0.03)'))),
         ('jeffreys_prior',      ('-j', dict(action='store_true', help="Jeffreys' prior"))),
         ('min_diffusivity',     dict(type=float, help='minimum diffusivity value allowed')),
+        ('vectorized',      dict(action='store_true', help='solve the single-cell problems for all the cells at once')),
         ('debug',       dict(action='store_true')))),
         'cell_sampling':    'individual'}
 
@@ -75,29 +78,34 @@ def df_neg_posterior(x, df, cell, sigma2, jeffreys_prior, dt_mean, min_diffusivi
 
 
 def infer_DF(cells, localization_error=None, jeffreys_prior=False, min_diffusivity=None, debug=False, \
-        **kwargs):
+        vectorized=False, **kwargs):
     if isinstance(cells, Distributed): # multiple cells
         localization_error = cells.get_localization_error(kwargs, 0.03, True, \
                 localization_error=localization_error)
-        args = (localization_error, jeffreys_prior, min_diffusivity)
-        index, inferred = [], []
-        for i in cells:
-            cell = cells[i]
-            # sanity checks
-            if not bool(cell):
-                raise ValueError('empty cells')
-            if cell.dr.shape[1] == 0:
-                raise ValueError('translocation array has no column')
-            if cell.dt.shape[1:]:
-                raise ValueError('time deltas are structured in multiple dimensions')
-            # ensure that translocations are properly oriented in time
-            if not np.all(0 < cell.dt):
-                warn('translocation dts are non-positive', RuntimeWarning)
-                cell.dr[cell.dt < 0] *= -1.
-                cell.dt[cell.dt < 0] *= -1.
-            index.append(i)
-            inferred.append(infer_DF(cell, *args, **kwargs))
-        inferred = np.stack(inferred, axis=0)
+        if vectorized:
+            index, D, F = degraded_posterior_vectorized(cells, localization_error,
+                    jeffreys_prior, min_diffusivity, 'force', xtol=kwargs.get('tol') or 1e-8)
+            inferred = np.c_[D, F]
+        else:
+            args = (localization_error, jeffreys_prior, min_diffusivity)
+            index, inferred = [], []
+            for i in cells:
+                cell = cells[i]
+                # sanity checks
+                if not bool(cell):
+                    raise ValueError('empty cells')
+                if cell.dr.shape[1] == 0:
+                    raise ValueError('translocation array has no column')
+                if cell.dt.shape[1:]:
+                    raise ValueError('time deltas are structured in multiple dimensions')
+                # ensure that translocations are properly oriented in time
+                if not np.all(0 < cell.dt):
+                    warn('translocation dts are non-positive', RuntimeWarning)
+                    cell.dr[cell.dt < 0] *= -1.
+                    cell.dt[cell.dt < 0] *= -1.
+                index.append(i)
+                inferred.append(infer_DF(cell, *args, **kwargs))
+            inferred = np.stack(inferred, axis=0)
         #D = inferred[:,0]
         #gradD = []
         #for i in index:
@@ -129,6 +137,7 @@ def infer_DF(cells, localization_error=None, jeffreys_prior=False, min_diffusivi
         result = minimize(df_neg_posterior, df.combined, \
             args=(df, cell, localization_error, jeffreys_prior, dt_mean, min_diffusivity), \
             **kwargs)
+        record_optimization(result)
         #df.update(result.x)
         #return (df['D'], df['F'])
         return result.x # needless to split df.combined into D and F
@@ -14,7 +14,9 @@
 
 from tramway.core import ChainArray
 from .base import *
+from .counters import record_optimization
 from .gradient import *
+from .optimization import check_grad
 from warnings import warn
 from math import pi, log
 import numpy as np
@@ -35,6 +37,7 @@ setup = {'arguments': OrderedDict((
                     dict(action='store_true', help='InferenceMAP compatible'))),
         ('rgrad',       dict(help="alternative gradient for the regularization; can be 'delta0' or 'delta1'")),
         ('export_centers',      dict(action='store_true')),
+        ('check_jac',       dict(action='store_true', help='compare the analytic gradient of the posterior with a numerical estimate')),
         ('verbose',         ()))),
     'cell_sampling': 'connected'}
 setup_with_grad_arguments(setup)
@@ -277,10 +280,95 @@ def dv_neg_posterior1(x, dv, cells, sigma2, jeffreys_prior, dt_mean, \
     return result - y0
 
 
+def dv_neg_posterior_grad(x, dv, cells, sigma2, jeffreys_prior, dt_mean, \
+        index, reverse_index, grad_kwargs, y0, verbose, posteriors):
+    """
+    Gradient of :func:`dv_neg_posterior`.
+    """
+    grad_operator = cells.grad_operator(index, reverse_index, **grad_kwargs)
+    return _dv_neg_posterior_grad(x, dv, cells, sigma2, jeffreys_prior, dt_mean, index,
+            grad_operator, grad_operator, grad_operator)
+
+
+def dv_neg_posterior1_grad(x, dv, cells, sigma2, jeffreys_prior, dt_mean, \
+        index, reverse_index, grad_kwargs, y0, verbose, posteriors):
+    """
+    Gradient of :func:`dv_neg_posterior1`.
+    """
+    grad_operator = cells.grad_operator(index, reverse_index, **grad_kwargs)
+    variation_operator = cells.local_variation_operator(index, reverse_index, **grad_kwargs)
+    return _dv_neg_posterior_grad(x, dv, cells, sigma2, jeffreys_prior, dt_mean, index,
+            grad_operator, variation_operator, variation_operator)
+
+
+def _dv_neg_posterior_grad(x, dv, cells, sigma2, jeffreys_prior, dt_mean, index,
+        grad_operator, potential_prior_operator, diffusivity_prior_operator):
+    # extract `D` and `V`
+    dv.update(x)
+    D = dv.D
+    V = dv.V
+    #
+    noise_dt = sigma2
+
+    # spatial gradient of the potential energy at all the cells
+    gradV = grad_operator(V)
+    row = np.full(len(index), -1, dtype=int)
+    row[grad_operator.rows] = np.arange(grad_operator.rows.size)
+
+    # for all cell
+    grad_D = np.zeros_like(D)
+    grad_gradV = np.zeros_like(gradV)
+    active = np.zeros(len(index), dtype=bool)
+    for j, i in enumerate(index):
+        if row[j] < 0:
+            continue
+        cell = cells[i]
+        gradV_j = gradV[row[j]]
+        D_dt = D[j] * cell.dt
+        denominator = 4. * (D_dt + noise_dt)
+        dr_minus_drift = cell.dr + np.outer(D_dt, gradV_j)
+        ndsd = np.sum(dr_minus_drift * dr_minus_drift, axis=1)
+        if np.any(np.isnan(ndsd)):
+            continue
+        active[j] = True
+        # d(denominator)/dD = 4*dt and d(ndsd)/dD = 2*dt*gradV.(dr+D*dt*gradV)
+        grad_D[j] = np.sum(4. * cell.dt / denominator * (1. - ndsd / denominator)) \
+                + 2. * np.sum(cell.dt / denominator * np.dot(dr_minus_drift, gradV_j))
+        # d(ndsd)/d(gradV) = 2*D*dt*(dr+D*dt*gradV)
+        grad_gradV[row[j]] = 2. * np.dot(D_dt / denominator, dr_minus_drift)
+    grad_V = sum([ M.T.dot(grad_gradV[:,k]) for k, M in enumerate(grad_operator.matrices) ])
+
+    # priors; `grad_sum` is linear in its `grad` argument
+    weights = np.array([ cells.grad_sum(i, 1.) for i in index ])
+    potential_prior = np.array([ dv.potential_prior(j) or 0. for j in range(len(index)) ])
+    if np.any(potential_prior):
+        _, prior_grad = potential_prior_operator.sum_of_squares(V,
+                active * potential_prior * weights, grad=True)
+        grad_V += prior_grad
+    diffusivity_prior = np.array([ dv.diffusivity_prior(j) or 0. for j in range(len(index)) ])
+    if np.any(diffusivity_prior):
+        _, prior_grad = diffusivity_prior_operator.sum_of_squares(D,
+                active * diffusivity_prior * weights, grad=True)
+        grad_D += prior_grad
+    if jeffreys_prior:
+        grad_D += 2. * (dt_mean / (D * dt_mean + sigma2) - 1. / D)
+
+    grad = np.empty_like(x)
+    dv.set(grad, 'D', grad_D)
+    dv.set(grad, 'V', grad_V)
+    return grad
+
+
 def inferDV(cells, diffusivity_prior=None, potential_prior=None, \
     jeffreys_prior=False, min_diffusivity=None, max_iter=None, epsilon=None, \
     export_centers=False, verbose=True, compatibility=False, \
-    D0=None, V0=None, rgrad=None, **kwargs):
+    D0=None, V0=None, rgrad=None, check_jac=False, **kwargs):
+    """
+    The gradient of the posterior is passed to the minimizer, unless the spatial gradient
+    or local variation is not available as a sparse operator
+    (see also :meth:`~tramway.inference.base.Distributed.grad_operator`).
+    Argument `check_jac` compares this gradient with a numerical estimate at the initial point.
+    """
 
     localization_error = cells.get_localization_error(kwargs, 0.03, True)
 
@@ -335,6 +423,10 @@ def inferDV(cells, diffusivity_prior=None, potential_prior=None, \
         bounds = D_bounds + V_bounds
         options = dict(default_lBFGSb_options)
     options.update(kwargs.pop('options', {}))
+    # an explicit `jac` argument takes precedence; `None` disables the analytic gradient
+    jac_kwarg = 'jac' in kwargs
+    if jac_kwarg:
+        user_jac = kwargs.pop('jac')
     options.update(**kwargs) # for backward compatibility
     if max_iter:
         options['maxiter'] = max_iter
@@ -347,11 +439,19 @@ def inferDV(cells, diffusivity_prior=None, potential_prior=None, \
 
     # posterior function
     if rgrad in ('delta','delta0','delta1'):
-        fun = dv_neg_posterior1
+        fun, jac = dv_neg_posterior1, dv_neg_posterior1_grad
+        if cells.local_variation_operator(index, reverse_index, **grad_kwargs) is None:
+            jac = None
     else:
         if rgrad not in (None, 'grad', 'grad1', 'gradn'):
             warn('unsupported rgrad: {}'.format(rgrad), RuntimeWarning)
-        fun = dv_neg_posterior
+        fun, jac = dv_neg_posterior, dv_neg_posterior_grad
+    if cells.grad_operator(index, reverse_index, **grad_kwargs) is None:
+        jac = None
+    if jac_kwarg:
+        jac = user_jac
+    if jac is not None:
+        _kwargs['jac'] = jac
 
     # posterior function input arguments
     args = (dv, cells, localization_error, jeffreys_prior, dt_mean,
@@ -359,6 +459,10 @@ def inferDV(cells, diffusivity_prior=None, potential_prior=None, \
 
     # get the initial posterior value so that it is subtracted from the further evaluations
     y0 = fun(dv.combined, *(args + (0., False, [])))
+    if check_jac and jac is not None:
+        err = check_grad(fun, jac, dv.combined, args + (y0, False, []))
+        if verbose:
+            print('relative error of the posterior gradient: {}'.format(err))
     if verbose:
         print('At X0\tactual posterior= {}\n'.format(y0))
     #y0 = 0.
@@ -366,6 +470,7 @@ def inferDV(cells, diffusivity_prior=None, potential_prior=None, \
 
     # run the optimization routine
     result = minimize(fun, dv.combined, args=args, bounds=bounds, **_kwargs)
+    record_optimization(result)
     if not (result.success or verbose):
         warn('{}'.format(result.message), OptimizationWarning)
 
@@ -15,10 +15,50 @@
 import math
 import numpy as np
 import pandas as pd
+import scipy.sparse as sparse
 from numpy.polynomial import polynomial as poly
 from collections import OrderedDict
 
 
+def _delta0_cache(cells, i, index_map=None):
+    """
+    Get or make the *delta0* cache variable for cell `i`.
+
+    Returns:
+
+        tuple: (*index of cell i in X*, *indices of the neighbours in X*,
+            *distances to the neighbours* or ``None``).
+    """
+    cell = cells[i]
+
+    # cache neighbours (indices and center locations)
+    if not isinstance(cell.cache, dict):
+        cell.cache = {}
+    try:
+        return cell.cache['delta0']
+    except KeyError:
+        pass
+
+    adjacent = _adjacent = cells.neighbours(i)
+    if index_map is not None:
+        adjacent = index_map[_adjacent]
+        ok = 0 <= adjacent
+        if not np.all(ok):
+            adjacent, _adjacent = adjacent[ok], _adjacent[ok]
+    if _adjacent.size:
+        x0 = cell.center[np.newaxis,:]
+        x = np.vstack([ cells[j].center for j in _adjacent ])
+        dx_norm = x - x0
+        dx_norm = np.sqrt(np.sum(dx_norm * dx_norm, axis=1))
+    else:
+        dx_norm = None
+
+    if index_map is not None:
+        i = index_map[i]
+    cell.cache['delta0'] = (i, adjacent, dx_norm)
+    return cell.cache['delta0']
+
+
 def delta0(cells, i, X, index_map=None, **kwargs):
     """
     Differences with neighbour values:
@@ -55,33 +95,10 @@ def delta0(cells, i, X, index_map=None, **kwargs):
             difference vector with as many elements as there are neighbours.
 
     """
-    cell = cells[i]
     # below, the measurement is renamed y and the coordinates are X
     y = X
 
-    # cache neighbours (indices and center locations)
-    if not isinstance(cell.cache, dict):
-        cell.cache = {}
-    try:
-        i, adjacent, dx_norm = cell.cache['delta0']
-    except KeyError:
-        adjacent = _adjacent = cells.neighbours(i)
-        if index_map is not None:
-            adjacent = index_map[_adjacent]
-            ok = 0 <= adjacent
-            if not np.all(ok):
-                adjacent, _adjacent = adjacent[ok], _adjacent[ok]
-        if _adjacent.size:
-            x0 = cell.center[np.newaxis,:]
-            x = np.vstack([ cells[j].center for j in _adjacent ])
-            dx_norm = x - x0
-            dx_norm = np.sqrt(np.sum(dx_norm * dx_norm, axis=1))
-        else:
-            dx_norm = None
-
-        if index_map is not None:
-            i = index_map[i]
-        cell.cache['delta0'] = (i, adjacent, dx_norm)
+    i, adjacent, dx_norm = _delta0_cache(cells, i, index_map)
 
     if dx_norm is None:
         return None
@@ -93,33 +110,10 @@ def delta0(cells, i, X, index_map=None, **kwargs):
 
 
 def delta0_without_scaling(cells, i, X, index_map=None, **kwargs):
-    cell = cells[i]
     # below, the measurement is renamed y and the coordinates are X
     y = X
 
-    # cache neighbours (indices and center locations)
-    if not isinstance(cell.cache, dict):
-        cell.cache = {}
-    try:
-        i, adjacent, dx_norm = cell.cache['delta0']
-    except KeyError:
-        adjacent = _adjacent = cells.neighbours(i)
-        if index_map is not None:
-            adjacent = index_map[_adjacent]
-            ok = 0 <= adjacent
-            if not np.all(ok):
-                adjacent, _adjacent = adjacent[ok], _adjacent[ok]
-        if _adjacent.size:
-            x0 = cell.center[np.newaxis,:]
-            x = np.vstack([ cells[j].center for j in _adjacent ])
-            dx_norm = x - x0
-            dx_norm = np.sqrt(np.sum(dx_norm * dx_norm, axis=1))
-        else:
-            dx_norm = None
-
-        if index_map is not None:
-            i = index_map[i]
-        cell.cache['delta0'] = (i, adjacent, dx_norm)
+    i, adjacent, dx_norm = _delta0_cache(cells, i, index_map)
 
     if dx_norm is None:
         return None
@@ -428,6 +422,78 @@ def neighbours_per_axis(i, cells, centers=None, eps=None, selection_angle=None):
     return below, above
 
 
+def _grad1_cache(cells, i, index_map=None, eps=None, selection_angle=None):
+    """
+    Get or make the *grad1* cache variable for cell `i`.
+
+    This cache variable is shared by :func:`grad1` and :func:`delta1`,
+    and read by :func:`grad1_operator`.
+
+    Returns:
+
+        tuple: (*index of cell i in X*, *indices of the neighbours in X*,
+            *list of (below, above, X term) triplets, one per dimension*).
+    """
+    cell = cells[i]
+    X0 = cell.center
+
+    # cache neighbours (indices and center locations)
+    if not isinstance(cell.cache, dict):
+        cell.cache = {}
+    try:
+        return cell.cache['grad1']
+    except KeyError:
+        pass
+
+    adjacent = _adjacent = cells.neighbours(i)
+    if index_map is not None:
+        adjacent = index_map[_adjacent]
+        ok = 0 <= adjacent
+        if not np.all(ok):
+            adjacent, _adjacent = adjacent[ok], _adjacent[ok]
+    if _adjacent.size:
+        X = np.vstack([ cells[j].center for j in _adjacent ])
+        below, above = neighbours_per_axis(i, cells, X, eps, selection_angle)
+
+        # pre-compute the X terms for each dimension
+        X_neighbours = []
+        for j in range(cell.dim):
+            u, v = below[j], above[j]
+            if not np.any(u):
+                u = None
+            if not np.any(v):
+                v = None
+
+            if u is None:
+                if v is None:
+                    Xj = None
+                else:
+                    Xj = 1. / (X0[j] - np.mean(X[v,j]))
+            elif v is None:
+                Xj = 1. / (X0[j] - np.mean(X[u,j]))
+            else:
+                Xj = np.r_[X0[j], np.mean(X[u,j]), np.mean(X[v,j])]
+            if np.isscalar(Xj):
+                try:
+                    Xj = Xj.tolist()
+                except AttributeError:
+                    pass
+                else:
+                    if isinstance(Xj, list):
+                        Xj = Xj[0]
+
+            X_neighbours.append((u, v, Xj))
+
+        X = X_neighbours
+    else:
+        X = []
+
+    if index_map is not None:
+        i = index_map[i]
+    cell.cache['grad1'] = (i, adjacent, X)
+    return cell.cache['grad1']
+
+
 def grad1(cells, i, X, index_map=None, eps=None, selection_angle=None, na=np.nan):
     """
     Local gradient by 2 degree polynomial interpolation along each dimension independently.
@@ -511,63 +577,10 @@ def grad1(cells, i, X, index_map=None, eps=None, selection_angle=None, na=np.nan
             in the (trans-)location data.
     """
     assert 0 < X.size
-    cell = cells[i]
     # below, the measurement is renamed y and the coordinates are X
     y = X
-    X0 = cell.center
 
-    # cache neighbours (indices and center locations)
-    if not isinstance(cell.cache, dict):
-        cell.cache = {}
-    try:
-        i, adjacent, X = cell.cache['grad1']
-    except KeyError:
-        adjacent = _adjacent = cells.neighbours(i)
-        if index_map is not None:
-            adjacent = index_map[_adjacent]
-            ok = 0 <= adjacent
-            if not np.all(ok):
-                adjacent, _adjacent = adjacent[ok], _adjacent[ok]
-        if _adjacent.size:
-            X = np.vstack([ cells[j].center for j in _adjacent ])
-            below, above = neighbours_per_axis(i, cells, X, eps, selection_angle)
-
-            # pre-compute the X terms for each dimension
-            X_neighbours = []
-            for j in range(cell.dim):
-                u, v = below[j], above[j]
-                if not np.any(u):
-                    u = None
-                if not np.any(v):
-                    v = None
-
-                if u is None:
-                    if v is None:
-                        Xj = None
-                    else:
-                        Xj = 1. / (X0[j] - np.mean(X[v,j]))
-                elif v is None:
-                    Xj = 1. / (X0[j] - np.mean(X[u,j]))
-                else:
-                    Xj = np.r_[X0[j], np.mean(X[u,j]), np.mean(X[v,j])]
-                if np.isscalar(Xj):
-                    try:
-                        Xj = Xj.tolist()
-                    except AttributeError:
-                        pass
-                    else:
-                        if isinstance(Xj, list):
-                            Xj = Xj[0]
-
-                X_neighbours.append((u, v, Xj))
-
-            X = X_neighbours
-        else:
-            X = []
-
-        if index_map is not None:
-            i = index_map[i]
-        cell.cache['grad1'] = (i, adjacent, X)
+    i, adjacent, X = _grad1_cache(cells, i, index_map, eps, selection_angle)
 
     if not X:
         return None
@@ -632,63 +645,10 @@ def delta1(cells, i, X, index_map=None, eps=None, selection_angle=None):
             delta vector with as many elements as there are spatial dimensions.
 
     """
-    cell = cells[i]
     # below, the measurement is renamed y and the coordinates are X
     y = X
-    X0 = cell.center
 
-    # cache neighbours (indices and center locations)
-    if not isinstance(cell.cache, dict):
-        cell.cache = {}
-    try:
-        i, adjacent, X = cell.cache['grad1']
-    except KeyError:
-        adjacent = _adjacent = cells.neighbours(i)
-        if index_map is not None:
-            adjacent = index_map[_adjacent]
-            ok = 0 <= adjacent
-            if not np.all(ok):
-                adjacent, _adjacent = adjacent[ok], _adjacent[ok]
-        if _adjacent.size:
-            X = np.vstack([ cells[j].center for j in _adjacent ])
-            below, above = neighbours_per_axis(i, cells, X, eps, selection_angle)
-
-            # pre-compute the X terms for each dimension
-            X_neighbours = []
-            for j in range(cell.dim):
-                u, v = below[j], above[j]
-                if not np.any(u):
-                    u = None
-                if not np.any(v):
-                    v = None
-
-                if u is None:
-                    if v is None:
-                        Xj = None
-                    else:
-                        Xj = 1. / (X0[j] - np.mean(X[v,j]))
-                elif v is None:
-                    Xj = 1. / (X0[j] - np.mean(X[u,j]))
-                else:
-                    Xj = np.r_[X0[j], np.mean(X[u,j]), np.mean(X[v,j])]
-                #if np.isscalar(Xj):
-                #    try:
-                #        Xj = Xj.tolist()
-                #    except AttributeError:
-                #        pass
-                #    else:
-                #        if isinstance(Xj, list):
-                #            Xj = Xj[0]
-
-                X_neighbours.append((u, v, Xj))
-
-            X = X_neighbours
-        else:
-            X = []
-
-        if index_map is not None:
-            i = index_map[i]
-        cell.cache['grad1'] = (i, adjacent, X)
+    i, adjacent, X = _grad1_cache(cells, i, index_map, eps, selection_angle)
 
     if not X:
         return None
@@ -729,6 +689,377 @@ def _vander(x, y):
     return b + 2. * a * x[0]
 
 
+class StencilOperator(object):
+    """
+    Sparse linear operator that applies a cell-wise stencil, e.g. :func:`grad1` or
+    :func:`delta0`, to all the cells at once.
+
+    Each output component (e.g. space dimension) is represented by a
+    :class:`~scipy.sparse.csr_matrix` which rows are associated with cells and
+    which columns map to the elements of the measurement vector.
+
+    Attributes:
+
+        index (numpy.ndarray):
+            indices of the cells the stencil was built for.
+
+        defined (numpy.ndarray):
+            boolean array with as many elements as `index`;
+            ``False`` where the cell-wise function would return ``None``.
+
+        rows (numpy.ndarray):
+            for each row of the matrices, positional index in `index` of the
+            corresponding cell.
+
+        matrices (list of scipy.sparse.csr_matrix):
+            one matrix per output component.
+
+        undefined (numpy.ndarray):
+            boolean array with as many rows as the matrices and as many columns as
+            output components; ``True`` for the elements set to `na`.
+
+        na (float):
+            value for the undefined elements.
+
+    """
+    __slots__ = ('index', 'defined', 'rows', 'matrices', 'undefined', 'na', '_local')
+
+    def __init__(self, index, defined, rows, matrices, undefined=None, na=np.nan):
+        self.index = index
+        self.defined = defined
+        self.rows = rows
+        self.matrices = matrices
+        if undefined is not None and not np.any(undefined):
+            undefined = None
+        self.undefined = undefined
+        self.na = na
+        self._local = None
+
+    def __call__(self, X):
+        """
+        Apply the stencil to measurement vector `X`.
+
+        Returns:
+
+            numpy.ndarray:
+                array with as many rows as the matrices and
+                as many columns as output components.
+        """
+        Y = np.stack([ M.dot(X) for M in self.matrices ], axis=1)
+        if self.undefined is not None:
+            Y[self.undefined] = self.na
+        return Y
+
+    def sum_of_squares(self, X, weights=None, grad=False):
+        """
+        Weighted sum of the squared elements of the stencil output,
+        equivalent to summing the values returned by
+        :meth:`~tramway.inference.base.Distributed.grad_sum` called on the element-wise
+        square of the cell-wise stencil output.
+
+        Arguments:
+
+            X (numpy.ndarray):
+                measurement vector.
+
+            weights (numpy.ndarray):
+                cell weights, as many as elements in `index`.
+
+            grad (bool):
+                return the gradient with respect to `X` as a second output argument.
+
+        Returns:
+
+            float or (float, numpy.ndarray):
+                sum of squares and optionally its gradient.
+        """
+        Y = self(X)
+        if weights is None:
+            WY = Y
+        else:
+            WY = weights[self.rows, np.newaxis] * Y
+        result = np.sum(WY * Y)
+        if grad:
+            if self.undefined is not None:
+                WY[self.undefined] = 0.
+            dX = 2. * sum([ M.T.dot(WY[:,j]) for j, M in enumerate(self.matrices) ])
+            return result, dX
+        else:
+            return result
+
+    def local(self, k):
+        """
+        Dense representation of the stencil at a single cell.
+
+        Arguments:
+
+            k (int):
+                positional index in `index` of the cell.
+
+        Returns:
+
+            tuple or None:
+                indices of the elements of the measurement vector involved,
+                array of coefficients with as many rows as rows for this cell in the matrices,
+                as many columns as output components and a third dimension for the
+                measurement elements, and the corresponding rows of `undefined` (or ``None``);
+                ``None`` if the stencil is not defined at this cell.
+        """
+        if self._local is None:
+            self._local = {}
+        try:
+            return self._local[k]
+        except KeyError:
+            pass
+        r = np.flatnonzero(self.rows == k)
+        if r.size == 0:
+            stencil = None
+        else:
+            matrices = [ M[r] for M in self.matrices ]
+            columns = np.unique(np.concatenate([ M.indices for M in matrices ]))
+            coefficients = np.stack([ M[:,columns].toarray() for M in matrices ], axis=1)
+            undefined = None if self.undefined is None else self.undefined[r]
+            stencil = (columns, coefficients, undefined)
+        self._local[k] = stencil
+        return stencil
+
+
+def _stencil_shape(cells, index, index_map):
+    if index is None:
+        index = np.array(list(cells.keys()))
+    else:
+        index = np.asarray(index)
+    if index_map is None:
+        ncols = max(cells.adjacency.shape[0], np.max(index) + 1)
+    else:
+        ncols = np.max(index_map) + 1
+    return index, ncols
+
+
+def grad1_operator(cells, index=None, index_map=None, eps=None, selection_angle=None,
+        na=np.nan):
+    """
+    Sparse linear operator equivalent to calling :func:`grad1` at every cell in `index`.
+
+    The operator relies on the cache variable *grad1*, that is built or reused.
+
+    Arguments:
+
+        cells (tramway.inference.base.Distributed):
+            distributed cells.
+
+        index (sequence of ints):
+            cell indices; default is all the cells.
+
+        index_map (array):
+            see also :func:`grad1`.
+
+        eps (float):
+            see also :func:`grad1`.
+
+        selection_angle (float):
+            see also :func:`grad1`.
+
+        na (float):
+            see also :func:`grad1`.
+
+    Returns:
+
+        StencilOperator: one matrix per space dimension.
+    """
+    index, ncols = _stencil_shape(cells, index, index_map)
+    defined = np.zeros(index.size, dtype=bool)
+    rows, undefined = [], []
+    dim = cells.dim
+    I, J, V = [ [ [] for _ in range(dim) ] for _ in range(3) ]
+    for r, i in enumerate(index):
+        i, adjacent, X = _grad1_cache(cells, i, index_map, eps, selection_angle)
+        if not X:
+            continue
+        p = len(rows)
+        defined[r] = True
+        rows.append(r)
+        undefined_p = np.zeros(dim, dtype=bool)
+        for j, (u, v, Xj) in enumerate(X):
+            if u is None and v is None:
+                undefined_p[j] = True
+                continue
+            if u is None or v is None:
+                # (y0 - mean(y[w])) * Xj
+                w = v if u is None else u
+                k = adjacent[w]
+                coefs = np.r_[Xj, np.full(k.size, -Xj / float(k.size))]
+                k = np.r_[i, k]
+            else:
+                # derivative at x0 of the 2nd degree polynomial that interpolates
+                # (x0, y0), (xu, mean(y[u])) and (xv, mean(y[v]))
+                x0, xu, xv = Xj
+                ku, kv = adjacent[u], adjacent[v]
+                c0 = 1. / (x0 - xu) + 1. / (x0 - xv)
+                cu = (x0 - xv) / ((xu - x0) * (xu - xv))
+                cv = (x0 - xu) / ((xv - x0) * (xv - xu))
+                coefs = np.r_[c0,
+                        np.full(ku.size, cu / float(ku.size)),
+                        np.full(kv.size, cv / float(kv.size))]
+                k = np.r_[i, ku, kv]
+            I[j].append(np.full(k.size, p))
+            J[j].append(k)
+            V[j].append(coefs)
+        undefined.append(undefined_p)
+    nrows = len(rows)
+    matrices = []
+    for j in range(dim):
+        if I[j]:
+            Ij, Jj, Vj = np.concatenate(I[j]), np.concatenate(J[j]), np.concatenate(V[j])
+        else:
+            Ij = Jj = np.zeros(0, dtype=int)
+            Vj = np.zeros(0, dtype=float)
+        matrices.append(sparse.csr_matrix((Vj, (Ij, Jj)), shape=(nrows, ncols)))
+    if undefined:
+        undefined = np.stack(undefined, axis=0)
+    else:
+        undefined = None
+    return StencilOperator(index, defined, np.array(rows, dtype=int), matrices, undefined, na)
+
+
+def delta0_operator(cells, index=None, index_map=None, **kwargs):
+    """
+    Sparse linear operator equivalent to calling :func:`delta0` at every cell in `index`.
+
+    As :func:`delta0` returns one value per neighbour, the operator consists of a single
+    matrix with one row per pair of neighbour cells.
+
+    The operator relies on the cache variable *delta0*, that is built or reused.
+
+    Arguments:
+
+        cells (tramway.inference.base.Distributed):
+            distributed cells.
+
+        index (sequence of ints):
+            cell indices; default is all the cells.
+
+        index_map (array):
+            see also :func:`delta0`.
+
+    Returns:
+
+        StencilOperator: single-matrix operator.
+    """
+    index, ncols = _stencil_shape(cells, index, index_map)
+    defined = np.zeros(index.size, dtype=bool)
+    rows, I, J, V = [], [], [], []
+    p = 0
+    for r, i in enumerate(index):
+        i, adjacent, dx_norm = _delta0_cache(cells, i, index_map)
+        if dx_norm is None:
+            continue
+        defined[r] = True
+        n = adjacent.size
+        coefs = 1. / dx_norm / np.sqrt(float(n))
+        rows.append(np.full(n, r))
+        # (y[adjacent] - y0) * coefs
+        k = np.arange(p, p + n)
+        I += [k, k]
+        J += [adjacent, np.full(n, i)]
+        V += [coefs, -coefs]
+        p += n
+    if I:
+        rows = np.concatenate(rows)
+        I, J, V = np.concatenate(I), np.concatenate(J), np.concatenate(V)
+    else:
+        rows = I = J = np.zeros(0, dtype=int)
+        V = np.zeros(0, dtype=float)
+    matrix = sparse.csr_matrix((V, (I, J)), shape=(p, ncols))
+    return StencilOperator(index, defined, rows, [matrix])
+
+
+def delta1_operator(cells, index=None, index_map=None, eps=None, selection_angle=None):
+    """
+    Sparse linear operator equivalent to calling :func:`delta1` at every cell in `index`.
+
+    Each matrix represents a space dimension and exhibits two rows per cell,
+    for the neighbours below and above respectively.
+
+    The operator relies on the cache variable *grad1*, that is built or reused.
+
+    Arguments:
+
+        cells (tramway.inference.base.Distributed):
+            distributed cells.
+
+        index (sequence of ints):
+            cell indices; default is all the cells.
+
+        index_map (array):
+            see also :func:`delta1`.
+
+        eps (float):
+            see also :func:`grad1`.
+
+        selection_angle (float):
+            see also :func:`grad1`.
+
+    Returns:
+
+        StencilOperator: one matrix per space dimension.
+    """
+    index, ncols = _stencil_shape(cells, index, index_map)
+    defined = np.zeros(index.size, dtype=bool)
+    rows = []
+    dim = cells.dim
+    I, J, V = [ [ [] for _ in range(dim) ] for _ in range(3) ]
+    for r, i in enumerate(index):
+        i, adjacent, X = _grad1_cache(cells, i, index_map, eps, selection_angle)
+        if not X:
+            continue
+        p = len(rows)
+        defined[r] = True
+        rows += [r, r]
+        for j, (u, v, Xj) in enumerate(X):
+            if u is None:
+                if v is None:
+                    continue
+                sides = [(p + 1, v, Xj)]
+            elif v is None:
+                sides = [(p, u, Xj)]
+            else:
+                x0, xu, xv = Xj
+                sides = [(p, u, 1. / (x0 - xu)), (p + 1, v, 1. / (x0 - xv))]
+            for q, w, c in sides:
+                # (y0 - mean(y[w])) * c
+                k = adjacent[w]
+                I[j].append(np.full(k.size + 1, q))
+                J[j].append(np.r_[i, k])
+                V[j].append(np.r_[c, np.full(k.size, -c / float(k.size))])
+    nrows = len(rows)
+    matrices = []
+    for j in range(dim):
+        if I[j]:
+            Ij, Jj, Vj = np.concatenate(I[j]), np.concatenate(J[j]), np.concatenate(V[j])
+        else:
+            Ij = Jj = np.zeros(0, dtype=int)
+            Vj = np.zeros(0, dtype=float)
+        matrices.append(sparse.csr_matrix((Vj, (Ij, Jj)), shape=(nrows, ncols)))
+    return StencilOperator(index, defined, np.array(rows, dtype=int), matrices)
+
+
+def operator_builder(fun):
+    """
+    Get the sparse operator builder that corresponds to a cell-wise stencil function.
+
+    Arguments:
+
+        fun (callable): any of :func:`grad1`, :func:`delta0` and :func:`delta1`.
+
+    Returns:
+
+        callable: any of :func:`grad1_operator`, :func:`delta0_operator`,
+            :func:`delta1_operator`, or ``None`` if `fun` is not supported.
+    """
+    return {grad1: grad1_operator, delta0: delta0_operator, delta1: delta1_operator}.get(fun)
+
+
 def setup_with_grad_arguments(setup):
     """Add :meth:`~tramway.inference.base.Distributed.grad` related arguments to inference plugin setup.
 
@@ -772,18 +1103,25 @@ def gradient_map(cells, feature=None, **kwargs):
         X = np.array(X)
         reverse_index = np.full(max(cells.keys())+1, -1, dtype=int)
         reverse_index[I] = np.arange(len(I))
-        index, gradX = [], []
-        for i in I:
-            try:
-                g = cells.grad(i, X, reverse_index, **grad_kwargs)
-            except (SystemExit, KeyboardInterrupt):
-                raise
-            except:
-                g = None
-            if g is not None:
-                index.append(i)
-                gradX.append(g)
-        gradX = np.vstack(gradX)
+        operator = None
+        if X.ndim == 1:
+            operator = cells.grad_operator(I, reverse_index, **grad_kwargs)
+        if operator is None:
+            index, gradX = [], []
+            for i in I:
+                try:
+                    g = cells.grad(i, X, reverse_index, **grad_kwargs)
+                except (SystemExit, KeyboardInterrupt):
+                    raise
+                except:
+                    g = None
+                if g is not None:
+                    index.append(i)
+                    gradX.append(g)
+            gradX = np.vstack(gradX)
+        else:
+            index = operator.index[operator.defined]
+            gradX = operator(X)
         assert gradX.shape[1:] and gradX.shape[1] == len(cells.space_cols)
         columns = [ '{} {}'.format(f, col) for col in cells.space_cols ]
         gradX = pd.DataFrame(gradX, index=index, columns=columns)
@@ -802,5 +1140,7 @@ setup_with_grad_arguments(setup)
 
 
 __all__ = ['default_selection_angle', 'get_grad_kwargs', 'neighbours_per_axis', 'grad1', 'gradn',
-        'delta0', 'delta0_without_scaling', 'delta1', 'setup_with_grad_arguments', 'setup', 'gradient_map']
+        'delta0', 'delta0_without_scaling', 'delta1', 'StencilOperator', 'grad1_operator',
+        'delta0_operator', 'delta1_operator', 'operator_builder', 'setup_with_grad_arguments',
+        'setup', 'gradient_map']
 
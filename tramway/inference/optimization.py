@@ -345,12 +345,19 @@ class SparseFunction(parallel.Workspace):
 
         h0 (float): gradient initial step.
 
+        jac (callable): local gradient of `fun` (see :func:`local_grad_sum`);
+            if ``None``, the gradient is estimated by :func:`sparse_grad`.
+
         ncalls (int): number of calls to `fun`.
 
     See also :func:`minimize_sparse_bfgs`.
     """
+    # attributes that long-lived workers keep from one optimization to the next one
+    __resident__ = ('_fun', 'args', '_extensions', 'covariate', 'gradient_subspace',
+            'descent_subspace', 'gradient_covariate', 'sum', 'jac')
+
     def __init__(self, x, covariate, gradient_subspace, descent_subspace,
-            eps, fun, _sum, args, regul, bounds, h0):
+            eps, fun, _sum, args, regul, bounds, h0, jac=None):
         parallel.Workspace.__init__(self, x, *args)
         self.covariate = covariate
         self.gradient_subspace = gradient_subspace
@@ -362,6 +369,7 @@ class SparseFunction(parallel.Workspace):
         self.regul = regul
         self.bounds = bounds
         self.h0 = h0
+        self.jac = jac
         self.ncalls = 0
 
     @property
@@ -370,11 +378,27 @@ class SparseFunction(parallel.Workspace):
     def update(self, component):
         #assert self.x is self._extensions[0].combined # stochastic_dv only
         parallel.Workspace.update(self, component)
-        component.push()
+        if not isinstance(component, parallel.ArrayUpdate):
+            component.push()
         #self.x[component.descent_subspace] = component.x
+    def encode_update(self, component, extension_updates=None):
+        # send the other workers what `component.push` writes, instead of the component
+        x = component.x
+        index = None if x.size == self.x.size else component.gradient_subspace
+        return parallel.ArrayUpdate(index, x, extension_updates)
     def fun(self, *args, **kwargs):
         self.ncalls += 1
         return self._fun(*args, **kwargs)
+    @property
+    def vectorized_fun(self):
+        """ Vectorized local cost function if `fun` has one (see :func:`vectorize_local`),
+        ``None`` otherwise. """
+        if getattr(self._fun, 'vectorized', None) is None:
+            return None
+        return self._vectorized_fun
+    def _vectorized_fun(self, I, X, *args):
+        self.ncalls += len(I)
+        return self._fun.vectorized(I, X, *args)
 
 def extend_global(__global__, independent_components, memory, newton, gradient_covariate):
     """ Add attributes to the workspace.
@@ -788,6 +812,11 @@ class Component(LocalSubspaceProxy, parallel.UpdateVehicle):
         assert self._g is not None
     def __f__(self, _x):
         #assert _x is x # check there is a single working copy
+        vectorized_fun = self.__global__.vectorized_fun
+        if vectorized_fun is not None:
+            J = np.asarray(self.covariate)
+            return self.__global__.sum(vectorized_fun(J,
+                np.repeat(_x[np.newaxis,:], J.size, axis=0), *self.__global__.args))
         return self.__global__.sum([ self.__global__.fun(j, _x, *self.__global__.args)
                     for j in self.covariate ])
     @property
@@ -807,9 +836,13 @@ class Component(LocalSubspaceProxy, parallel.UpdateVehicle):
                 covariate = self.__global__.gradient_covariate
             except AttributeError:
                 covariate = self.covariate
+        if self.__global__.jac is not None:
+            _total_g, _partial_g = local_grad_sum(self.__global__.jac, _x, covariate,
+                    subspace, self.__global__.args, self.__global__.sum, self.__global__.regul)
+            return _total_g
         _total_g, _partial_g = sparse_grad(self.__global__.fun, _x, covariate,
                 subspace, self.__global__.args, self.__global__.sum, self.__global__.regul,
-                self.__global__.bounds, self.__global__.h0)
+                self.__global__.bounds, self.__global__.h0, self.__global__.vectorized_fun)
         return _total_g
     @property
     def g(self):
@@ -860,9 +893,13 @@ class Component(LocalSubspaceProxy, parallel.UpdateVehicle):
 parallel.abc.VehicleJobStep.register(Component)
 
 
+def _all_parameters(i):
+    # default `gradient_subspace` and `descent_subspace`; module-level so that successive
+    # calls share the same object and long-lived workers can keep it resident
+    return None
+
 def _fun_args(fun, x0, component, covariate, gradient_subspace, descent_subspace,
         args, bounds, _sum, gradient_sum, gradient_covariate):
-    _all = None
     if not callable(fun):
         raise TypeError('fun is not callable')
     if not isinstance(x0, np.ndarray):
@@ -889,11 +926,11 @@ def _fun_args(fun, x0, component, covariate, gradient_subspace, descent_subspace
     if not callable(covariate):
         raise TypeError('covariate is not callable')
     if gradient_subspace is None:
-        gradient_subspace = lambda i: _all
+        gradient_subspace = _all_parameters
     elif not callable(gradient_subspace):
         raise TypeError('gradient_subspace is not callable')
     if descent_subspace is None:
-        descent_subspace = lambda i: _all
+        descent_subspace = _all_parameters
     elif not callable(descent_subspace):
         raise TypeError('descent_subspace is not callable')
     if not callable(_sum):
@@ -969,7 +1006,7 @@ def minimize_sparse_bfgs1(fun, x0, component, covariate, gradient_subspace, desc
         ls_armijo_max=None, ls_wolfe=None, ls_failure_rate=.9, fix_ls=None, fix_ls_trigger=5,
         gradient_initial_step=1e-8, Component=Component,
         independent_components=False, newton=True, verbose=False, diagnosis=None,
-        returns=(), **kwargs):
+        returns=(), jac=None, **kwargs):
     """
     Let the objective function :math:`f(x) = \sum_{i \in C} f_{i}(x) \forall x in \Theta`
     be a linear function of sparse components :math:`f_{i}` such that
@@ -1098,10 +1135,20 @@ def minimize_sparse_bfgs1(fun, x0, component, covariate, gradient_subspace, desc
         returns (sequence of str): any subset of {'f', 'df', 'projg', 'err', 'ncalls', 'diagnosis'}
             or 'all'.
 
+        jac (callable): local gradient of `fun`; takes the same input arguments as `fun` and
+            returns the indices of the parameters and the corresponding partial derivatives
+            (see also :func:`local_grad_sum` and :func:`check_local_grad`);
+            if defined, the gradient is not estimated by finite differences.
+
         xref (numpy.ndarray): reference final parameter vector; if defined, at each iteration,
             the L2-norm of the difference between this and the current parameter vector is evaluated
             and returned as attribute `err`; note that this computation may add quite some overhead.
 
+        pool (tramway.core.parallel.WorkerPool): long-lived workers (see :func:`sbfgs_pool`);
+            if `fun`, `args`, `covariate`, `gradient_subspace`, `descent_subspace`, `_sum`,
+            `gradient_covariate` and `jac` are the same objects as in the previous call with the
+            same pool, the workers reuse their copy and only receive the other data.
+
     Returns:
 
         BFGSResult: final parameter vector.
@@ -1123,7 +1170,7 @@ def minimize_sparse_bfgs1(fun, x0, component, covariate, gradient_subspace, desc
 
     # component
     __global__ = SparseFunction(x0, covariate, gradient_subspace, descent_subspace,
-            eps, fun, _sum, args, regul, bounds, gradient_initial_step)
+            eps, fun, _sum, args, regul, bounds, gradient_initial_step, jac)
     extend_global(__global__, independent_components, memory, newton, gradient_covariate)
     C = _defaultdict(Component, __global__)
 
@@ -1556,6 +1603,29 @@ class SBFGSWorker(parallel.Worker):
 
 
 
+def sbfgs_pool(worker_count=None, **kwargs):
+    """
+    Long-lived workers for successive calls to :func:`minimize_sparse_bfgs1`.
+
+    Example::
+
+        with sbfgs_pool(4) as pool:
+            for x0 in initial_points:
+                result = minimize_sparse_bfgs1(fun, x0, ..., pool=pool)
+
+    Arguments:
+
+        worker_count (int): number of workers.
+
+    Other keyword arguments are passed to :class:`~tramway.core.parallel.WorkerPool`.
+
+    Returns:
+
+        tramway.core.parallel.WorkerPool: worker pool.
+    """
+    return parallel.WorkerPool(worker_count, worker=SBFGSWorker, **kwargs)
+
+
 def minimize_sparse_bfgs0(fun, x0, component, covariate, gradient_subspace, descent_subspace,
         args=(), bounds=None, _sum=np.sum, gradient_sum=None, gradient_covariate=None,
         memory=10, eps=1e-6, ftol=1e-6, gtol=1e-10, low_df_rate=.9, low_dg_rate=.9, step_scale=1.,
@@ -1978,9 +2048,13 @@ def minimize_sparse_bfgs0(fun, x0, component, covariate, gradient_subspace, desc
             cumt if verbose else None, None, None, None)
 
 
-def sparse_grad(fun, x, active_i, active_j, args=(), _sum=np.sum, regul=None, bounds=None, h0=1e-8):
+def sparse_grad(fun, x, active_i, active_j, args=(), _sum=np.sum, regul=None, bounds=None, h0=1e-8,
+        vectorized_fun=None):
     """
     Compute the derivative of a function.
+
+    If `vectorized_fun` is defined, or `fun` has a `vectorized` attribute, all the
+    perturbed parameter vectors are evaluated in a single call (see :func:`vectorize_local`).
     """
     SAFE, CON = 2., 1.4
     CON2 = CON * CON
@@ -1993,12 +2067,21 @@ def sparse_grad(fun, x, active_i, active_j, args=(), _sum=np.sum, regul=None, bo
         lower, upper = bounds
     if not regul:
         penalty = 0.
+    if vectorized_fun is None:
+        vectorized_fun = getattr(fun, 'vectorized', None)
+    if callable(active_i):
+        active_i = { j: active_i(j) for j in active_j }
+    if vectorized_fun is not None:
+        # the step sizes are evaluated by blocks, as the extrapolation usually terminates early
+        block = 4
+        F = _perturbed_local_values(vectorized_fun, x, active_i, active_j, H[:block],
+                lower, upper, args)
     total_grad, partial_grad = [], {}
     any_ok = False
     a = np.zeros((H.size, H.size), dtype=float)
     for j in active_j:
-        if callable(active_i):
-            I = active_i(j)
+        if isinstance(active_i, dict):
+            I = active_i[j]
         else:
             I = active_i
         total_grad_j, err = None, np.inf
@@ -2006,16 +2089,24 @@ def sparse_grad(fun, x, active_i, active_j, args=(), _sum=np.sum, regul=None, bo
         try:
             for u, h in enumerate(H):
                 try:
-                    #
-                    x[j] = xj + h
-                    if upper is not None:
-                        x[j] = min(x[j], upper[j])
-                    f_a = np.array([ fun(i, x, *args) for i in I ])
-                    #
-                    x[j] = xj - h
-                    if lower is not None:
-                        x[j] = max(lower[j], x[j])
-                    f_b = np.array([ fun(i, x, *args) for i in I ])
+                    if vectorized_fun is None:
+                        #
+                        x[j] = xj + h
+                        if upper is not None:
+                            x[j] = min(x[j], upper[j])
+                        f_a = np.array([ fun(i, x, *args) for i in I ])
+                        #
+                        x[j] = xj - h
+                        if lower is not None:
+                            x[j] = max(lower[j], x[j])
+                        f_b = np.array([ fun(i, x, *args) for i in I ])
+                    else:
+                        if F[j][0].shape[0] <= u:
+                            F_a, F_b = F[j]
+                            f_a, f_b = _perturbed_local_values(vectorized_fun, x, active_i, [j],
+                                    H[u:u+block], lower, upper, args)[j]
+                            F[j] = (np.vstack((F_a, f_a)), np.vstack((F_b, f_b)))
+                        f_a, f_b = F[j][0][u], F[j][1][u]
                     #
                     partial_grad_j = (f_a - f_b) / (2. * h)
                     if regul:
@@ -2055,7 +2146,205 @@ def sparse_grad(fun, x, active_i, active_j, args=(), _sum=np.sum, regul=None, bo
     else:
         return None, None
 
+def _perturbed_local_values(vectorized_fun, x, active_i, active_j, H, lower, upper, args,
+        max_size=1<<22):
+    """
+    Evaluate the local functions at the parameter vectors perturbed by the steps in `H`
+    as in :func:`sparse_grad`, calling `vectorized_fun` as few times as possible.
+
+    Returns:
+
+        dict: for each parameter index `j`, a pair of arrays of the local function values
+            at the positive and negative perturbations, with as many rows as step sizes in `H`
+            and as many columns as components.
+    """
+    steps = []
+    for j in active_j:
+        I = np.asarray(active_i[j] if isinstance(active_i, dict) else active_i)
+        x_a, x_b = x[j] + H, x[j] - H
+        if upper is not None and upper[j] is not None:
+            x_a = np.minimum(x_a, upper[j])
+        if lower is not None and lower[j] is not None:
+            x_b = np.maximum(lower[j], x_b)
+        steps.append((j, I, np.concatenate((x_a, x_b))))
+    F, chunk, chunk_rows = {}, [], 0
+    max_rows = max(1, max_size // max(1, x.size))
+    for k, step in enumerate(steps):
+        chunk.append(step)
+        chunk_rows += step[1].size * step[2].size
+        if k + 1 < len(steps) and chunk_rows + steps[k+1][1].size * steps[k+1][2].size <= max_rows:
+            continue
+        # build the perturbed vectors and components
+        X = np.repeat(x[np.newaxis,:], chunk_rows, axis=0)
+        components, row = [], 0
+        for j, I, xj in chunk:
+            n = I.size * xj.size
+            X[row:row+n,j] = np.repeat(xj, I.size)
+            components.append(np.tile(I, xj.size))
+            row += n
+        f = np.asarray(vectorized_fun(np.concatenate(components), X, *args), dtype=float)
+        # dispatch the results
+        row = 0
+        for j, I, xj in chunk:
+            n = I.size * xj.size
+            f_j = f[row:row+n].reshape((xj.size, I.size))
+            F[j] = (f_j[:H.size], f_j[H.size:])
+            row += n
+        chunk, chunk_rows = [], 0
+    return F
+
+def vectorize_local(fun, vectorized_fun):
+    """
+    Attach a vectorized implementation to a local cost function, for use by
+    :func:`minimize_sparse_bfgs` and :func:`sparse_grad`.
+
+    `fun` takes a component index, a parameter vector and extra arguments, and returns
+    the local cost.
+    `vectorized_fun` takes an array of component indices, a 2D array with as many rows
+    of parameter vectors and the same extra arguments, and returns an array of local costs;
+    the *k*-th cost is ``fun(I[k], X[k], *args)``.
+
+    Returns:
+
+        callable: `fun` with attribute `vectorized` set to `vectorized_fun`.
+    """
+    fun.vectorized = vectorized_fun
+    return fun
+
+def local_grad_sum(jac, x, active_i, active_j, args=(), _sum=np.sum, regul=None):
+    """
+    Compute the derivative of a function from the analytic gradients of its local components,
+    as an alternative to :func:`sparse_grad`.
+
+    Arguments:
+
+        jac (callable): takes a component index, the parameter vector and `args`, and returns
+            the indices of the parameters and the corresponding partial derivatives of the local
+            cost; repeated indices are summed.
+
+    Other arguments and returned values are as in :func:`sparse_grad`.
+    """
+    if active_j is None:
+        active_j = range(x.size)
+    local_grads = {}
+    total_grad, partial_grad = [], {}
+    for j in active_j:
+        if callable(active_i):
+            I = active_i(j)
+        else:
+            I = active_i
+        partial_grad_j = []
+        for i in I:
+            try:
+                g = local_grads[i]
+            except KeyError:
+                indices, values = jac(i, x, *args)
+                g = local_grads[i] = {}
+                for k, v in zip(indices, values):
+                    g[k] = g.get(k, 0.) + v
+            partial_grad_j.append(g.get(j, 0.))
+        partial_grad_j = np.array(partial_grad_j)
+        total_grad_j = _sum(partial_grad_j)
+        if regul:
+            total_grad_j += regul * 2. * x[j]
+        total_grad.append(total_grad_j)
+        partial_grad[j] = (I, partial_grad_j)
+    return np.array(total_grad), partial_grad
+
+def check_local_grad(fun, jac, x, component, covariate, gradient_subspace=None,
+        args=(), rtol=1e-3, h0=1e-8):
+    """
+    Compare the local gradients of a sparse function, as passed to :func:`minimize_sparse_bfgs`,
+    with numerical estimates computed by :func:`sparse_grad`.
+
+    Arguments:
+
+        fun (callable): local cost function.
+
+        jac (callable): local gradient of `fun` (see :func:`local_grad_sum`).
+
+        x (numpy.ndarray): parameter vector at which the gradients are compared.
+
+        component (int or sequence): number of components, or indices of the components
+            to check.
+
+        covariate (callable): takes a component index and returns the components
+            that covary with it.
+
+        gradient_subspace (callable): takes a component index and returns the indices of the
+            related parameters; if ``None``, the full space.
+
+        args (tuple): extra input arguments to `fun` and `jac`.
+
+        rtol (float): relative tolerance above which a warning is logged.
+
+        h0 (float): initial step for :func:`sparse_grad`.
+
+    Returns:
+
+        float: maximum absolute difference, relative to the largest numerical
+            gradient component.
+    """
+    x = np.array(x, dtype=float) # copy, as `sparse_grad` modifies `x` inplace
+    if isinstance(component, int):
+        component = range(component)
+    err, scale = 0., np.finfo(float).tiny
+    for i in component:
+        I = covariate(i)
+        J = None if gradient_subspace is None else gradient_subspace(i)
+        g_num, _ = sparse_grad(fun, x, I, J, args, h0=h0)
+        if g_num is None:
+            module_logger.warning('check_local_grad: numerical gradient failed at component {}'.format(i))
+            return np.inf
+        g, _ = local_grad_sum(jac, x, I, J, args)
+        err = max(err, np.max(np.abs(g - g_num)))
+        scale = max(scale, np.max(np.abs(g_num)))
+    err /= scale
+    if not err <= rtol:
+        module_logger.warning('check_local_grad: analytic and numerical gradients differ (relative error: {})'.format(err))
+    return err
+
+def check_grad(fun, jac, x, args=(), rtol=1e-3, h0=1e-8):
+    """
+    Compare an analytic gradient with a numerical estimate computed by :func:`sparse_grad`.
+
+    Arguments:
+
+        fun (callable): objective function; takes `x` and `args` as input arguments.
+
+        jac (callable or bool): gradient of `fun`, with the same input arguments;
+            if ``True``, `fun` is assumed to return the gradient as a second output argument.
+
+        x (numpy.ndarray): parameter vector at which the gradients are compared.
+
+        args (tuple): extra input arguments to `fun` and `jac`.
+
+        rtol (float): relative tolerance above which a warning is logged.
+
+        h0 (float): initial step for :func:`sparse_grad`.
+
+    Returns:
+
+        float: maximum absolute difference, relative to the largest numerical
+            gradient component.
+    """
+    x = np.array(x, dtype=float) # copy, as `sparse_grad` modifies `x` inplace
+    if jac is True:
+        g = fun(x, *args)[1]
+        f = lambda i, x, *args: fun(x, *args)[0]
+    else:
+        g = jac(x, *args)
+        f = lambda i, x, *args: fun(x, *args)
+    g_num, _ = sparse_grad(f, x, [0], None, args, h0=h0)
+    if g_num is None:
+        module_logger.warning('check_grad: numerical gradient failed')
+        return np.inf
+    err = np.max(np.abs(g - g_num)) / max(np.max(np.abs(g_num)), np.finfo(float).tiny)
+    if not err <= rtol:
+        module_logger.warning('check_grad: analytic and numerical gradients differ (relative error: {})'.format(err))
+    return err
+
 minimize_sparse_bfgs = minimize_sparse_bfgs1
 
-__all__ = [ 'BFGSResult', 'minimize_sparse_bfgs', 'minimize_sparse_bfgs0', 'minimize_sparse_bfgs1', 'SparseFunction', 'wolfe_line_search', 'sparse_grad' ]
+__all__ = [ 'BFGSResult', 'minimize_sparse_bfgs', 'minimize_sparse_bfgs0', 'minimize_sparse_bfgs1', 'sbfgs_pool', 'SparseFunction', 'wolfe_line_search', 'sparse_grad', 'vectorize_local', 'local_grad_sum', 'check_local_grad', 'check_grad' ]
 
@@ -13,7 +13,9 @@
 
 
 from .base import *
+from .counters import record_optimization
 from .gradient import *
+from .optimization import check_grad
 from warnings import warn
 from math import pi, log
 import numpy as np
@@ -31,6 +33,8 @@ setup = {'name': ('standard.d', 'smooth.d'),
         ('min_diffusivity',     dict(type=float, help='minimum diffusivity value allowed')),
         ('max_iter',        dict(type=int, help='maximum number of iterations')),
         ('rgrad',       dict(help="alternative gradient for the regularization; can be 'delta'/'delta0' or 'delta1'")),
+        ('vectorized',      dict(action='store_true', help='evaluate the posterior and its gradient for all the cells at once')),
+        ('check_jac',       dict(action='store_true', help='compare the analytic gradient of the posterior with a numerical estimate')),
         ('tol',             dict(type=float, help='tolerance for scipy minimizer')))),
     'cell_sampling': 'group'}
 setup_with_grad_arguments(setup)
@@ -86,7 +90,7 @@ def smooth_d_neg_posterior(diffusivity, cells, sigma2, diffusivity_prior, \
         # posterior calculations
         if cell.cache is None:
             cell.cache = dict(dr2=None)
-        if cell.cache['dr2'] is None:
+        if cell.cache.get('dr2') is None:
             cell.cache['dr2'] = np.sum(cell.dr * cell.dr, axis=1) # dx**2 + dy**2 + ..
         D_dt = 4. * (diffusivity[j] * cell.dt + noise_dt) # 4*(D+Dnoise)*dt
         result += n * log(pi) + np.sum(np.log(D_dt)) # sum(log(4*pi*Dtot*dt))
@@ -122,7 +126,7 @@ def d_neg_posterior1(diffusivity, cells, sigma2, diffusivity_prior, \
         # posterior calculations
         if cell.cache is None:
             cell.cache = dict(dr2=None)
-        if cell.cache['dr2'] is None:
+        if cell.cache.get('dr2') is None:
             cell.cache['dr2'] = np.sum(cell.dr * cell.dr, axis=1) # dx**2 + dy**2 + ..
         D_dt = 4. * (diffusivity[j] * cell.dt + noise_dt) # 4*(D+Dnoise)*dt
         result += n * log(pi) + np.sum(np.log(D_dt)) # sum(log(4*pi*Dtot*dt))
@@ -138,8 +142,112 @@ def d_neg_posterior1(diffusivity, cells, sigma2, diffusivity_prior, \
     return result
 
 
+def smooth_d_neg_posterior_grad(diffusivity, cells, sigma2, diffusivity_prior, \
+    jeffreys_prior, dt_mean, min_diffusivity, index, reverse_index, grad_kwargs):
+    """
+    Gradient of :func:`smooth_d_neg_posterior`.
+
+    Requires :meth:`~tramway.inference.base.Distributed.grad_operator`
+    if `diffusivity_prior` is defined.
+    """
+    prior_operator = None
+    if diffusivity_prior:
+        prior_operator = cells.grad_operator(index, reverse_index, **grad_kwargs)
+    return _d_neg_posterior_grad(diffusivity, cells, sigma2, diffusivity_prior, \
+        prior_operator, jeffreys_prior, dt_mean, index)
+
+
+def d_neg_posterior1_grad(diffusivity, cells, sigma2, diffusivity_prior, \
+    jeffreys_prior, dt_mean, min_diffusivity, index, reverse_index, grad_kwargs):
+    """
+    Gradient of :func:`d_neg_posterior1`.
+
+    Requires :meth:`~tramway.inference.base.Distributed.local_variation_operator`
+    if `diffusivity_prior` is defined.
+    """
+    prior_operator = None
+    if diffusivity_prior:
+        prior_operator = cells.local_variation_operator(index, reverse_index, **grad_kwargs)
+    return _d_neg_posterior_grad(diffusivity, cells, sigma2, diffusivity_prior, \
+        prior_operator, jeffreys_prior, dt_mean, index)
+
+
+def _d_neg_posterior_grad(diffusivity, cells, sigma2, diffusivity_prior, prior_operator, \
+    jeffreys_prior, dt_mean, index):
+    noise_dt = sigma2
+    grad = np.zeros_like(diffusivity)
+    for j, i in enumerate(index):
+        cell = cells[i]
+        # posterior calculations
+        if cell.cache is None:
+            cell.cache = dict(dr2=None)
+        if cell.cache.get('dr2') is None:
+            cell.cache['dr2'] = np.sum(cell.dr * cell.dr, axis=1) # dx**2 + dy**2 + ..
+        D_dt = 4. * (diffusivity[j] * cell.dt + noise_dt) # 4*(D+Dnoise)*dt
+        # d(D_dt)/dD = 4*dt
+        grad[j] = np.sum(4. * cell.dt / D_dt * (1. - cell.cache['dr2'] / D_dt))
+    # prior
+    if diffusivity_prior:
+        # `grad_sum` is linear in its `grad` argument
+        weights = np.array([ cells.grad_sum(i, 1.) for i in index ])
+        _, prior_grad = prior_operator.sum_of_squares(diffusivity, weights, grad=True)
+        grad += diffusivity_prior * prior_grad
+    if jeffreys_prior:
+        grad += 2. * dt_mean / (diffusivity * dt_mean + sigma2)
+    return grad
+
+
+def smooth_d_neg_posterior_vectorized(diffusivity, dr2, dt, bounds, sigma2, diffusivity_prior,
+    prior_operator, prior_weights, jeffreys_prior, dt_mean, min_diffusivity):
+    """
+    Whole-mesh implementation of :func:`smooth_d_neg_posterior` and :func:`d_neg_posterior1`.
+
+    The translocations of all the cells are concatenated (see also
+    :func:`~tramway.inference.base.concat_translocations`) and the smoothing prior
+    is a precompiled :class:`~tramway.inference.gradient.StencilOperator`.
+
+    Returns:
+
+        (float, numpy.ndarray): negative posterior and its gradient.
+    """
+    if min_diffusivity is not None:
+        observed_min = np.min(diffusivity)
+        if observed_min < min_diffusivity and not np.isclose(observed_min, min_diffusivity):
+            warn(DiffusivityWarning(observed_min, min_diffusivity))
+    noise_dt = sigma2
+    starts = bounds[:-1]
+    # posterior calculations
+    D_dt = 4. * (np.repeat(diffusivity, np.diff(bounds)) * dt + noise_dt) # 4*(D+Dnoise)*dt
+    dr2_over_D_dt = dr2 / D_dt
+    result = dt.size * log(pi) + np.sum(np.log(D_dt)) + np.sum(dr2_over_D_dt)
+    # d(D_dt)/dD = 4*dt
+    grad = np.add.reduceat(4. * dt / D_dt * (1. - dr2_over_D_dt), starts)
+    # prior
+    if diffusivity_prior:
+        prior, prior_grad = prior_operator.sum_of_squares(diffusivity, prior_weights, grad=True)
+        result += diffusivity_prior * prior
+        grad += diffusivity_prior * prior_grad
+    if jeffreys_prior:
+        D_dt_mean = diffusivity * dt_mean + sigma2
+        result += 2. * np.sum(np.log(D_dt_mean))
+        grad += 2. * dt_mean / D_dt_mean
+    return result, grad
+
+
 def infer_smooth_D(cells, diffusivity_prior=None, jeffreys_prior=None, \
-    min_diffusivity=None, max_iter=None, epsilon=None, rgrad=None, verbose=False, **kwargs):
+    min_diffusivity=None, max_iter=None, epsilon=None, rgrad=None, vectorized=False, \
+    check_jac=False, verbose=False, **kwargs):
+    """
+    The gradient of the posterior is passed to the minimizer, unless the spatial gradient
+    or local variation is not available as a sparse operator (see also
+    :meth:`~tramway.inference.base.Distributed.grad_operator` and
+    :meth:`~tramway.inference.base.Distributed.local_variation_operator`).
+    Argument `check_jac` compares this gradient with a numerical estimate at the initial point
+    (see also :func:`~tramway.inference.optimization.check_grad`).
+
+    Argument `vectorized` switches to :func:`smooth_d_neg_posterior_vectorized`,
+    with the same requirements.
+    """
 
     # initial values
     localization_error = cells.get_localization_error(kwargs, 0.03, True)
@@ -171,16 +279,47 @@ def infer_smooth_D(cells, diffusivity_prior=None, jeffreys_prior=None, \
 
     # posterior function
     if rgrad in ('delta','delta0','delta1'):
-        fun = d_neg_posterior1
+        fun, jac = d_neg_posterior1, d_neg_posterior1_grad
     else:
         if rgrad not in (None, 'grad', 'grad1', 'gradn'):
             warn('unsupported rgrad: {}'.format(rgrad), RuntimeWarning)
-        fun = smooth_d_neg_posterior
+        fun, jac = smooth_d_neg_posterior, smooth_d_neg_posterior_grad
 
     args = (cells, localization_error, diffusivity_prior, jeffreys_prior, dt_mean, min_diffusivity, index, reverse_index, grad_kwargs)
 
+    prior_operator = prior_weights = None
+    if diffusivity_prior:
+        if fun is d_neg_posterior1:
+            prior_operator = cells.local_variation_operator(index, reverse_index, **grad_kwargs)
+        else:
+            prior_operator = cells.grad_operator(index, reverse_index, **grad_kwargs)
+    if prior_operator is None and diffusivity_prior:
+        jac = None
+    if 'jac' not in kwargs:
+        kwargs['jac'] = jac
+
+    if vectorized:
+        if jac is None:
+            warn('custom spatial gradients are not supported by the vectorized posterior', RuntimeWarning)
+        else:
+            if diffusivity_prior:
+                # `grad_sum` is linear in its `grad` argument
+                prior_weights = np.array([ cells.grad_sum(i, 1.) for i in index ])
+            dr, dt, bounds = concat_translocations(cells, index)
+            dr2 = np.sum(dr * dr, axis=1)
+            fun = smooth_d_neg_posterior_vectorized
+            args = (dr2, dt, bounds, localization_error, diffusivity_prior,
+                    prior_operator, prior_weights, jeffreys_prior, dt_mean, min_diffusivity)
+            kwargs['jac'] = True
+
+    if check_jac and kwargs['jac']:
+        err = check_grad(fun, kwargs['jac'], D_initial, args)
+        if verbose:
+            print('relative error of the posterior gradient: {}'.format(err))
+
     # run the optimization
     result = minimize(fun, D_initial, args=args, **kwargs)
+    record_optimization(result)
     if not (result.success or verbose):
         warn('{}'.format(result.message), OptimizationWarning)
 
@@ -14,7 +14,9 @@
 
 from tramway.core import ChainArray
 from .base import *
+from .counters import record_optimization
 from .gradient import *
+from .optimization import check_grad
 from warnings import warn
 from math import pi, log
 import numpy as np
@@ -33,6 +35,7 @@ setup = {'name': ('standard.dd', 'standard.ddrift', 'smooth.dd', 'smooth.ddrift'
         ('min_diffusivity', dict(type=float, help='minimum diffusivity value allowed')),
         ('max_iter',        dict(type=int, help='maximum number of iterations')),
         ('rgrad',   dict(help="alternative gradient for the regularization; can be 'delta'/'delta0' or 'delta1'")),
+        ('check_jac',       dict(action='store_true', help='compare the analytic gradient of the posterior with a numerical estimate')),
         ('tol',             dict(type=float, help='tolerance for scipy minimizer')))),
     'cell_sampling': 'group'}
 setup_with_grad_arguments(setup)
@@ -108,8 +111,74 @@ def dd_neg_posterior1(x, dd, cells, sigma2, diffusivity_prior, drift_prior,
     return result
 
 
+def smooth_dd_neg_posterior_grad(x, dd, cells, sigma2, diffusivity_prior, drift_prior,
+        jeffreys_prior, dt_mean, min_diffusivity, index, reverse_index, grad_kwargs):
+    """
+    Gradient of :func:`smooth_dd_neg_posterior`.
+    """
+    prior_operator = None
+    if diffusivity_prior:
+        prior_operator = cells.grad_operator(index, reverse_index, **grad_kwargs)
+    return _dd_neg_posterior_grad(x, dd, cells, sigma2, diffusivity_prior, prior_operator,
+            drift_prior, jeffreys_prior, dt_mean, index)
+
+
+def dd_neg_posterior1_grad(x, dd, cells, sigma2, diffusivity_prior, drift_prior,
+        jeffreys_prior, dt_mean, min_diffusivity, index, reverse_index, grad_kwargs):
+    """
+    Gradient of :func:`dd_neg_posterior1`.
+    """
+    prior_operator = None
+    if diffusivity_prior:
+        prior_operator = cells.local_variation_operator(index, reverse_index, **grad_kwargs)
+    return _dd_neg_posterior_grad(x, dd, cells, sigma2, diffusivity_prior, prior_operator,
+            drift_prior, jeffreys_prior, dt_mean, index)
+
+
+def _dd_neg_posterior_grad(x, dd, cells, sigma2, diffusivity_prior, prior_operator,
+        drift_prior, jeffreys_prior, dt_mean, index):
+    # extract `D` and `drift`
+    dd.update(x)
+    D, drift = dd['D'], dd['drift']
+    #
+    noise_dt = sigma2
+    grad_D, grad_drift = np.zeros_like(D), np.zeros_like(drift)
+    # for all cell
+    for j, i in enumerate(index):
+        cell = cells[i]
+        denominator = 4. * (D[j] * cell.dt + noise_dt) # 4*(D+Dnoise)*dt
+        dr_minus_drift_dt = cell.dr - np.outer(cell.dt, drift[j])
+        ndsd = np.sum(dr_minus_drift_dt * dr_minus_drift_dt, axis=1)
+        # d(denominator)/dD = 4*dt
+        grad_D[j] = np.sum(4. * cell.dt / denominator * (1. - ndsd / denominator))
+        # d(ndsd)/d(drift) = -2*dt*(dr-drift*dt)
+        grad_drift[j] = -2. * np.dot(cell.dt / denominator, dr_minus_drift_dt)
+    # priors
+    if diffusivity_prior or drift_prior:
+        # `grad_sum` is linear in its `grad` argument
+        weights = np.array([ cells.grad_sum(i, 1.) for i in index ])
+    if diffusivity_prior:
+        _, prior_grad = prior_operator.sum_of_squares(D, weights, grad=True)
+        grad_D += diffusivity_prior * prior_grad
+    if drift_prior:
+        grad_drift += 2. * drift_prior * np.sum(weights) * drift
+    if jeffreys_prior:
+        grad_D += 2. * dt_mean / (D * dt_mean + sigma2)
+    grad = np.empty_like(x)
+    dd.set(grad, 'D', grad_D)
+    dd.set(grad, 'drift', grad_drift)
+    return grad
+
+
 def infer_smooth_DD(cells, diffusivity_prior=None, drift_prior=None, jeffreys_prior=False,
-    min_diffusivity=None, max_iter=None, epsilon=None, rgrad=None, verbose=False, **kwargs):
+    min_diffusivity=None, max_iter=None, epsilon=None, rgrad=None, check_jac=False,
+    verbose=False, **kwargs):
+    """
+    The gradient of the posterior is passed to the minimizer, unless the spatial gradient
+    or local variation of the diffusivity is not available as a sparse operator
+    (see also :meth:`~tramway.inference.base.Distributed.grad_operator`).
+    Argument `check_jac` compares this gradient with a numerical estimate at the initial point.
+    """
 
     # initial values
     localization_error = cells.get_localization_error(kwargs, 0.03, True)
@@ -144,17 +213,28 @@ def infer_smooth_DD(cells, diffusivity_prior=None, drift_prior=None, jeffreys_pr
 
     # posterior function
     if rgrad in ('delta','delta0','delta1'):
-        fun = dd_neg_posterior1
+        fun, jac = dd_neg_posterior1, dd_neg_posterior1_grad
+        operator = cells.local_variation_operator
     else:
         if rgrad not in (None, 'grad', 'grad1', 'gradn'):
             warn('unsupported rgrad: {}'.format(rgrad), RuntimeWarning)
-        fun = smooth_dd_neg_posterior
+        fun, jac = smooth_dd_neg_posterior, smooth_dd_neg_posterior_grad
+        operator = cells.grad_operator
+    if diffusivity_prior and operator(index, reverse_index, **grad_kwargs) is None:
+        jac = None
+    if 'jac' not in kwargs:
+        kwargs['jac'] = jac
 
     # run the optimization
     #cell.cache = None # no cache needed
     args = (dd, cells, localization_error, diffusivity_prior, drift_prior, jeffreys_prior, \
             dt_mean, min_diffusivity, index, reverse_index, grad_kwargs)
+    if check_jac and kwargs['jac']:
+        err = check_grad(fun, kwargs['jac'], dd.combined, args)
+        if verbose:
+            print('relative error of the posterior gradient: {}'.format(err))
     result = minimize(fun, dd.combined, args=args, **kwargs)
+    record_optimization(result)
     if not (result.success or verbose):
         warn('{}'.format(result.message), OptimizationWarning)
 
@@ -14,7 +14,9 @@
 
 from tramway.core import ChainArray
 from .base import *
+from .counters import record_optimization
 from .gradient import *
+from .optimization import check_grad
 from warnings import warn
 from math import pi, log
 import numpy as np
@@ -34,6 +36,7 @@ setup = {'name': ('standard.df', 'smooth.df'),
         ('min_diffusivity',     dict(type=float, help='minimum diffusivity value allowed')),
         ('max_iter',        dict(type=int, help='maximum number of iterations')),
         ('rgrad',       dict(help="alternative gradient for the regularization; can be 'delta'/'delta0' or 'delta1'")),
+        ('check_jac',       dict(action='store_true', help='compare the analytic gradient of the posterior with a numerical estimate')),
         ('tol',             dict(type=float, help='tolerance for scipy minimizer')))),
     'cell_sampling': 'group'}
 setup_with_grad_arguments(setup)
@@ -113,11 +116,79 @@ def df_neg_posterior1(x, df, cells, sigma2, diffusivity_prior,
     return result
 
 
+def smooth_df_neg_posterior_grad(x, df, cells, sigma2, diffusivity_prior,
+        force_prior, jeffreys_prior, dt_mean, min_diffusivity,
+        index, reverse_index, grad_kwargs):
+    """
+    Gradient of :func:`smooth_df_neg_posterior`.
+    """
+    prior_operator = None
+    if diffusivity_prior:
+        prior_operator = cells.grad_operator(index, reverse_index, **grad_kwargs)
+    return _df_neg_posterior_grad(x, df, cells, sigma2, diffusivity_prior, prior_operator,
+            force_prior, jeffreys_prior, dt_mean, index)
+
+
+def df_neg_posterior1_grad(x, df, cells, sigma2, diffusivity_prior,
+        force_prior, jeffreys_prior, dt_mean, min_diffusivity,
+        index, reverse_index, grad_kwargs):
+    """
+    Gradient of :func:`df_neg_posterior1`.
+    """
+    prior_operator = None
+    if diffusivity_prior:
+        prior_operator = cells.local_variation_operator(index, reverse_index, **grad_kwargs)
+    return _df_neg_posterior_grad(x, df, cells, sigma2, diffusivity_prior, prior_operator,
+            force_prior, jeffreys_prior, dt_mean, index)
+
+
+def _df_neg_posterior_grad(x, df, cells, sigma2, diffusivity_prior, prior_operator,
+        force_prior, jeffreys_prior, dt_mean, index):
+    # extract `D` and `F`
+    df.update(x)
+    D, F = df['D'], df['F']
+    #
+    noise_dt = sigma2
+    grad_D, grad_F = np.zeros_like(D), np.zeros_like(F)
+    # for all cell
+    for j, i in enumerate(index):
+        cell = cells[i]
+        D_dt = D[j] * cell.dt
+        denominator = 4. * (D_dt + noise_dt) # 4*(D+Dnoise)*dt
+        dr_minus_drift_dt = cell.dr - np.outer(D_dt, F[j])
+        ndsd = np.sum(dr_minus_drift_dt * dr_minus_drift_dt, axis=1)
+        # d(denominator)/dD = 4*dt and d(ndsd)/dD = -2*dt*F.(dr-D*dt*F)
+        grad_D[j] = np.sum(4. * cell.dt / denominator * (1. - ndsd / denominator)) \
+                - 2. * np.sum(cell.dt / denominator * np.dot(dr_minus_drift_dt, F[j]))
+        # d(ndsd)/dF = -2*D*dt*(dr-D*dt*F)
+        grad_F[j] = -2. * np.dot(D_dt / denominator, dr_minus_drift_dt)
+    # priors
+    if diffusivity_prior or force_prior:
+        # `grad_sum` is linear in its `grad` argument
+        weights = np.array([ cells.grad_sum(i, 1.) for i in index ])
+    if diffusivity_prior:
+        _, prior_grad = prior_operator.sum_of_squares(D, weights, grad=True)
+        grad_D += diffusivity_prior * prior_grad
+    if force_prior:
+        grad_F += 2. * force_prior * np.sum(weights) * F
+    if jeffreys_prior:
+        grad_D += 2. * (dt_mean / (D * dt_mean + sigma2) - 1. / D)
+    grad = np.empty_like(x)
+    df.set(grad, 'D', grad_D)
+    df.set(grad, 'F', grad_F)
+    return grad
+
+
 def infer_smooth_DF(cells, diffusivity_prior=None, force_prior=None, potential_prior=None,
         jeffreys_prior=False, min_diffusivity=None, max_iter=None, epsilon=None, rgrad=None,
-        verbose=False, **kwargs):
+        check_jac=False, verbose=False, **kwargs):
     """
     Argument `potential_prior` is an alias for `force_prior` which penalizes the large force amplitudes.
+
+    The gradient of the posterior is passed to the minimizer, unless the spatial gradient
+    or local variation of the diffusivity is not available as a sparse operator
+    (see also :meth:`~tramway.inference.base.Distributed.grad_operator`).
+    Argument `check_jac` compares this gradient with a numerical estimate at the initial point.
     """
 
     # initial values
@@ -153,11 +224,17 @@ def infer_smooth_DF(cells, diffusivity_prior=None, force_prior=None, potential_p
 
     # posterior function
     if rgrad in ('delta','delta0','delta1'):
-        fun = df_neg_posterior1
+        fun, jac = df_neg_posterior1, df_neg_posterior1_grad
+        operator = cells.local_variation_operator
     else:
         if rgrad not in (None, 'grad', 'grad1', 'gradn'):
             warn('unsupported rgrad: {}'.format(rgrad), RuntimeWarning)
-        fun = smooth_df_neg_posterior
+        fun, jac = smooth_df_neg_posterior, smooth_df_neg_posterior_grad
+        operator = cells.grad_operator
+    if diffusivity_prior and operator(index, reverse_index, **grad_kwargs) is None:
+        jac = None
+    if 'jac' not in kwargs:
+        kwargs['jac'] = jac
 
     if force_prior is None:
         if potential_prior is not None:
@@ -168,7 +245,12 @@ def infer_smooth_DF(cells, diffusivity_prior=None, force_prior=None, potential_p
     # run the optimization
     #cell.cache = None # no cache needed
     args = (df, cells, localization_error, diffusivity_prior, force_prior, jeffreys_prior, dt_mean, min_diffusivity, index, reverse_index, grad_kwargs)
+    if check_jac and kwargs['jac']:
+        err = check_grad(fun, kwargs['jac'], df.combined, args)
+        if verbose:
+            print('relative error of the posterior gradient: {}'.format(err))
     result = minimize(fun, df.combined, args=args, **kwargs)
+    record_optimization(result)
     if not (result.success or verbose):
         warn('{}'.format(result.message), OptimizationWarning)
 
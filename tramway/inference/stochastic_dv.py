@@ -13,6 +13,7 @@
 
 
 from .base import *
+from .counters import record_optimization
 from .gradient import *
 from .dv import DV
 from .optimization import *
@@ -331,6 +332,231 @@ def local_dv_neg_posterior(j, x, dv, cells, sigma2, jeffreys_prior,
 
     return result
 
+def local_dv_neg_posterior_grad(j, x, dv, cells, sigma2, jeffreys_prior,
+    dt_mean, index, reverse_index, grad_kwargs,
+    posterior_info=None, iter_num=None, verbose=False):
+    """
+    Analytic gradient of :func:`local_dv_neg_posterior`.
+
+    The spatial gradient and local variation must be available as stencil operators
+    (see also :meth:`~tramway.inference.base.Distributed.grad_operator` and
+    :meth:`~tramway.inference.base.Distributed.local_variation_operator`).
+
+    Returns:
+
+        (numpy.ndarray, numpy.ndarray): indices in `x` and the corresponding partial derivatives;
+            indices may be repeated.
+    """
+    m = int(x.size/2)
+    D, V = x[:m], x[m:]
+    Dj = D[j]
+
+    noise_dt = sigma2
+
+    i = index[j]
+    cell = cells[i]
+
+    grad_operator = cells.grad_operator(index, reverse_index, **grad_kwargs)
+    variation_operator = cells.local_variation_operator(index, reverse_index, **grad_kwargs)
+
+    indices, derivatives = [np.array([j])], []
+
+    # spatial gradient of the local potential energy
+    stencil = grad_operator.local(j)
+    if stencil is None:
+        gradV = None
+    else:
+        columns, coefficients, undefined = stencil
+        gradV = coefficients[0].dot(V[columns])
+        if undefined is not None:
+            gradV[undefined[0]] = grad_operator.na
+    if gradV is None or np.any(np.isnan(gradV)):
+        gradV = np.zeros(cell.dim)
+        stencil = None
+
+    # posterior terms
+    D_dt = Dj * cell.dt
+    denominator = 4. * (D_dt + noise_dt)
+    dr_minus_drift = cell.dr + np.outer(D_dt, gradV)
+    ndsd = np.sum(dr_minus_drift * dr_minus_drift, axis=1)
+    # d(denominator)/dD = 4*dt and d(ndsd)/dD = 2*dt*gradV.(dr+D*dt*gradV)
+    dDj = np.sum(4. * cell.dt / denominator * (1. - ndsd / denominator)) \
+            + 2. * np.sum(cell.dt / denominator * np.dot(dr_minus_drift, gradV))
+    if stencil is not None:
+        # d(ndsd)/d(gradV) = 2*D*dt*(dr+D*dt*gradV)
+        d_gradV = 2. * np.dot(D_dt / denominator, dr_minus_drift)
+        if undefined is not None:
+            d_gradV[undefined[0]] = 0.
+        indices.append(m + columns)
+        derivatives.append(np.dot(d_gradV, coefficients[0]))
+
+    # priors; `grad_sum` is linear in its `grad` argument
+    V_prior = dv.potential_spatial_prior(j)
+    D_prior = dv.diffusivity_spatial_prior(j)
+    if V_prior or D_prior:
+        weight = cells.grad_sum(i, 1., reverse_index)
+        stencil = variation_operator.local(j)
+        if stencil is not None:
+            columns, coefficients, undefined = stencil
+            for prior, X, offset in ((V_prior, V, m), (D_prior, D, 0)):
+                if prior:
+                    delta = np.dot(coefficients, X[columns])
+                    if undefined is not None:
+                        delta[undefined] = 0.
+                    indices.append(offset + columns)
+                    derivatives.append(2. * prior * weight * np.tensordot(delta, coefficients, 2))
+    if jeffreys_prior:
+        dDj += jeffreys_prior * 2. * dt_mean[j] / (Dj * dt_mean[j] + sigma2) - 1. / Dj
+
+    D_time_prior = dv.diffusivity_time_prior(i)
+    if D_time_prior:
+        time_grad = _temporal_variation_grad(cells, i, D, reverse_index)
+        if time_grad is not None:
+            columns, dXdt2 = time_grad
+            indices.append(columns)
+            derivatives.append(D_time_prior * dXdt2)
+    V_time_prior = dv.potential_time_prior(i)
+    if V_time_prior:
+        time_grad = _temporal_variation_grad(cells, i, V, reverse_index)
+        if time_grad is not None:
+            columns, dXdt2 = time_grad
+            indices.append(m + columns)
+            derivatives.append(V_time_prior * dXdt2)
+
+    derivatives.insert(0, np.array([dDj]))
+    return np.concatenate(indices), np.concatenate(derivatives)
+
+def _temporal_variation_grad(cells, i, X, index_map):
+    """
+    Gradient of the sum of the squared temporal variations of `X` at cell `i`.
+
+    The temporal variation is linear in `X` and is evaluated at unit vectors
+    for each temporal neighbour.
+
+    Returns the indices in `X` and the corresponding partial derivatives,
+    or ``None`` if the temporal variation is not defined.
+    """
+    dXdt = cells.temporal_variation(i, X, index_map)
+    if dXdt is None:
+        return None
+    A = cells.time_adjacency
+    columns = index_map[np.r_[i, A.indices[A.indptr[i]:A.indptr[i+1]]]]
+    e = np.zeros_like(X)
+    derivatives = np.empty(columns.size, dtype=float)
+    for k, c in enumerate(columns):
+        e[c] = 1.
+        derivatives[k] = 2. * np.dot(dXdt, cells.temporal_variation(i, e, index_map))
+        e[c] = 0.
+    return columns, derivatives
+
+def local_dv_neg_posterior_vectorized(J, X, dv, cells, sigma2, jeffreys_prior,
+    dt_mean, index, reverse_index, grad_kwargs,
+    posterior_info=None, iter_num=None, verbose=False):
+    """
+    Vectorized :func:`local_dv_neg_posterior`.
+
+    The *k*-th returned value is the local posterior at cell `J[k]` for parameter vector `X[k]`.
+
+    The spatial gradients and variations are evaluated with the stencil operators
+    (see :meth:`~tramway.inference.base.Distributed.grad_operator`).
+    Falls back to :func:`local_dv_neg_posterior` if the operators are not available,
+    or the temporal priors or delayed priors are enabled.
+    """
+    J = np.asarray(J)
+    X = np.atleast_2d(X)
+    grad_operator = cells.grad_operator(index, reverse_index, **grad_kwargs)
+    variation_operator = cells.local_variation_operator(index, reverse_index, **grad_kwargs)
+    if grad_operator is None or variation_operator is None or \
+            dv.prior_delay or dv._diffusivity_time_prior or dv._potential_time_prior or \
+            posterior_info is not None or verbose:
+        return np.array([ local_dv_neg_posterior(j, x, dv, cells, sigma2, jeffreys_prior,
+                dt_mean, index, reverse_index, grad_kwargs, posterior_info, iter_num, verbose)
+            for j, x in zip(J, X) ])
+
+    m = int(X.shape[1] / 2)
+    D, V = X[:,:m], X[:,m:]
+    noise_dt = sigma2
+
+    result = np.empty(J.size, dtype=float)
+    for j in np.unique(J):
+        k = np.flatnonzero(J == j)
+        Dj = X[k,j]
+        if np.any(np.isnan(Dj)):
+            raise ValueError('D is nan')
+
+        # for all cell
+        i = index[j]
+        cell = cells[i]
+        n = len(cell) # number of translocations
+
+        # spatial gradient of the local potential energy
+        gradV = _local_stencil(grad_operator, j, V[k])
+        if gradV is None:
+            gradV = np.full((k.size, cell.dim), np.nan)
+        else:
+            gradV = gradV[0]
+        undefined = np.any(np.isnan(gradV), axis=1)
+        if np.any(undefined):
+            dv.undefined_grad(i, 'V')
+            gradV[undefined] = 0.
+
+        # various posterior terms; one row per parameter vector
+        D_dt = np.outer(Dj, cell.dt)
+        denominator = 4. * (D_dt + noise_dt)
+        if np.any(denominator <= 0):
+            raise ValueError('undefined posterior; local diffusion value: %s', Dj)
+        dr_minus_drift = cell.dr[np.newaxis,:,:] + D_dt[:,:,np.newaxis] * gradV[:,np.newaxis,:]
+        # non-directional squared displacement
+        ndsd = np.sum(dr_minus_drift * dr_minus_drift, axis=2)
+        raw_posterior = n * log(pi) + np.sum(np.log(denominator), axis=1) \
+                + np.sum(ndsd / denominator, axis=1)
+
+        if np.any(np.isnan(raw_posterior)):
+            raise ValueError('undefined posterior; local diffusion value: %s', Dj)
+
+        # priors; `grad_sum` is linear in its `grad` argument
+        standard_priors = np.zeros(k.size)
+        V_prior = dv.potential_spatial_prior(j)
+        if V_prior:
+            deltaV = _local_stencil(variation_operator, j, V[k])
+            if deltaV is not None:
+                standard_priors += V_prior * cells.grad_sum(i, 1., reverse_index) * \
+                        np.sum(deltaV * deltaV, axis=(0,2))
+        D_prior = dv.diffusivity_spatial_prior(j)
+        if D_prior:
+            deltaD = _local_stencil(variation_operator, j, D[k])
+            if deltaD is not None:
+                standard_priors += D_prior * cells.grad_sum(i, 1., reverse_index) * \
+                        np.sum(deltaD * deltaD, axis=(0,2))
+        if jeffreys_prior:
+            if np.any(Dj <= 0):
+                raise ValueError('non positive diffusivity')
+            standard_priors += jeffreys_prior * 2. * np.log(Dj * dt_mean[j] + sigma2) - np.log(Dj)
+
+        result[k] = raw_posterior + standard_priors
+
+    return result
+
+def _local_stencil(operator, j, X):
+    """
+    Apply the rows of `operator` associated with cell `j` to the measurement vectors
+    in the rows of `X`.
+
+    Returns an array with as many rows as operator rows for cell `j`, as many columns as
+    rows in `X` and a third dimension for the output components, or ``None`` if the operator
+    is not defined at cell `j`.
+    """
+    stencil = operator.local(j)
+    if stencil is None:
+        return None
+    columns, coefficients, undefined = stencil
+    Y = np.tensordot(coefficients, X[:,columns], axes=([2],[1])).transpose((0,2,1))
+    if undefined is not None:
+        Y[np.repeat(undefined[:,np.newaxis,:], X.shape[0], axis=1)] = operator.na
+    return Y
+
+vectorize_local(local_dv_neg_posterior, local_dv_neg_posterior_vectorized)
+
 def _local_dv_neg_posterior(*args, **kwargs):
     try:
         return local_dv_neg_posterior(*args, **kwargs)
@@ -348,8 +574,12 @@ def infer_stochastic_DV(cells,
     diffusion_prior=None, diffusion_spatial_prior=None, diffusion_time_prior=None,
     prior_delay=None, return_struct=False, posterior_max_count=None,# deprecated
     diffusivity_prior=None, potential_prior=None, time_prior=None,
-    **kwargs):
+    check_jac=False, pool=None, **kwargs):
     """
+    The local gradients of the posterior are calculated analytically
+    (see :func:`local_dv_neg_posterior_grad`), unless the spatial gradient or local variation
+    is not available as a sparse operator, or argument `jac` is ``None``.
+
     Arguments:
 
         ...
@@ -392,6 +622,15 @@ def infer_stochastic_DV(cells,
             candidate updated component;
             required to compute the 'diagnoses' debug variable.
 
+        check_jac (bool): compare the analytic local gradients with numerical estimates
+            at the initial point, for a sample of at most 100 components
+            (see also :func:`~tramway.inference.optimization.check_local_grad`).
+
+        pool (tramway.core.parallel.WorkerPool): long-lived workers
+            (see :func:`~tramway.inference.optimization.sbfgs_pool`);
+            the workers are spawned again if their resident data differ from the
+            previous run's.
+
         prior_delay/return_struct/posterior_max_count: all deprecated.
 
         ...
@@ -537,11 +776,30 @@ def infer_stochastic_DV(cells,
         if 'gradient_covariate' not in sbfgs_kwargs:
             sbfgs_kwargs['gradient_covariate'] = col2rows
 
+    # analytic local gradient
+    if 'jac' not in sbfgs_kwargs:
+        if cells.grad_operator(index, reverse_index, **grad_kwargs) is None or \
+                cells.local_variation_operator(index, reverse_index, **grad_kwargs) is None:
+            sbfgs_kwargs['jac'] = None
+        else:
+            sbfgs_kwargs['jac'] = local_dv_neg_posterior_grad
+    if check_jac and sbfgs_kwargs['jac'] is not None:
+        if stochastic:
+            components = range(0, component, max(1, component // 100))
+        else:
+            components = [0]
+        err = check_local_grad(local_dv_neg_posterior, sbfgs_kwargs['jac'], dv.combined,
+                components, covariate, gradient_subspace, args[:-1])
+        if verbose:
+            logger.info('relative error of the posterior gradient: {}'.format(err))
+
     if os.name == 'nt':
         if sbfgs_kwargs.get('worker_count', None):
             logger.warning('multiprocessing may break on Windows')
         else:
             sbfgs_kwargs['worker_count'] = 0
+    if pool is not None:
+        sbfgs_kwargs['pool'] = pool
 
     # other arguments
     if verbose:
@@ -595,6 +853,7 @@ def infer_stochastic_DV(cells,
     # run the optimization routine
     result = minimize_sparse_bfgs(local_dv_neg_posterior, dv.combined, component, covariate,
             gradient_subspace, descent_subspace, args, **sbfgs_kwargs)
+    record_optimization(result)
     #if not (result.success or verbose):
     #    warn('{}'.format(result.message), OptimizationWarning)
 
@@ -860,18 +860,52 @@ class Delaunay(Tessellation):
     Attributes:
         cell_centers (numpy.ndarray): coordinates of the cell centers.
     """
-    __slots__ = ('_cell_centers',)
+    __slots__ = ('_cell_centers', '_cell_center_tree')
 
     def __init__(self, scaler=None):
         Tessellation.__init__(self, scaler)
         self._cell_centers = None
+        self._cell_center_tree = None
 
     def tessellate(self, points):
         self._cell_centers = np.asarray(self._preprocess(points))
 
+    @property
+    def cell_center_tree(self):
+        """
+        :class:`scipy.spatial.cKDTree` of the scaled cell centers.
+
+        The tree is built on demand and reused as long as :attr:`cell_centers`
+        are not redefined.
+        Cells with non-finite center coordinates (e.g. deleted cells) are not included;
+        see :meth:`_cell_center_tree_cells` to map the tree indices to cell indices.
+        """
+        return self._cell_center_tree_cells()[0]
+
+    def _cell_center_tree_cells(self):
+        """
+        Returns :attr:`cell_center_tree` and the cell indices of the tree points,
+        or ``None`` instead of the cell indices if all the cells are represented.
+        """
+        try:
+            centers, tree, cells = self._cell_center_tree
+        except (AttributeError, TypeError, ValueError):
+            # `_cell_center_tree` is undefined in objects loaded from files
+            centers = tree = cells = None
+        if tree is None or centers is not self._cell_centers:
+            finite = np.all(np.isfinite(self._cell_centers), axis=1)
+            if np.all(finite):
+                cells = None
+                tree = spatial.cKDTree(self._cell_centers)
+            else:
+                cells = np.flatnonzero(finite)
+                tree = spatial.cKDTree(self._cell_centers[cells])
+            self._cell_center_tree = (self._cell_centers, tree, cells)
+        return tree, cells
+
     def cell_index(self, points, format=None, select=None, knn=None, radius=None,
         min_location_count=None, metric='euclidean', filter=None,
-        filter_descriptors_only=False, **kwargs):
+        filter_descriptors_only=False, workers=1, **kwargs):
         """
         See :meth:`Tessellation.cell_index`.
 
@@ -915,10 +949,17 @@ class Delaunay(Tessellation):
                 included in the labeling.
             filter_descriptors_only (bool): whether `filter` should get points as
                 descriptors only.
+            workers (int): number of parallel workers for the nearest neighbour queries;
+                ``-1`` means all the available processors.
 
         Returns:
             see :meth:`Tessellation.cell_index`.
 
+        With the default euclidean metric and no extra keyword arguments for
+        :func:`~scipy.spatial.distance.cdist`, the points are assigned to the nearest
+        cell center using :attr:`cell_center_tree`, and no point-center distance
+        matrix is computed.
+
         """
         if self._cell_centers.size == 0:
             return format_cell_index(np.full(len(points), -1, dtype=int), format=format)
@@ -940,42 +981,50 @@ class Delaunay(Tessellation):
             min_r = max_r = radius
             if radius and not(min_nn or max_nn or min_location_count or filter):
                 return cell_index_by_radius(self, points, radius,
-                        format=format, select=select, metric=metric, **kwargs)
+                        format=format, select=select, metric=metric, workers=workers, **kwargs)
         points = self.scaler.scale_point(points, inplace=False)
         X = self.descriptors(points, asarray=True)
         Y = self._cell_centers
-        try:
-            D = cdist(X, Y, metric, **kwargs)
-        except MemoryError as e:
-            memory_error = e # make it available outside the except block
-            # slice X to process less rows at a time
-            if metric != 'euclidean':
-                raise #NotImplementedError
-            K = np.zeros(X.shape[0], dtype=int)
-            X2 = np.sum(X * X, axis=1, keepdims=True).astype(np.float32)
-            Y2 = np.sum(Y * Y, axis=1, keepdims=True).astype(np.float32)
-            X, Y = X.astype(np.float32), Y.astype(np.float32)
-            n = 0
-            while True:
-                n += 1
-                block = int(ceil(X.shape[0] * 2**(-n)))
-                try:
-                    np.empty((block, Y.shape[0]), dtype=X.dtype)
-                except MemoryError:
-                    pass # continue
-                else:
-                    break
-            n += 2 # safer
-            block = int(ceil(X.shape[0] * 2**(-n)))
-            for i in range(0, X.shape[0], block):
-                j = min(i+block, X2.size)
-                Di = np.dot(np.float32(-2.)* X[i:j], Y.T)
-                Di += X2[i:j]
-                Di += Y2.T
-                K[i:j] = np.argmin(Di, axis=1)
-            D = None
+        D = memory_error = None
+        if metric == 'euclidean' and not kwargs:
+            tree, cells = self._cell_center_tree_cells()
+        if metric == 'euclidean' and not kwargs and tree.n:
+            # nearest cell centers with a k-d tree
+            _, K = tree.query(X, workers=workers)
+            if cells is not None:
+                K = cells[K]
         else:
-            K = None
+            try:
+                D = cdist(X, Y, metric, **kwargs)
+            except MemoryError as e:
+                memory_error = e # make it available outside the except block
+                # slice X to process less rows at a time
+                if metric != 'euclidean':
+                    raise #NotImplementedError
+                K = np.zeros(X.shape[0], dtype=int)
+                X2 = np.sum(X * X, axis=1, keepdims=True).astype(np.float32)
+                Y2 = np.sum(Y * Y, axis=1, keepdims=True).astype(np.float32)
+                _X, _Y = X.astype(np.float32), Y.astype(np.float32)
+                n = 0
+                while True:
+                    n += 1
+                    block = int(ceil(X.shape[0] * 2**(-n)))
+                    try:
+                        np.empty((block, Y.shape[0]), dtype=_X.dtype)
+                    except MemoryError:
+                        pass # continue
+                    else:
+                        break
+                n += 2 # safer
+                block = int(ceil(X.shape[0] * 2**(-n)))
+                for i in range(0, X.shape[0], block):
+                    j = min(i+block, X2.size)
+                    Di = np.dot(np.float32(-2.)* _X[i:j], _Y.T)
+                    Di += X2[i:j]
+                    Di += Y2.T
+                    K[i:j] = np.argmin(Di, axis=1)
+            else:
+                K = None
         #
         ncells = self._cell_centers.shape[0]
         if format == 'force array':
@@ -986,13 +1035,38 @@ class Delaunay(Tessellation):
                 # D should be defined
                 K = np.argmin(D, axis=1) # cell indices
             nonempty, positive_count = np.unique(K, return_counts=True)
+            # sort the points by cell index once;
+            # points can only be excluded (`K[i] = -1`) in the following
+            order = np.argsort(K, kind='stable')
+            bounds = np.searchsorted(K[order], np.arange(ncells + 1))
+            def points_in(c):
+                # indices of the points currently assigned to cell `c`
+                i = order[bounds[c]:bounds[c+1]]
+                return i[K[i] == c]
+            def distance_to(i, c):
+                # distances of points `i` to the center of cell `c`
+                if D is None:
+                    d = X[i] - Y[[c]]
+                    return np.sqrt(np.sum(d * d, axis=1))
+                else:
+                    return D[i, c]
+            def nearest_points(c, k):
+                # indices of the `k` nearest points to the centers of cells `c`,
+                # as a k-by-len(c) array
+                if D is not None:
+                    return np.argsort(D[:,c], axis=0)[:k]
+                elif memory_error is not None:
+                    raise memory_error
+                else:
+                    _, i = spatial.cKDTree(X).query(Y[c], k=k, workers=workers)
+                    return np.reshape(i, (len(c), k)).T
             if filter is not None:
                 for c in nonempty:
-                    cell = K == c
+                    cell = points_in(c)
                     if filter_descriptors_only:
                         x = X[cell]
                     else:
-                        x = points[cell]
+                        x = points.iloc[cell] if isinstance(points, pd.DataFrame) else points[cell]
                     if not filter(self, c, x):
                         K[cell] = -1
             # min_location_count:
@@ -1001,7 +1075,7 @@ class Delaunay(Tessellation):
                 excluded_cells = positive_count < min_location_count
                 if np.any(excluded_cells):
                     for c in nonempty[excluded_cells]:
-                        K[K == c] = -1
+                        K[points_in(c)] = -1
                     # remove the excluded cells from nonempty and positive_count
                     ok = np.ones(nonempty.size, dtype=bool)
                     ok[excluded_cells] = False
@@ -1014,24 +1088,17 @@ class Delaunay(Tessellation):
                         _, _max = knn(c)
                         if _max is None or positive_count[i] <= _max:
                             continue
-                        if D is None:
-                            raise memory_error
-                        cell = K == c
-                        I = np.argsort(D[cell, c])
-                        cell, = cell.nonzero()
+                        cell = points_in(c)
+                        I = np.argsort(distance_to(cell, c))
                         excess = cell[I[_max:]]
                         K[excess] = -1
                 else:
                     large, = (max_nn < positive_count).nonzero()
-                    if large.size:
-                        if D is None:
-                            raise memory_error
-                        for c in nonempty[large]:
-                            cell = K == c
-                            I = np.argsort(D[cell, c])
-                            cell, = cell.nonzero()
-                            excess = cell[I[max_nn:]]
-                            K[excess] = -1
+                    for c in nonempty[large]:
+                        cell = points_in(c)
+                        I = np.argsort(distance_to(cell, c))
+                        excess = cell[I[max_nn:]]
+                        K[excess] = -1
             # max radius:
             if max_r:
                 excluded_cells = []
@@ -1040,14 +1107,8 @@ class Delaunay(Tessellation):
                         _, max_r = radius(c)
                         if max_r is None:
                             continue
-                    cell = K == c
-                    if D is None:
-                        d = X[cell] - Y[[c]]
-                        d = np.sqrt(np.sum(d * d, axis=1))
-                    else:
-                        d = D[cell, c]
-                    cell, = cell.nonzero()
-                    discard = max_r < d
+                    cell = points_in(c)
+                    discard = max_r < distance_to(cell, c)
                     K[cell[discard]] = -1
                     if np.all(discard):
                         excluded_cells.append(i)
@@ -1065,12 +1126,10 @@ class Delaunay(Tessellation):
                     for i, c in enumerate(nonempty):
                         _min, _ = knn(c)
                         if _min is None or _min <= positive_count[i]:
-                            Ic, = (K == c).nonzero()
+                            Ic = points_in(c)
                         else:
                             any_small = True
-                            if D is None:
-                                raise memory_error
-                            Ic = np.argsort(D[:,c])[:_min]
+                            Ic = nearest_points([c], min(_min, X.shape[0]))[:,0]
                         I.append(Ic)
                         n.append(len(Ic))
                     if any_small:
@@ -1084,30 +1143,24 @@ class Delaunay(Tessellation):
                         small = np.ones(ncells, dtype=bool)
                     small[nonempty] = positive_count < min_nn
                     if np.any(small):
-                        if D is None:
-                            raise memory_error
                         # small and missing cells
-                        if D.shape[0] < min_nn:
+                        if X.shape[0] < min_nn:
                             # beware of the special case such that all the min_nn points are in a single bin
                             assert np.all(small[nonempty])
                             # the total number of points is lower than
                             # the desired minimum number of points per
                             # cell
-                            n = D.shape[0]
+                            n = X.shape[0]
                             I = np.repeat(np.arange(n), ncells)
                             J = np.tile(np.arange(ncells), n)
                             K = (I, J)
                         else:
-                            I = np.argsort(D[:,small], axis=0)[:min_nn].flatten()
                             small, = small.nonzero()
+                            I = nearest_points(small, min_nn).flatten()
                             J = np.tile(small, min_nn) # cell indices
                             assert I.size == J.size
                             # large-enough cells
-                            #if min_location_count:
-                            #    small = count < min_nn
-                            point_in_small_cells = np.any(
-                                small[:,np.newaxis] == K[np.newaxis,:], axis=0)
-                            Ic = np.logical_not(point_in_small_cells)
+                            Ic = ~np.isin(K, small)
                             Jc = K[Ic]
                             Ic, = Ic.nonzero()
                             Ic = Ic[0 <= Jc]
@@ -1125,10 +1178,11 @@ class Delaunay(Tessellation):
                         min_r, _ = knn(c)
                         if min_r is None:
                             if isinstance(K, tuple):
-                                Ic = I[J == c]
+                                Ic = _I[_J == c]
                             else:
-                                Ic, = (K == c).nonzero()
+                                Ic = points_in(c)
                             I.append(Ic)
+                            n.append(len(Ic))
                             continue
                     pending_cells = set([c])
                     visited_cells = set()
@@ -1140,19 +1194,10 @@ class Delaunay(Tessellation):
                             if isinstance(K, tuple):
                                 cell = _I[_J == _c]
                             else:
-                                cell = K == _c
-                            if D is None:
-                                d = X[cell] - Y[[c]]
-                                d = np.sqrt(np.sum(d * d, axis=1))
-                            else:
-                                d = D[cell, c]
-                            _in = d <= min_r
+                                cell = points_in(_c)
+                            _in = distance_to(cell, c) <= min_r
                             if np.any(_in):
-                                if np.all(_in):
-                                    included_points[cell] = True
-                                else:
-                                    cell, = cell.nonzero()
-                                    included_points[cell[_in]] = True
+                                included_points[cell[_in]] = True
                                 _pending_cells |= set(self.neighbours(_c).tolist())
                         pending_cells = _pending_cells - visited_cells
                     Ic, = included_points.nonzero()
@@ -1296,17 +1341,33 @@ class Voronoi(Delaunay):
         else:
             voronoi = spatial.Voronoi(points)
         self._vertices = voronoi.vertices
-        self._cell_vertices = { i: np.array([ v for v in voronoi.regions[r] if 0 <= v ]) \
-                for i, r in enumerate(voronoi.point_region) if 0 <= r }
         n_centers = self._cell_centers.shape[0]
-        # decompose the ridges as valid pairs of vertices and build an adjacency matrix
-        ps = []
-        for r in voronoi.ridge_vertices:
-            pairs = np.c_[r, np.roll(r, 1)]
-            pairs = pairs[np.all(0 <= pairs, axis=1)]
-            ps.append(pairs)
-        ij = np.concatenate(ps)
         n_vertices = self._vertices.shape[0]
+        # all the cells share a single array of vertex indices, as in a CSR matrix
+        region_indptr, region_indices = _flatten(voronoi.regions)
+        point_region = np.asarray(voronoi.point_region)
+        cells = np.flatnonzero(0 <= point_region)
+        regions = point_region[cells]
+        count = region_indptr[regions+1] - region_indptr[regions]
+        cell = np.repeat(cells, count)
+        vertex = region_indices[np.arange(count.sum()) + \
+                np.repeat(region_indptr[regions] - np.cumsum(count) + count, count)]
+        valid = 0 <= vertex
+        cell, vertex = cell[valid], vertex[valid]
+        indptr = np.r_[0, np.cumsum(np.bincount(cell, minlength=n_centers))]
+        cell_vertices = sparse_to_dict(sparse.csr_matrix(
+            (np.ones(vertex.size, dtype=bool), vertex, indptr),
+            shape=(n_centers, n_vertices)))
+        self._cell_vertices = { i: cell_vertices[i] for i in cells }
+        # decompose the ridges as valid pairs of vertices and build an adjacency matrix;
+        # each vertex is paired with the previous vertex in the same ridge (cyclically)
+        ridge_indptr, ridge_indices = _flatten(voronoi.ridge_vertices)
+        previous = np.arange(-1, ridge_indices.size-1)
+        count = np.diff(ridge_indptr)
+        first = ridge_indptr[:-1][0 < count]
+        previous[first] = ridge_indptr[1:][0 < count] - 1
+        ij = np.c_[ridge_indices, ridge_indices[previous]]
+        ij = ij[np.all(0 <= ij, axis=1)]
         self._vertex_adjacency = sparse.coo_matrix((np.ones(ij.size, dtype=bool),
                 (ij.ravel('F'), np.fliplr(ij).ravel('F'))),
             shape=(n_vertices, n_vertices))
@@ -1330,65 +1391,68 @@ class Voronoi(Delaunay):
     @property
     def cell_volume(self):
         if self._cell_volume is None:
-            adjacency = self.vertex_adjacency.tocsr()
-            cell_volume = np.full(len(self._cell_centers), np.NaN)
-            for i, u in enumerate(self._cell_centers):
-                js = _js = self.cell_vertices[i] # vertex indices
-
-                if u.size != 2:
-                    # use Qhull to estimate the volume
-                    pts = self._vertices[js]
-                    if pts.shape[1] < pts.shape[0]: # if enough points
-                        try:
-                            hull = spatial.ConvexHull(pts)
-                            cell_volume[i] = hull.volume
-                        except (SystemExit, KeyboardInterrupt):
-                            raise
-                        except:
-                            pass
-                    continue
-
-                if isinstance(js, np.ndarray):
-                    js = set(js.tolist())
-                else:
-                    js = set(js)
-                simplices = []
-                while js:
-                    j = js.pop()
-                    # j's neighbours
-                    ks = adjacency.indices[adjacency.indptr[j]:adjacency.indptr[j+1]].tolist()
-                    for k in ks:
-                        if k in js:
-                            simplices.append((j, k))
-
-                if len(simplices) != len(_js):
-                    # missing vertices are at infinite distance;
-                    # take instead the convex hull of the local vertices plus
-                    # the center of the cell (ideally all the points in the cell)
-                    pts = np.r_[self._vertices[_js], u[np.newaxis,:]]
-                    if pts.shape[1] < pts.shape[0]: # if enough points
-                        try:
-                            hull = spatial.ConvexHull(pts)
-                            cell_volume[i] = hull.volume
-                        except (SystemExit, KeyboardInterrupt):
-                            raise
-                        except:
-                            pass
-                    continue
-
-                if simplices: # `simplices` is not empty
-                    cell_volume[i] = 0.
-                    for j, k in simplices:
-                        v = self._vertices[j] if isinstance(j, int) else j
-                        w = self._vertices[k] if isinstance(k, int) else k
-                        cell_volume[i] += .5 * abs(\
-                                (v[0] - u[0]) * (w[1] - u[1]) - \
-                                (w[0] - u[0]) * (v[1] - u[1]) \
-                            )
-                elif ~np.isinf(self._cell_centers[i,0]):
+            centers = np.asarray(self._cell_centers)
+            n_cells, dim = centers.shape
+            cell_vertices = self.cell_vertices
+            vertices = self._vertices
+            if isinstance(cell_vertices, dict):
+                cells = list(cell_vertices.keys())
+            else:
+                cells = range(len(cell_vertices))
+            indptr, vertex = _flatten([ cell_vertices[i] for i in cells ])
+            vertex_count = np.zeros(n_cells, dtype=int)
+            vertex_count[cells] = np.diff(indptr)
+            cell = np.repeat(np.asarray(cells, dtype=int), vertex_count[cells])
+            start = dict(zip(cells, indptr[:-1]))
+            cell_volume = np.full(n_cells, np.NaN)
+            if dim == 2:
+                # fan triangulation from the cell center over the ridges, as
+                # pairs of adjacent vertices that belong to the same cell
+                adjacency = self.vertex_adjacency.tocoo()
+                j, k = adjacency.row.astype(np.int64), adjacency.col.astype(np.int64)
+                n_vertices = vertices.shape[0]
+                edges = np.unique(np.minimum(j, k) * n_vertices + np.maximum(j, k))
+                j, k = edges // n_vertices, edges % n_vertices
+                j, k = j[j < k], k[j < k]
+                n_edges = j.size
+                cell_vertex = sparse.csr_matrix((np.ones(vertex.size, dtype=int), (cell, vertex)),
+                        shape=(n_cells, n_vertices))
+                cell_vertex.data[:] = 1 # ignore duplicate vertices
+                edge_vertex = sparse.csr_matrix((np.ones(2*n_edges, dtype=int),
+                        (np.tile(np.arange(n_edges), 2), np.r_[j, k])),
+                        shape=(n_edges, n_vertices))
+                cell_edge = (cell_vertex * edge_vertex.T).tocoo()
+                both = cell_edge.data == 2
+                i, e = cell_edge.row[both], cell_edge.col[both]
+                u, v, w = centers[i], vertices[j[e]], vertices[k[e]]
+                area = .5 * np.abs( \
+                        (v[:,0] - u[:,0]) * (w[:,1] - u[:,1]) - \
+                        (w[:,0] - u[:,0]) * (v[:,1] - u[:,1]) )
+                simplex_count = np.bincount(i, minlength=n_cells)
+                closed = (simplex_count == vertex_count) & (0 < simplex_count)
+                cell_volume[closed] = np.bincount(i, weights=area, minlength=n_cells)[closed]
+                # missing vertices are at infinite distance;
+                # take instead the convex hull of the local vertices plus
+                # the center of the cell (ideally all the points in the cell)
+                for i in np.flatnonzero(simplex_count != vertex_count):
+                    js = vertex[start[i]:start[i]+vertex_count[i]]
+                    cell_volume[i] = _hull_volume(np.r_[vertices[js], centers[[i]]])
+                no_boundaries = (vertex_count == 0) & ~np.isinf(centers[:,0])
+                if np.any(no_boundaries):
                     # cells with no vertices and which center coordinates are infinite
                     # are deleted cells
-                    raise RuntimeError('cell {} has no boundaries'.format(i))
+                    raise RuntimeError('cell {} has no boundaries'.format(np.flatnonzero(no_boundaries)[0]))
+            else:
+                if dim == 3:
+                    closed, volume = _closed_cell_volume_3d(centers, vertices, cell, vertex)
+                    cell_volume[closed] = volume[closed]
+                else:
+                    closed = np.zeros(n_cells, dtype=bool)
+                # use Qhull to estimate the volume
+                for i in np.flatnonzero(~closed):
+                    if i in start:
+                        js = vertex[start[i]:start[i]+vertex_count[i]]
+                        cell_volume[i] = _hull_volume(vertices[js])
             self._cell_volume = self.scaler.unscale_surface_area(cell_volume)
         return self.__returnlazy__('cell_volume', self._cell_volume)
 
@@ -1545,6 +1609,7 @@ class Voronoi(Delaunay):
 
         ## cell centers
         self._cell_centers[cell_indices] = not_a_coordinate
+        self._cell_center_tree = None
 
         ## cell vertices; let _preprocess recompute
         self.cell_vertices = None
@@ -1818,6 +1883,7 @@ class Voronoi(Delaunay):
 
             ## cell_centers
             self._cell_centers[i] = not_a_coordinate
+            self._cell_center_tree = None
             self._vertices[_discarded_vertices] = not_a_coordinate
 
             if pack_indices:
@@ -1885,6 +1951,125 @@ class Voronoi(Delaunay):
 
 
 
+def _flatten(arrays):
+    """
+    Concatenate sequences of integers.
+
+    Returns the CSR-like `indptr` and `indices` arrays.
+    """
+    count = np.fromiter(( len(a) for a in arrays ), dtype=int, count=len(arrays))
+    indices = np.fromiter(itertools.chain.from_iterable(arrays), dtype=int, count=count.sum())
+    return np.r_[0, np.cumsum(count)], indices
+
+def _hull_volume(points):
+    """
+    Volume of the convex hull of `points`, or NaN if Qhull fails.
+    """
+    if points.shape[0] <= points.shape[1]: # if not enough points
+        return np.NaN
+    try:
+        return spatial.ConvexHull(points).volume
+    except (SystemExit, KeyboardInterrupt):
+        raise
+    except:
+        return np.NaN
+
+def _closed_cell_volume_3d(centers, vertices, cell, vertex, rtol=1e-6):
+    """
+    Volume of all the 3D cells at once.
+
+    The ridges are identified as the sets of (at least 3) vertices shared by pairs of cells.
+    The vertices of each ridge are sorted by angle around the ridge centroid, and the ridge
+    is fan-triangulated from the centroid to get its vector area, oriented from the first to
+    the second cell.
+    Following the divergence theorem, the volume of a cell is the sum over its ridges of the
+    outward vector areas dotted with the ridge centroids, divided by 3.
+
+    Arguments:
+
+        centers (numpy.ndarray): cell centers.
+
+        vertices (numpy.ndarray): vertex coordinates.
+
+        cell, vertex (numpy.ndarray): cell and vertex indices of the cell-vertex associations.
+
+        rtol (float): the vector areas of the ridges of a closed cell sum to zero, up to
+            `rtol` times the total area.
+
+    Returns:
+
+        tuple: boolean array of closed cells, and array of cell volumes (valid for the
+            closed cells only).
+    """
+    n_cells = centers.shape[0]
+    volume = np.zeros(n_cells)
+    closed = np.zeros(n_cells, dtype=bool)
+    # unique associations, ordered by vertex and then by cell
+    association = np.unique(vertex * n_cells + cell)
+    vertex, cell = association // n_cells, association % n_cells
+    if not vertex.size:
+        return closed, volume
+    max_degree = np.bincount(vertex).max()
+    # the cells that share a vertex share a ridge that includes this vertex
+    ci, cj, vs = [], [], []
+    for offset in range(1, max_degree):
+        same = vertex[offset:] == vertex[:-offset]
+        ci.append(cell[:-offset][same])
+        cj.append(cell[offset:][same])
+        vs.append(vertex[offset:][same])
+    if not ci:
+        return closed, volume
+    ci, cj, vs = np.concatenate(ci), np.concatenate(cj), np.concatenate(vs)
+    ridges, ridge, count = np.unique(ci * n_cells + cj, return_inverse=True, return_counts=True)
+    ridge = ridge.ravel()
+    valid = 3 <= count[ridge]
+    ci, cj, vs, ridge = ci[valid], cj[valid], vs[valid], ridge[valid]
+    ridges = ridges // n_cells, ridges % n_cells
+    n_ridges = count.size
+    count = np.bincount(ridge, minlength=n_ridges)
+    # ridge centroids
+    x = vertices[vs]
+    nonempty = 0 < count
+    centroid = np.zeros((n_ridges, 3))
+    for d in range(3):
+        centroid[nonempty,d] = np.bincount(ridge, weights=x[:,d], minlength=n_ridges)[nonempty] \
+                / count[nonempty]
+    # orthonormal basis of the ridge planes
+    normal = centers[ridges[1]] - centers[ridges[0]]
+    normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+    axis = np.eye(3)[np.argmin(np.abs(normal), axis=1)]
+    e1 = np.cross(normal, axis)
+    e1 /= np.linalg.norm(e1, axis=1, keepdims=True)
+    e2 = np.cross(normal, e1)
+    # sort the vertices by angle around the ridge centroid, ridge by ridge
+    dx = x - centroid[ridge]
+    angle = np.arctan2(np.sum(dx * e2[ridge], axis=1), np.sum(dx * e1[ridge], axis=1))
+    order = np.lexsort((angle, ridge))
+    ridge, dx = ridge[order], dx[order]
+    indptr = np.r_[0, np.cumsum(count)]
+    successor = np.arange(1, ridge.size+1)
+    successor[indptr[1:][nonempty]-1] = indptr[:-1][nonempty]
+    triangle_area = .5 * np.cross(dx, dx[successor])
+    area = np.zeros((n_ridges, 3))
+    for d in range(3):
+        area[:,d] = np.bincount(ridge, weights=triangle_area[:,d], minlength=n_ridges)
+    # accumulate over the ridges of each cell
+    # (the cell centers are taken as origins for better numerical precision)
+    volume = np.bincount(ridges[0], minlength=n_cells,
+                weights=np.sum(area * (centroid - centers[ridges[0]]), axis=1)) - \
+            np.bincount(ridges[1], minlength=n_cells,
+                weights=np.sum(area * (centroid - centers[ridges[1]]), axis=1))
+    volume /= 3.
+    total_area = np.linalg.norm(area, axis=1)
+    total_area = np.bincount(ridges[0], weights=total_area, minlength=n_cells) + \
+            np.bincount(ridges[1], weights=total_area, minlength=n_cells)
+    net_area = np.zeros((n_cells, 3))
+    for d in range(3):
+        net_area[:,d] = np.bincount(ridges[0], weights=area[:,d], minlength=n_cells) - \
+                np.bincount(ridges[1], weights=area[:,d], minlength=n_cells)
+    closed = (0 < total_area) & (np.linalg.norm(net_area, axis=1) <= rtol * total_area)
+    return closed, volume
+
 def dict_to_sparse(cell_vertex, shape=None):
     """
     Convert cell-vertex association :class:`dict` to :mod:`~scipy.sparse` matrices.
@@ -2069,7 +2254,7 @@ def boxed_voronoi_2d(points, bounding_box=None):
 
 
 def cell_index_by_radius(tessellation, points, radius, format=None, select=None, metric='euclidean',
-        **kwargs):
+        workers=1, **kwargs):
     """
     See :meth:`Delaunay.cell_index`.
 
@@ -2083,6 +2268,20 @@ def cell_index_by_radius(tessellation, points, radius, format=None, select=None,
     Y = tessellation._cell_centers
     ncells = Y.shape[0]
     shape = (X.shape[0], ncells)
+    if metric == 'euclidean' and not kwargs:
+        try:
+            tree, cells = tessellation._cell_center_tree_cells()
+        except AttributeError:
+            finite = np.all(np.isfinite(Y), axis=1)
+            cells = None if np.all(finite) else np.flatnonzero(finite)
+            tree = spatial.cKDTree(Y if cells is None else Y[cells])
+        C = tree.query_ball_point(X, radius, workers=workers, return_sorted=True)
+        n = np.array([ len(c) for c in C ])
+        P = np.repeat(np.arange(X.shape[0]), n)
+        C = np.concatenate(C).astype(int) if P.size else np.zeros(0, dtype=int)
+        if cells is not None:
+            C = cells[C]
+        return format_cell_index((P, C), format=format, select=select, shape=shape)
     try:
         D = cdist(X, Y, metric, **kwargs)
     except MemoryError:
@@ -2115,7 +2314,7 @@ def cell_index_by_radius(tessellation, points, radius, format=None, select=None,
             C.append(Ci)
         associations = (np.concatenate(P), np.concatenate(C))
     else:
-        associations = (D <= r2).nonzero()
+        associations = (D <= radius).nonzero()
     return format_cell_index(associations, format=format, select=select, shape=shape)
 
 
@@ -18,6 +18,7 @@ import numpy as np
 import pandas as pd
 import copy
 import scipy.sparse as sparse
+from multiprocessing import Pool
 
 
 class NestedTessellations(Tessellation):
@@ -30,6 +31,14 @@ class NestedTessellations(Tessellation):
     In `__init__`, `tessellation` and `cell_index`,
     the `scaler` (if any), `args` (if any) and `kwargs` arguments
     only apply to the nested tessellations.
+
+    `tessellate` and `cell_index` also admit keyword argument `worker_count`
+    to process the nested tessellations in parallel.
+    If `worker_count` is defined, each nested tessellation is grown with its own random
+    seed, drawn from :mod:`numpy.random`, so that the result does not depend on
+    `worker_count`; ``worker_count=1`` grows the nested tessellations in the current process.
+    Otherwise, the nested tessellations are grown one after the other,
+    sharing the random number generator.
     """
     __slots__ = ('_parent', '_children', 'child_factory', \
         'parent_index_arguments', 'child_factory_arguments', \
@@ -95,21 +104,52 @@ class NestedTessellations(Tessellation):
         any_child = self.child_factory(scaler=self.scaler, **self.child_factory_arguments)
         any_child._preprocess(points)
         #
+        worker_count = kwargs.pop('worker_count', None)
         pt_ids, cell_ids, rows = self._parent_index(points)
-        self.children = {}
-        for u in np.unique(cell_ids):
-            child = self.child_factory(scaler=self.scaler, **self.child_factory_arguments)
-            child_pts = rows(points, pt_ids[cell_ids==u])
+        child_pt_ids = _group_by_parent(pt_ids, cell_ids)
+        if worker_count:
+            seeds = np.random.randint(2**31, size=len(child_pt_ids))
+        else:
+            seeds = [None] * len(child_pt_ids)
+        tasks, parent_cells = [], []
+        for u, seed in zip(child_pt_ids, seeds):
+            child_pts = rows(points, child_pt_ids[u])
             if child_pts.size:
-                child.tessellate(child_pts, *args, **kwargs)
-                self.children[u] = child
+                tasks.append((self.child_factory, self.child_factory_arguments, self.scaler,
+                    child_pts, seed, args, kwargs))
+                parent_cells.append(u)
+        if worker_count and 1 < worker_count:
+            with Pool(worker_count) as pool:
+                children = pool.map(_tessellate_child, tasks, chunksize=1)
+            for child in children:
+                child.scaler = self.scaler
+        elif worker_count:
+            state = np.random.get_state()
+            try:
+                children = [ _tessellate_child(task) for task in tasks ]
+            finally:
+                np.random.set_state(state)
+        else:
+            children = [ _tessellate_child(task) for task in tasks ]
+        self.children = dict(zip(parent_cells, children))
 
     def cell_index(self, points, *args, **kwargs):
         point_count = points.shape[0]
         #if isinstance(points, pd.DataFrame):
         #       point_count = max(point_count, points.index.max()+1) # NO!
         # point indices are row indices and NOT rows labels
+        worker_count = kwargs.pop('worker_count', None)
         parent_pt_ids, parent_cell_ids, rows = self._parent_index(points)
+        parent_pt_ids = _group_by_parent(parent_pt_ids, parent_cell_ids)
+        empty = np.zeros(0, dtype=int)
+        tasks = ( (self.children[u], rows(points, parent_pt_ids[u]), args, kwargs) \
+                for u in self.children if u in parent_pt_ids )
+        if worker_count and 1 < worker_count:
+            with Pool(worker_count) as pool:
+                child_partitions = pool.map(_child_cell_index, list(tasks), chunksize=1)
+            child_partitions = iter(child_partitions)
+        else:
+            child_partitions = map(_child_cell_index, tasks)
         _is_array_ = _is_pair_ = _is_sparse_ = False # (exclusive) type flags
         _first_ = True # initialization flag
         _type_error_ = TypeError('multiple nested partition types; `format` should be enforced')
@@ -117,10 +157,9 @@ class NestedTessellations(Tessellation):
         cell_count = 0
         for u in self.children:
             child_cell_count = self.children[u].cell_adjacency.shape[0]
-            child_pt_ids = parent_pt_ids[parent_cell_ids==u]
+            child_pt_ids = parent_pt_ids.get(u, empty)
             if child_pt_ids.size: # if cell is empty
-                child_partition = self.children[u].cell_index(
-                    rows(points, child_pt_ids), *args, **kwargs)
+                child_partition = next(child_partitions)
                 # TODO: test cases such that not any cell-point association is found;
                 # currently, ``continue`` is not an option but
                 # _first_ is made False anyway
@@ -134,10 +173,11 @@ class NestedTessellations(Tessellation):
                         else:
                             _format = None
                         kwargs['format'] = 'coo' # for the next calls to `cell_index`
-                        if not sparse.isspmatrix_coo(child_partition):
-                            child_partition = child_partition.tocoo()
                     elif not _is_sparse_:
                         raise _type_error_
+                    if not sparse.isspmatrix_coo(child_partition):
+                        # the children may have been processed before `format` was set
+                        child_partition = child_partition.tocoo()
                     # use `pt_ids` as `rows`, `cell_ids` as `cols` and `pt_cell` as `data`
                     _pt_cell = child_partition.data
                     _pt_ids = child_pt_ids[child_partition.rows]
@@ -326,6 +366,34 @@ class NestedTessellations(Tessellation):
         raise IndexError('no such child index: {}'.format(u))
 
 
+def _group_by_parent(pt_ids, cell_ids):
+    """
+    Groups point indices by parent cell, sorting the cell indices once.
+
+    Returns:
+
+        dict: parent cell indices as keys, in ascending order, and arrays of
+            point indices as values, in the same order as in `pt_ids`.
+    """
+    order = np.argsort(cell_ids, kind='stable')
+    pt_ids, cell_ids = pt_ids[order], cell_ids[order]
+    cells, start = np.unique(cell_ids, return_index=True)
+    stop = np.r_[start[1:], cell_ids.size]
+    return { u: pt_ids[i:j] for u, i, j in zip(cells, start, stop) }
+
+def _tessellate_child(task):
+    factory, factory_kwargs, scaler, points, seed, args, kwargs = task
+    if seed is not None:
+        np.random.seed(seed)
+    child = factory(scaler=scaler, **factory_kwargs)
+    child.tessellate(points, *args, **kwargs)
+    return child
+
+def _child_cell_index(task):
+    child, points, args, kwargs = task
+    return child.cell_index(points, *args, **kwargs)
+
+
 
 __all__ = ['NestedTessellations']
 
@@ -126,6 +126,11 @@ class TimeLattice(Tessellation):
                 numbers of nearest neighbours in time; keyword-argument only.
 
         `knn` and `time_knn` are not compatible.
+
+        The timestamps are sorted once and the points in each time segment are found
+        by bisection.
+        If no other arguments than `metric` and `workers` are passed to the spatial
+        tessellation, the spatial cell index is evaluated only once for all the points.
         """
         exclude = kwargs.pop('exclude_cells_by_location_count', None)
         # time knn
@@ -164,19 +169,33 @@ class TimeLattice(Tessellation):
             location_count = np.zeros(count_shape, dtype=int)
         ps, cs = [], []
         if time_knn is None:
+            # sort the timestamps once and find the bounds of the (possibly overlapping)
+            # segments by bisection
+            order = np.argsort(ts, kind='stable')
+            starts = np.searchsorted(ts[order], time[:,0], side='left')
+            stops = np.searchsorted(ts[order], time[:,1], side='left')
+            spatial_index = None
+            if self.spatial_mesh is not None and not args and \
+                    set(kwargs.keys()) <= {'metric', 'workers'}:
+                # the point-cell association does not depend on the other points;
+                # assign all the points at once
+                spatial_index = self.spatial_mesh.cell_index(points, **kwargs)
+                if not isinstance(spatial_index, np.ndarray):
+                    spatial_index = None
             for t in range(nsegments):
-                t0, t1 = time[t]
-                segment = np.logical_and(t0 <= ts, ts < t1)
-                pts, = np.nonzero(segment)
+                pts = np.sort(order[starts[t]:stops[t]])
                 if pts.size:
                     if self.spatial_mesh is None:
                         ids = np.full_like(pts, t)
                     else:
-                        if isinstance(points, pd.DataFrame):
-                            points_t = points.iloc[segment]
+                        if spatial_index is None:
+                            if isinstance(points, pd.DataFrame):
+                                points_t = points.iloc[pts]
+                            else:
+                                points_t = points[pts]
+                            ids = self.spatial_mesh.cell_index(points_t, *args, **kwargs)
                         else:
-                            points_t = points[segment]
-                        ids = self.spatial_mesh.cell_index(points_t, *args, **kwargs)
+                            ids = spatial_index[pts]
                         if isinstance(ids, np.ndarray):
                             pass
                         elif isinstance(ids, tuple):
@@ -236,11 +255,13 @@ class TimeLattice(Tessellation):
                     pts, ids = ids
                 else:
                     raise NotImplementedError
+                # sort the points by cell index once
+                order = np.argsort(ids, kind='stable')
+                bounds = np.searchsorted(ids[order], np.arange(ncells + 1))
                 for i in range(ncells):#np.unique(ids):
-                    if pts is None:
-                        pts_i, = (ids==i).nonzero()
-                    else:
-                        pts_i = pts[ids==i]
+                    pts_i = order[bounds[i]:bounds[i+1]]
+                    if pts is not None:
+                        pts_i = pts[pts_i]
                     ts_i = ts[pts_i]
                     for t in range(nsegments):
                         if callable(time_knn):
@@ -277,9 +298,7 @@ class TimeLattice(Tessellation):
             cs = np.concatenate(cs)
             if exclude and count_shape[1:]:
                 i, t = exclude(location_count).nonzero()
-                ok = np.ones(cs.size, dtype=bool)
-                for c in t * ncells + i:
-                    ok[cs == c] = False
+                ok = ~np.isin(cs, t * ncells + i)
                 ps = ps[ok]
                 cs = cs[ok]
         return (ps, cs)
@@ -603,28 +622,7 @@ class TimeLattice(Tessellation):
         if self.spatial_mesh is None:
             raise NotImplementedError('missing spatial tessellation')
         ncells = self.spatial_mesh.cell_adjacency.shape[0]
-        nsegments = self.time_lattice.shape[0]
-        try:
-            # not tested yet
-            segment, cell = np.divmod(df.index, ncells) # 1.13.0 <= numpy
-        except AttributeError:
-            try:
-                segment = df.index // ncells
-            except TypeError:
-                print(df.index)
-                raise
-            cell = np.mod(df.index, ncells)
-        ts = []
-        for t in range(nsegments):
-            xt = df[segment == t]
-            xt.index = cell[segment == t]
-            if return_times:
-                if self.time_lattice.dtype == int:
-                    raise ValueError('cannot return timestamps')
-                ts.append((self.time_lattice[t], xt))
-            else:
-                ts.append(xt)
-        return ts
+        return self._split_maps(df, ncells, return_times)
 
     def split_segments(self, spt_data, return_times=False):
         if self.spatial_mesh is None:
@@ -639,49 +637,24 @@ class TimeLattice(Tessellation):
         except AttributeError:
             pass
         if isinstance(spt_data, (pd.Series, pd.DataFrame)):
-            df = spt_data
-            if ncells == 1:
-                segment = np.asarray(df.index)
-                cell = np.zeros_like(segment)
-            else:
-                # borrowed from `split_frames`
-                try:
-                    segment, cell = np.divmod(df.index, ncells) # 1.13.0 <= numpy
-                except AttributeError:
-                    try:
-                        segment = df.index // ncells
-                    except TypeError:
-                        print(df.index)
-                        raise
-                    cell = np.mod(df.index, ncells)
-            for t in range(nsegments):
-                xt = df[segment == t]
-                xt.index = cell[segment == t]
-                if return_times:
-                    if self.time_lattice.dtype == int:
-                        raise ValueError('cannot return timestamps')
-                    ts.append((self.time_lattice[t], xt))
-                else:
-                    ts.append(xt)
-            #
+            ts = self._split_maps(spt_data, ncells, return_times)
         elif spt_data.tessellation is self:
             df = spt_data.points
             tessellation = self.spatial_mesh
+            p,c = format_cell_index(spt_data.cell_index, 'tuple')
+            if c.size == 0:
+                import warnings
+                warnings.warn('empty segment; please check the implementation')
+            # sort the point-cell pairs by segment once
+            segment = c // ncells
+            order = np.argsort(segment, kind='stable')
+            bounds = np.searchsorted(segment[order], np.arange(nsegments + 1))
             for t in range(nsegments):
-                p,c = format_cell_index(spt_data.cell_index, 'tuple')
-                seg = (t*ncells<=c) & (c<(t+1)*ncells)
-                if seg.size == 0:
-                    import warnings
-                    warnings.warn('empty segment; please check the implementation')
-                seg_p = np.unique(p[seg])
+                seg = order[bounds[t]:bounds[t+1]]
+                seg_p, seg_pi = np.unique(p[seg], return_inverse=True)
                 points = df.iloc[seg_p]
-                wrong = p.max()+1
-                p_tr = np.full(p.max()+1, wrong, dtype=int)
-                p_tr[seg_p] = np.arange(seg_p.size)
-                seg_p = p_tr[p[seg]]
-                assert not np.any(seg_p == wrong)
                 seg_c = c[seg] - t*ncells
-                assignment = (seg_p, seg_c)
+                assignment = (seg_pi, seg_c)
                 #
                 cells = type(spt_data)(points, tessellation, assignment)
                 cells.param = dict(spt_data.param)
@@ -695,6 +668,42 @@ class TimeLattice(Tessellation):
             raise ValueError('unsupported input argument')
         return ts
 
+    def _split_maps(self, df, ncells, return_times=False):
+        """
+        Split maps indexed by space-time cell into a list of maps indexed by spatial cell,
+        one per time segment.
+        """
+        if return_times and self.time_lattice.dtype == int:
+            raise ValueError('cannot return timestamps')
+        nsegments = self.time_lattice.shape[0]
+        if ncells == 1:
+            segment = np.asarray(df.index)
+            cell = np.zeros_like(segment)
+        else:
+            try:
+                segment, cell = np.divmod(df.index, ncells) # 1.13.0 <= numpy
+            except AttributeError:
+                try:
+                    segment = df.index // ncells
+                except TypeError:
+                    print(df.index)
+                    raise
+                cell = np.mod(df.index, ncells)
+            segment = np.asarray(segment)
+        # sort the rows by segment once
+        order = np.argsort(segment, kind='stable')
+        bounds = np.searchsorted(segment[order], np.arange(nsegments + 1))
+        ts = []
+        for t in range(nsegments):
+            rows = order[bounds[t]:bounds[t+1]]
+            xt = df.iloc[rows]
+            xt.index = cell[rows]
+            if return_times:
+                ts.append((self.time_lattice[t], xt))
+            else:
+                ts.append(xt)
+        return ts
+
     def freeze(self):
         if self.spatial_mesh is not None:
             self.spatial_mesh.freeze()